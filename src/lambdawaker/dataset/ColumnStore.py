@@ -0,0 +1,211 @@
+import io
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Scalar field types that can be stored column-wise, and their in-memory dtype
+COLUMN_DTYPES = {
+    'int': np.int64,
+    'float': np.float64,
+    'str': object,
+}
+
+# Converts a value to what its column stores, raising before anything is changed when it cannot
+_CONVERTERS = {
+    'int': np.int64,
+    'float': np.float64,
+    'str': str,
+}
+
+
+def _encode_strings(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Packs strings Arrow-style: one UTF-8 buffer and the offsets of every value in it."""
+    encoded = [(value or "").encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _decode_strings(offsets: np.ndarray, data: np.ndarray) -> np.ndarray:
+    buffer = data.tobytes()
+    values = np.empty(len(offsets) - 1, dtype=object)
+    values[:] = [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+    return values
+
+
+class ColumnStore:
+    """
+    The scalar fields of a dataset stored column-wise, one numpy array per field.
+
+    Rows are addressed by record id. Every column has a validity mask, so records can leave
+    fields unset. The arrays keep spare rows at their end and grow geometrically, so appending
+    records one at a time is amortized O(1), only the first `len(ids)` rows are in use. The
+    store is persisted as a single `.npz` file with no pickled objects: numeric columns as
+    plain arrays, and string columns and ids as an offsets array plus one UTF-8 buffer.
+    """
+
+    def __init__(self, fields: Dict[str, str]):
+        """
+        Args:
+            fields (Dict[str, str]): Field name -> field type, one of COLUMN_DTYPES.
+        """
+        for name, field_type in fields.items():
+            if field_type not in COLUMN_DTYPES:
+                raise ValueError(f"Field '{name}' of type '{field_type}' cannot be stored as a column.")
+
+        self.fields = dict(fields)
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.values = {name: np.empty(0, dtype=COLUMN_DTYPES[t]) for name, t in self.fields.items()}
+        self.valid = {name: np.zeros(0, dtype=bool) for name in self.fields}
+        # Rows allocated in every array, at least len(ids)
+        self._capacity = 0
+        # Whether the store changed since it was loaded or serialized
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._rows
+
+    def get(self, record_id: str, name: str) -> Any:
+        """Returns the value of one field of a record as a Python scalar, None when it is not set."""
+        row = self._rows.get(record_id)
+        if row is None or not self.valid[name][row]:
+            return None
+        value = self.values[name][row]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def _reserve(self, rows: int):
+        """Makes room for `rows` rows, at least doubling the arrays when they have to grow."""
+        if rows <= self._capacity:
+            return
+
+        capacity = max(rows, 2 * self._capacity, 16)
+        used = len(self.ids)
+        for name, field_type in self.fields.items():
+            values = np.zeros(capacity, dtype=COLUMN_DTYPES[field_type])
+            values[:used] = self.values[name][:used]
+            valid = np.zeros(capacity, dtype=bool)
+            valid[:used] = self.valid[name][:used]
+            self.values[name], self.valid[name] = values, valid
+        self._capacity = capacity
+
+    def update(self, records: Iterable[Tuple[str, Dict[str, Any]]]):
+        """
+        Sets the given fields of many records, appending rows for new ids. None unsets a field.
+
+        Raises:
+            ValueError, TypeError: If a value does not fit its column, the store is left unchanged.
+        """
+        # Convert everything first, a bad value must not leave the store half updated
+        records = [
+            (record_id, {
+                name: None if value is None else _CONVERTERS[self.fields[name]](value)
+                for name, value in data.items()
+            })
+            for record_id, data in records if data
+        ]
+        new_ids = list(dict.fromkeys(record_id for record_id, _ in records if record_id not in self._rows))
+
+        if new_ids:
+            self._reserve(len(self.ids) + len(new_ids))
+            for record_id in new_ids:
+                self._rows[record_id] = len(self.ids)
+                self.ids.append(record_id)
+
+        for record_id, data in records:
+            row = self._rows[record_id]
+            for name, value in data.items():
+                # Unset values keep whatever the row holds (zeros for new rows), only the mask changes
+                if value is not None:
+                    self.values[name][row] = value
+                self.valid[name][row] = value is not None
+
+        self.dirty = self.dirty or bool(records)
+
+    def delete(self, record_ids: Iterable[str]):
+        rows = [self._rows[record_id] for record_id in record_ids if record_id in self._rows]
+        if not rows:
+            return
+
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[rows] = False
+        used = len(self.ids)
+        self.ids = [record_id for record_id, kept in zip(self.ids, keep) if kept]
+        self._rows = {record_id: row for row, record_id in enumerate(self.ids)}
+        for name in self.fields:
+            self.values[name] = self.values[name][:used][keep]
+            self.valid[name] = self.valid[name][:used][keep]
+        self._capacity = len(self.ids)
+        self.dirty = True
+
+    def column(self, name: str, record_ids: Optional[Sequence[str]] = None) -> np.ma.MaskedArray:
+        """
+        Returns a whole column, masked where the value is not set.
+
+        Args:
+            name (str): The field name.
+            record_ids (Optional[Sequence[str]], optional): Rows to return, in this order.
+                Ids without a row are masked. Defaults to the rows in storage order.
+        """
+        if name not in self.fields:
+            raise KeyError(f"'{name}' is not a column field")
+
+        used = len(self.ids)
+        values, valid = self.values[name][:used], self.valid[name][:used]
+        if record_ids is None:
+            return np.ma.MaskedArray(values.copy(), mask=~valid)
+
+        rows = np.fromiter((self._rows.get(record_id, -1) for record_id in record_ids),
+                           dtype=np.int64, count=len(record_ids))
+        present = rows >= 0
+        gathered = np.zeros(len(rows), dtype=values.dtype)
+        gathered[present] = values[rows[present]]
+        mask = ~present
+        mask[present] = ~valid[rows[present]]
+        return np.ma.MaskedArray(gathered, mask=mask)
+
+    def to_bytes(self) -> bytes:
+        arrays = {}
+        arrays["ids.offsets"], arrays["ids.data"] = _encode_strings(self.ids)
+        used = len(self.ids)
+        for name, field_type in self.fields.items():
+            if field_type == 'str':
+                arrays[f"{name}.offsets"], arrays[f"{name}.data"] = _encode_strings(self.values[name][:used])
+            else:
+                arrays[f"{name}.values"] = self.values[name][:used]
+            arrays[f"{name}.valid"] = self.valid[name][:used]
+
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        self.dirty = False
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, fields: Dict[str, str]) -> "ColumnStore":
+        """
+        Loads a store written by `to_bytes`. Fields missing from the file start out unset and
+        columns whose type changed in the manifest are converted.
+        """
+        store = cls(fields)
+        with np.load(io.BytesIO(raw), allow_pickle=False) as arrays:
+            store.ids = list(_decode_strings(arrays["ids.offsets"], arrays["ids.data"]))
+            store._rows = {record_id: row for row, record_id in enumerate(store.ids)}
+
+            for name, field_type in fields.items():
+                if f"{name}.valid" not in arrays:
+                    store.values[name] = np.zeros(len(store.ids), dtype=COLUMN_DTYPES[field_type])
+                    store.valid[name] = np.zeros(len(store.ids), dtype=bool)
+                    continue
+
+                if f"{name}.offsets" in arrays:
+                    values = _decode_strings(arrays[f"{name}.offsets"], arrays[f"{name}.data"])
+                else:
+                    values = arrays[f"{name}.values"]
+                store.values[name] = values.astype(COLUMN_DTYPES[field_type])
+                store.valid[name] = arrays[f"{name}.valid"].astype(bool)
+        store._capacity = len(store.ids)
+
+        return store
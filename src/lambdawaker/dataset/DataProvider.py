@@ -1,4 +1,6 @@
+import posixpath
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
 
 class DataProvider(ABC):
@@ -45,6 +47,17 @@ class DataProvider(ABC):
         """
         pass
 
+    def list_files(self, relative_path: str) -> List[str]:
+        """
+        Lists the names (not paths) of the files in a directory, used to index datasets.
+
+        Defaults to the basenames of `list`, providers override it with something cheaper.
+
+        Args:
+            relative_path (str): The path to the directory relative to the root.
+        """
+        return [posixpath.basename(str(path).replace("\\", "/")) for path in self.list(relative_path)]
+
     @abstractmethod
     def count(self, relative_path: str):
         """
@@ -118,3 +131,29 @@ class DataProvider(ABC):
             relative_path (str): The path to remove.
         """
         pass
+
+    def replace(self, content, relative_path: str):
+        """
+        Writes content to a file so readers see either the previous or the new content.
+
+        Defaults to `store`, providers whose `store` is not atomic override it.
+
+        Args:
+            content (Union[str, bytes]): The content to write.
+            relative_path (str): The path to the file relative to the root.
+        """
+        self.store(content, relative_path)
+
+    def locate(self, relative_path: str) -> Optional[str]:
+        """
+        Returns the local filesystem path of a file, so it can be sent without reading it.
+
+        Providers that do not keep their files on the local disk return None.
+
+        Args:
+            relative_path (str): The path to the file relative to the root.
+
+        Returns:
+            Optional[str]: An absolute path, or None.
+        """
+        return None
@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class DatasetBulkWriter:
+    """
+    Buffers record inserts into a DiskDataset and writes them in parallel batches.
+
+    The file index is persisted once, when the `with` block exits (also on errors, so it
+    always matches the files already written).
+
+    Example:
+        with dataset.bulk_writer(batch_size=512) as writer:
+            for record_id, data in records:
+                writer.insert(record_id, data)
+    """
+
+    def __init__(self, dataset, batch_size: int = 256, max_workers: Optional[int] = None):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self.count = 0
+
+    def insert(self, record_id: str, data: Dict[str, Any]):
+        self._pending.append((record_id, data))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered records, the file index is still only persisted on exit."""
+        pending, self._pending = self._pending, []
+        self.dataset._write_records(pending, self.max_workers)
+        self.count += len(pending)
+
+    def __enter__(self) -> "DatasetBulkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.dataset._save_file_index()
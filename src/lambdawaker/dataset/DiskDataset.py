@@ -1,15 +1,57 @@
+import functools
+import glob
+import itertools
+import json
+import os
 import pathlib
+import posixpath
 import random
 import re
-from typing import Dict, Any, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Union, Optional, Tuple, List, Iterable, Iterator, Sequence
 
+import numpy as np
 import yaml
+from PIL import Image
 
+from lambdawaker.dataset.ColumnStore import ColumnStore
 from lambdawaker.dataset.DataProvider import DataProvider
+from lambdawaker.dataset.DatasetBulkWriter import DatasetBulkWriter
 from lambdawaker.dataset.Dataset import Dataset
 from lambdawaker.dataset.DiskProvider import DiskProvider
 from lambdawaker.dataset.FieldCaster import FieldCaster
+from lambdawaker.dataset.LRUCache import LRUCache
+from lambdawaker.dataset.MappedIdList import MappedIdList
 from lambdawaker.dataset.Record import Record
+from lambdawaker.dataset.prefetch import prefetch_map
+from lambdawaker.dataset.hadlers.process_data_payload import raw_media_type
+
+
+# Format version of the persisted id -> file index, bump when its layout changes
+FILE_INDEX_VERSION = 1
+
+_MISSING = object()
+
+
+def _is_column_field(field: Dict[str, Any]) -> bool:
+    return field.get('storage') == 'column'
+
+
+def _freeze(value: Any) -> Any:
+    """Prepares a decoded field to be shared through the field cache."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, Image.Image):
+        # Image.open decodes lazily, which is not safe to trigger from several threads at once
+        value.load()
+    return value
+
+
+def _share(value: Any) -> Any:
+    """Returns a cached field to a caller, images are copied since PIL operations often work in place."""
+    if isinstance(value, Image.Image):
+        return value.copy()
+    return value
 
 
 class DiskDataset(Dataset):
@@ -20,7 +62,8 @@ class DiskDataset(Dataset):
     of the dataset, including the fields and their storage locations.
     """
 
-    def __init__(self, path: str, provider: Optional[DataProvider] = None, read_only: bool = False):
+    def __init__(self, path: str, provider: Optional[DataProvider] = None, read_only: bool = False,
+                 id_index_path: Optional[str] = None, field_cache_bytes: Optional[int] = None):
         """
         Initializes the dataset.
 
@@ -28,12 +71,36 @@ class DiskDataset(Dataset):
             provider (Optional[DataProvider], optional): A data provider instance.
                 If no provider is given, it defaults to a DiskProvider.
             read_only (bool, optional): If True, the dataset cannot be modified. Defaults to False.
+            id_index_path (Optional[str], optional): A record id list written with
+                `MappedIdList.write`. When it exists the ids are memory-mapped from it and the
+                file index is not loaded, files are found on demand from `filename_pattern`, so
+                several processes can share one index without each holding the file index.
+            field_cache_bytes (Optional[int], optional): Memory budget of the cache of decoded
+                fields, shared by every record. Disabled by default (None or 0). When enabled,
+                cached numpy arrays are returned read-only since every caller gets the same
+                object, and cached images are fully decoded once and returned as copies.
         """
         self.provider = provider if provider is not None else DiskProvider()
         self.manifest = None
         self.record_ids = []
+        # record id -> field source folder -> relative path of the stored file
+        self.file_index: Dict[str, Dict[str, str]] = {}
+        self.file_index_name = None
+        # True while files are resolved on demand instead of through the file index
+        self._lazy_files = False
+        # True when `insert`/`delete` changed the index (or columns) since it was persisted
+        self._index_dirty = False
+        # (record_ids, set of the same ids), rebuilt when record_ids is replaced by another list
+        self._id_set: Optional[Tuple[Sequence[str], set]] = None
+        # Values of the fields with `storage: column`, None when the manifest has none
+        self.columns: Optional[ColumnStore] = None
+        self.columns_name = None
         self.read_only = read_only
+        self.id_index_path = id_index_path
         self.id = None
+        # Bumped on every insert and delete so caches keyed on paths can tell stale entries apart
+        self.version = 0
+        self.field_cache = LRUCache(max_bytes=field_cache_bytes) if field_cache_bytes else None
         self.load(path)
 
     def load(self, root_path: str, manifest_name: str = "manifest.yaml"):
@@ -50,12 +117,60 @@ class DiskDataset(Dataset):
         raw_manifest = self.provider.serve(manifest_name)
         self.manifest = yaml.safe_load(raw_manifest)
         self.id = self.manifest.get('id')
+        self.file_index_name = f"{pathlib.Path(manifest_name).stem}.index.json"
+        self.columns_name = f"{pathlib.Path(manifest_name).stem}.columns.npz"
+        self._load_columns()
+
+        # 2. Synchronize the internal ID list and the file index, reusing the persisted index
+        # when the field folders did not change since it was written. With a shared id index
+        # neither is read, files are resolved when a record needs them
+        if self.id_index_path is not None and os.path.exists(self.id_index_path):
+            self.record_ids = MappedIdList(self.id_index_path)
+            self._lazy_files = True
+        elif not self._load_file_index():
+            self._refresh_ids()
+
+    def _load_columns(self):
+        column_fields = {
+            field['name']: field['type'] for field in self.manifest.get('fields', []) if _is_column_field(field)
+        }
+        if not column_fields:
+            self.columns = None
+            return
+
+        try:
+            raw = self.provider.serve(self.columns_name)
+        except FileNotFoundError:
+            self.columns = ColumnStore(column_fields)
+        else:
+            self.columns = ColumnStore.from_bytes(raw, column_fields)
+
+    def column(self, name: str) -> np.ma.MaskedArray:
+        """
+        Returns every value of a `storage: column` field at once, aligned with `record_ids`.
 
-        # 2. Synchronize the internal ID list
-        self._refresh_ids()
+        Records without a value are masked. Filtering and sampling work on the whole column,
+        e.g. `ids = np.asarray(dataset.record_ids)[(dataset.column('age') > 30).filled(False)]`.
+
+        Raises:
+            KeyError: If the field is not stored as a column.
+        """
+        if self.columns is None:
+            raise KeyError(f"'{name}' is not a column field")
+        return self.columns.column(name, self.record_ids)
+
+    def write_id_index(self, path: str):
+        """Writes the current record ids to `path` in the format read by `id_index_path`."""
+        MappedIdList.write(path, self.record_ids)
 
     def _refresh_ids(self):
-        """Scans the first field's directory to find valid Record IDs."""
+        """
+        Scans the field directories once to find valid Record IDs and the file of every field.
+
+        Record IDs come from the first field's directory (or its column, for a `storage: column`
+        field), the file index covers every field stored as files. The result is persisted next
+        to the manifest, see `_save_file_index`.
+        """
         if not self.manifest or not self.manifest.get('fields'):
             return
 
@@ -64,51 +179,295 @@ class DiskDataset(Dataset):
 
         # Build a regex to extract the 'id' part from filenames
         # Escapes literals and converts {id} into a named capture group
-        regex_str = re.escape(pattern).replace(r'\{id\}', r'(?P<id>.+)')
-        regex = re.compile(f"^{regex_str}$")
+        regex = None
+        if pattern != "{id}":
+            regex_str = re.escape(pattern).replace(r'\{id\}', r'(?P<id>.+)')
+            regex = re.compile(f"^{regex_str}$")
+
+        # List the directory of each source (e.g., 'img/') in parallel, huge folders are
+        # bound by the filesystem rather than by Python
+        folders = self._source_folders()
+        with ThreadPoolExecutor(max_workers=min(8, len(folders) or 1)) as executor:
+            listings = list(executor.map(self.provider.list_files, folders))
+
+        self.file_index = {}
+        master_ids = []
+        for folder, names in zip(folders, listings):
+            is_master = folder == master_field['source']
+            for name in names:
+                stem = os.path.splitext(name)[0]
+                if regex is None:
+                    record_id = stem
+                else:
+                    match = regex.match(stem)
+                    if not match:
+                        continue
+                    record_id = match.group('id')
+
+                entry = self.file_index.get(record_id)
+                if entry is None:
+                    entry = self.file_index[record_id] = {}
+                entry[folder] = f"{folder}/{name}"
+                if is_master:
+                    master_ids.append(record_id)
+
+        if _is_column_field(master_field):
+            master_ids = list(self.columns.ids)
+            for record_id in master_ids:
+                self.file_index.setdefault(record_id, {})
+
+        self.record_ids = master_ids
+        self._save_file_index()
+
+    def _source_folders(self) -> List[str]:
+        return list(dict.fromkeys(
+            field['source'] for field in self.manifest['fields'] if not _is_column_field(field)
+        ))
+
+    def _folder_signatures(self) -> Dict[str, Optional[float]]:
+        """The modification time of every field folder, which changes when files are added or removed."""
+        signatures = {}
+        for folder in self._source_folders():
+            try:
+                signatures[folder] = self.provider.info(folder)["modified"].timestamp()
+            except FileNotFoundError:
+                signatures[folder] = None
 
-        # List files in the directory of the primary source (e.g., 'img/')
-        files = self.provider.list(master_field['source'])
+        if self.columns is not None:
+            try:
+                signatures[self.columns_name] = self.provider.info(self.columns_name)["modified"].timestamp()
+            except FileNotFoundError:
+                signatures[self.columns_name] = None
+        return signatures
 
-        self.record_ids = []
-        for f in files:
-            stem = pathlib.Path(f).stem
-            match = regex.match(stem)
-            if match:
-                self.record_ids.append(match.group('id'))
+    def _load_file_index(self) -> bool:
+        """Loads the persisted file index, returns False when it is missing or stale."""
+        if not self.manifest or not self.manifest.get('fields'):
+            return False
+
+        try:
+            index = json.loads(self.provider.serve(self.file_index_name))
+        except (FileNotFoundError, ValueError):
+            return False
+
+        if (
+                not isinstance(index, dict)
+                or index.get("version") != FILE_INDEX_VERSION
+                or index.get("filename_pattern") != self.manifest.get('filename_pattern', "{id}")
+                or index.get("folders") != self._folder_signatures()
+        ):
+            return False
+
+        self.record_ids = index["ids"]
+        self.file_index = index["files"]
+        return True
+
+    def _save_file_index(self):
+        """
+        Persists the file index next to the manifest, together with the folder modification
+        times it matches. The index is derived data, failing to write it is not an error.
 
-    def _find_file_for_id(self, folder: str, record_id: str) -> str:
-        """Helper to find the actual filename (with extension) for an ID."""
-        pattern = self.manifest.get('filename_pattern', "{id}")
-        target_stem = pattern.format(id=record_id)
+        Changed column fields are written first, the index records the modification time of
+        their file too. Read-only datasets never write, they rebuild the index in memory.
+        """
+        if self.read_only:
+            return
+
+        self._index_dirty = False
+        if self.columns is not None and self.columns.dirty:
+            self.provider.replace(self.columns.to_bytes(), self.columns_name)
+
+        index = {
+            "version": FILE_INDEX_VERSION,
+            "filename_pattern": self.manifest.get('filename_pattern', "{id}"),
+            "folders": self._folder_signatures(),
+            "ids": list(self.record_ids),
+            "files": self.file_index,
+        }
+        try:
+            self.provider.replace(json.dumps(index), self.file_index_name)
+        except OSError:
+            pass
+
+    def _ensure_file_index(self):
+        """Builds the full file index of a dataset opened from an id index, before it is changed."""
+        if not self._lazy_files:
+            return
 
-        for f in self.provider.list(folder):
-            if pathlib.Path(f).stem == target_stem:
-                return f
+        record_ids = self.record_ids
+        if not self._load_file_index():
+            self._refresh_ids()
+        self.record_ids = list(record_ids)
+        self._lazy_files = False
+
+    def _resolve_file(self, folder: str, record_id: str) -> str:
+        """Finds the file of an ID in a folder through the provider, without the file index."""
+        base = self.manifest.get('filename_pattern', "{id}").format(id=record_id)
+
+        # Files written by `insert` carry the extension of their field type
+        extensions = dict.fromkeys(
+            FieldCaster.extension(field['type']) for field in self.manifest['fields'] if field['source'] == folder
+        )
+        for ext in extensions:
+            path = f"{folder}/{base}{ext}"
+            if self.provider.exists(path):
+                return path
+
+        for path in self.provider.search(f"{glob.escape(base)}.*", folder):
+            path = str(path).replace("\\", "/")
+            if posixpath.dirname(path) == folder:
+                return path
+
+        if self.provider.exists(f"{folder}/{base}"):
+            return f"{folder}/{base}"
         raise FileNotFoundError(f"No file found for ID '{record_id}' in '{folder}'")
 
+    def _find_file_for_id(self, folder: str, record_id: str) -> str:
+        """Helper to find the actual filename (with extension) for an ID."""
+        try:
+            return self.file_index[record_id][folder]
+        except KeyError:
+            if self._lazy_files:
+                return self._resolve_file(folder, record_id)
+            raise FileNotFoundError(f"No file found for ID '{record_id}' in '{folder}'")
+
+    def _has_record(self, record_id: str) -> bool:
+        if not self._lazy_files:
+            return record_id in self.file_index
+
+        # Records exist when their master field does, like when the index is built
+        master_field = self.manifest['fields'][0]
+        if _is_column_field(master_field):
+            return record_id in self.columns
+        try:
+            self._resolve_file(master_field['source'], record_id)
+        except FileNotFoundError:
+            return False
+        return True
+
     def record_by_name(self, record_id: str) -> Record:
         """
         Retrieves a single record from the dataset by its ID.
 
+        Fields are read and cast on first access, so a template that only uses a text field
+        never decodes the images of the record.
+
         Args:
             record_id (str): The ID of the record to retrieve.
 
         Returns:
-            Dict[str, Any]: A dictionary containing the data for the requested record.
+            Record: The record, with its fields loaded lazily.
+
+        Raises:
+            FileNotFoundError: If no record with this ID exists.
+        """
+        if not self._has_record(record_id):
+            raise FileNotFoundError(f"No record found for ID '{record_id}'")
+
+        loaders = {
+            field['name']: functools.partial(self._load_field, record_id, field)
+            for field in self.manifest['fields']
+        }
+        return Record({"id": record_id}, loaders)
+
+    def iter_records(self, fields: Optional[Sequence[str]] = None, batch_size: Optional[int] = None,
+                     shuffle: bool = False, seed: Optional[int] = None, num_workers: int = 4,
+                     prefetch: int = 2) -> Iterator[Union[Record, List[Record]]]:
         """
-        result = {"id": record_id}
+        Iterates over every record, reading and decoding fields ahead on a thread pool.
 
-        for field in self.manifest['fields']:
-            name = field['name']
-            folder = field['source']
+        The ids are snapshotted when iteration starts. At most `num_workers * prefetch` records
+        are read ahead of the consumer, so memory stays bounded for datasets of any size.
 
-            rel_path = self._find_file_for_id(folder, record_id)
-            raw_data = self.provider.serve(rel_path)
+        Args:
+            fields (Optional[Sequence[str]], optional): Fields to load, the records only contain
+                these (and `id`). Defaults to every field of the manifest.
+            batch_size (Optional[int], optional): Yield lists of up to `batch_size` records instead
+                of single records. Defaults to None.
+            shuffle (bool, optional): Visit the records in a random order. Defaults to False.
+            seed (Optional[int], optional): Seed of the shuffle, for a reproducible order.
+            num_workers (int, optional): Threads reading and decoding fields, 0 loads them in the
+                consumer thread. Defaults to 4.
+            prefetch (int, optional): Records read ahead per worker. Defaults to 2.
+
+        Yields:
+            Union[Record, List[Record]]: Records with the requested fields already loaded, or
+            batches of them.
+
+        Raises:
+            KeyError: If one of `fields` is not in the manifest.
+        """
+        manifest_fields = {field['name']: field for field in self.manifest['fields']}
+        if fields is None:
+            selected = list(manifest_fields.values())
+        else:
+            missing = [name for name in fields if name not in manifest_fields]
+            if missing:
+                raise KeyError(f"Unknown fields: {', '.join(missing)}")
+            selected = [manifest_fields[name] for name in fields]
+
+        record_ids = list(self.record_ids)
+        if shuffle:
+            random.Random(seed).shuffle(record_ids)
+
+        def load(record_id: str) -> Record:
+            data = {"id": record_id}
+            for field in selected:
+                data[field['name']] = self._load_field(record_id, field)
+            return Record(data)
+
+        records = prefetch_map(load, record_ids, num_workers=num_workers, prefetch=prefetch)
+        if batch_size is None:
+            yield from records
+            return
 
-            # Using the new FieldCaster
-            result[name] = FieldCaster.cast(raw_data, field['type'])
-        return Record(result)
+        try:
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if not batch:
+                    return
+                yield batch
+        finally:
+            # Stops the read-ahead when the consumer breaks out of the loop
+            records.close()
+
+    def _load_field(self, record_id: str, field: Dict[str, Any]) -> Any:
+        if _is_column_field(field):
+            return self.columns.get(record_id, field['name'])
+
+        if field['type'] == 'numpy_mmap':
+            file_path = self.provider.locate(self._find_file_for_id(field['source'], record_id))
+            if file_path is not None:
+                # Opening the map is cheap and its pages are cached by the OS, keep it out of
+                # the field cache where the full array size would be counted against the budget
+                return np.load(file_path, mmap_mode='r')
+
+        key = (record_id, field['name'])
+        if self.field_cache is not None:
+            value = self.field_cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return _share(value)
+
+        rel_path = self._find_file_for_id(field['source'], record_id)
+        raw_data = self.provider.serve(rel_path)
+
+        # Using the new FieldCaster
+        value = FieldCaster.cast(raw_data, field['type'])
+
+        if self.field_cache is not None:
+            self.field_cache.put(key, _freeze(value))
+            return _share(value)
+        return value
+
+    def _invalidate_fields(self, record_id: str):
+        if self.field_cache is None:
+            return
+        for field in self.manifest['fields']:
+            self.field_cache.pop((record_id, field['name']))
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate and size statistics of the decoded field cache (empty when it is disabled)."""
+        return self.field_cache.stats() if self.field_cache is not None else {}
 
     def random(self) -> Record:
         """
@@ -121,51 +480,186 @@ class DiskDataset(Dataset):
             raise IndexError("Dataset is empty.")
         return self.record_by_name(random.choice(self.record_ids))
 
+    def sample_ids(self, k: int, weights: Union[str, Sequence[float], None] = None, by: Optional[str] = None,
+                   replace: bool = False, seed: Optional[int] = None) -> List[str]:
+        """
+        Draws record ids at random without reading any field file.
+
+        Uniform draws without replacement pick k distinct positions in O(k) whatever the size
+        of the dataset. Weighted and stratified draws read a whole column once, which is O(n).
+
+        Args:
+            k (int): Number of ids to draw (per stratum when `by` is given).
+            weights (Union[str, Sequence[float], None], optional): Relative weight of every record,
+                either the name of a numeric `storage: column` field (unset values weigh 0) or a
+                sequence aligned with `record_ids`. Defaults to uniform.
+            by (Optional[str], optional): A `storage: column` field to stratify on, k ids are
+                drawn from every distinct value (all of them when a stratum has fewer).
+            replace (bool, optional): Allow the same id more than once. Defaults to False.
+            seed (Optional[int], optional): Seed for a reproducible draw.
+
+        Raises:
+            ValueError: If k exceeds the number of records without `replace`, or the weights are invalid.
+        """
+        rng = random.Random(seed) if seed is not None else random
+        n = len(self.record_ids)
+
+        if by is not None:
+            values = self.column(by)
+            strata: Dict[Any, List[int]] = {}
+            for position in np.flatnonzero(~np.ma.getmaskarray(values)):
+                strata.setdefault(values.data[position], []).append(int(position))
+
+            positions = []
+            for members in strata.values():
+                if replace:
+                    positions.extend(rng.choices(members, k=k))
+                else:
+                    positions.extend(rng.sample(members, min(k, len(members))))
+
+        elif weights is not None:
+            if isinstance(weights, str):
+                weights = self.column(weights).filled(0)
+            p = np.asarray(weights, dtype=np.float64)
+            if p.shape != (n,) or (p < 0).any() or p.sum() <= 0:
+                raise ValueError("weights must be non-negative, not all zero and one per record")
+
+            generator = np.random.default_rng(seed)
+            positions = generator.choice(n, size=k, replace=replace, p=p / p.sum()).tolist()
+
+        elif replace:
+            if n == 0:
+                raise IndexError("Dataset is empty.")
+            positions = [rng.randrange(n) for _ in range(k)]
+        else:
+            positions = rng.sample(range(n), k)
+
+        return [self.record_ids[position] for position in positions]
+
+    def sample(self, k: int, **kwargs) -> List[Record]:
+        """
+        Draws k random records, see `sample_ids` for the options.
+
+        The records are lazy, only the fields that are accessed are read.
+        """
+        return [self.record_by_name(record_id) for record_id in self.sample_ids(k, **kwargs)]
+
     def insert(self, record_id: str, data: Dict[str, Any]):
         """
         Inserts or updates a record in the dataset.
 
+        The field files are written right away, the file index and `storage: column` values
+        are only persisted by `flush` (or when a `with dataset:` block exits), so a loop of
+        inserts does not rewrite them every time. A dataset opened before the flush rebuilds
+        its index from the folders, but column values not flushed yet are lost.
+
         Args:
             record_id (str): The ID of the record to insert or update.
             data (Dict[str, Any]): The data for the record.
         """
+        self._write_records([(record_id, data)], max_workers=1)
+        self._index_dirty = True
+
+    def flush(self):
+        """Persists the file index and column values changed by `insert` and `delete`."""
+        if self._index_dirty:
+            self._save_file_index()
+
+    def __enter__(self) -> "DiskDataset":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def insert_many(self, records: Iterable[Tuple[str, Dict[str, Any]]], max_workers: Optional[int] = None):
+        """
+        Inserts or updates many records at once.
+
+        Records are serialized and stored in parallel on a thread pool (image encoding and file
+        writes release the GIL), new ids are found in a set kept next to the id list, and the
+        file index is updated and persisted once for the whole batch.
+
+        Args:
+            records (Iterable[Tuple[str, Dict[str, Any]]]): (record_id, data) pairs, or a dict
+                mapping record ids to their data.
+            max_workers (Optional[int], optional): Threads serializing and writing records.
+                Defaults to the ThreadPoolExecutor default.
+        """
+        self._write_records(records, max_workers)
+        self._save_file_index()
+
+    def bulk_writer(self, batch_size: int = 256, max_workers: Optional[int] = None) -> "DatasetBulkWriter":
+        """
+        Returns a context manager that buffers `insert` calls and writes them in batches of
+        `batch_size`, persisting the file index once when the block exits.
+        """
+        return DatasetBulkWriter(self, batch_size=batch_size, max_workers=max_workers)
+
+    def _known_ids(self) -> set:
+        """The record ids as a set, built once and kept in step with `record_ids` by insert and delete."""
+        if self._id_set is None or self._id_set[0] is not self.record_ids:
+            self._id_set = (self.record_ids, set(self.record_ids))
+        return self._id_set[1]
+
+    def _write_records(self, records, max_workers: Optional[int] = None):
+        """Stores records and updates the in-memory indexes, without persisting the file index."""
         if self.read_only:
             raise RuntimeError("Cannot insert into read-only dataset.")
 
+        records = list(records.items()) if isinstance(records, dict) else list(records)
+        if not records:
+            return
+
+        # A memory-mapped id index is read-only, switch to an in-memory copy with a full file index
+        self._ensure_file_index()
+
+        # Column values are checked before any file is written, a bad one leaves nothing half stored
+        if self.columns is not None:
+            self.columns.update(
+                (record_id, {name: data[name] for name in self.columns.fields if name in data})
+                for record_id, data in records
+            )
+
+        if max_workers == 1 or len(records) == 1:
+            written = [self._store_record(record_id, data) for record_id, data in records]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                written = list(executor.map(lambda record: self._store_record(*record), records))
+
+        known_ids = self._known_ids()
+        for (record_id, _), files in zip(records, written):
+            self._invalidate_fields(record_id)
+            self.file_index.setdefault(record_id, {}).update(files)
+            if record_id not in known_ids:
+                known_ids.add(record_id)
+                self.record_ids.append(record_id)
+
+        self.version += 1
+
+    def _store_record(self, record_id: str, data: Dict[str, Any]) -> Dict[str, str]:
+        """Serializes and stores the fields present in `data`, returns source folder -> path."""
         pattern = self.manifest.get('filename_pattern', "{id}")
         filename_base = pattern.format(id=record_id)
 
+        files = {}
         for field in self.manifest['fields']:
             name = field['name']
-            if name not in data: continue
+            if name not in data or _is_column_field(field): continue
 
             # Use FieldCaster to turn Python object into bytes
             content = FieldCaster.serialize(data[name], field['type'])
 
-            # Determine extension (could be added to FieldCaster too)
-            ext_map = {
-                'json': '.json',
-                'yaml': '.yaml',
-                'str': '.txt',
-                'int': '.txt',
-                'float': '.txt',
-                'xml': '.xml',
-                'svgDoc': '.svg',
-                'numpy': '.npy',
-                'PilImage': '.png',
-                'npImage': '.png'
-            }
-            ext = ext_map.get(field['type'], '.bin')
+            ext = FieldCaster.extension(field['type'])
 
             path = f"{field['source']}/{filename_base}{ext}"
             self.provider.store(content, path)
+            files[field['source']] = path
 
-        if record_id not in self.record_ids:
-            self.record_ids.append(record_id)
+        return files
 
     def delete(self, record_id: str):
         """
-        Deletes a record from the dataset.
+        Deletes a record from the dataset, persisted by `flush` like `insert`.
 
         Args:
             record_id (str): The ID of the record to delete.
@@ -173,13 +667,27 @@ class DiskDataset(Dataset):
         if self.read_only:
             raise RuntimeError("Cannot insert into read-only dataset.")
 
+        self._ensure_file_index()
+        if self.columns is not None:
+            self.columns.delete([record_id])
+
         for field in self.manifest['fields']:
+            if _is_column_field(field):
+                continue
             try:
                 path = self._find_file_for_id(field['source'], record_id)
                 self.provider.delete(path)
             except FileNotFoundError:
                 continue
-        self.record_ids = [rid for rid in self.record_ids if rid != record_id]
+        known_ids = self._known_ids()
+        if record_id in known_ids:
+            known_ids.discard(record_id)
+            self.record_ids = [rid for rid in self.record_ids if rid != record_id]
+            self._id_set = (self.record_ids, known_ids)
+        self.file_index.pop(record_id, None)
+        self._invalidate_fields(record_id)
+        self.version += 1
+        self._index_dirty = True
 
     def __len__(self) -> int:
         """
@@ -202,7 +710,7 @@ class DiskDataset(Dataset):
             if key < 0:
                 key = key % len(self.record_ids)
 
-            if key > len(self.record_ids):
+            if key >= len(self.record_ids):
                 raise IndexError(f"Dataset index {key} out of range.")
 
             return self.record_by_name(self.record_ids[key])
@@ -214,6 +722,60 @@ class DiskDataset(Dataset):
         else:
             raise TypeError("Key must be an integer index or a string Record ID.")
 
+    def _raw_location(self, item: str) -> Optional[Tuple[str, str]]:
+        path = item.split("/")
+        if len(path) != 3 or not path[1].isdigit():
+            return None
+
+        index, field_name = int(path[1]), path[2]
+        field = next((f for f in self.manifest['fields'] if f['name'] == field_name), None)
+        if field is None or _is_column_field(field) or index >= len(self.record_ids):
+            return None
+
+        rel_path = self._find_file_for_id(field['source'], self.record_ids[index])
+        media_type = raw_media_type(field['type'], rel_path)
+        if media_type is None:
+            return None
+
+        return media_type, rel_path
+
+    def raw(self, item: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Returns the stored bytes of a single field, for fields that can be served without decoding.
+
+        Args:
+            item (str): A path in the `__getitem__` string form, "<split>/<index>/<field>".
+
+        Returns:
+            Optional[Tuple[str, bytes]]: The media type and the file content, or None when the
+            path does not point at one field of a fixed record or the field type needs encoding.
+        """
+        location = self._raw_location(item)
+        if location is None:
+            return None
+
+        media_type, rel_path = location
+        return media_type, self.provider.serve(rel_path)
+
+    def raw_file(self, item: str) -> Optional[Tuple[str, str]]:
+        """
+        Like `raw`, but returns the local path of the stored file instead of its content.
+
+        Returns:
+            Optional[Tuple[str, str]]: The media type and the absolute file path, or None when
+            `raw` would return None or the provider does not keep files on the local disk.
+        """
+        location = self._raw_location(item)
+        if location is None:
+            return None
+
+        media_type, rel_path = location
+        file_path = self.provider.locate(rel_path)
+        if file_path is None:
+            return None
+
+        return media_type, file_path
+
     def __str__getitem__(self, item):
         path = item.split("/")
 
@@ -229,12 +791,18 @@ class DiskDataset(Dataset):
             return len(split)
 
         elif key == "random":
-            limit = len(split)
-            record = split[random.randint(0, limit)]
+            record = split.random()
             if field is None:
                 return record
             return record[field]
 
+        elif key == "sample" and len(path) in (3, 4) and path[2].isdigit():
+            # "<split>/sample/<k>[/<field>]": k distinct records, or one field of each
+            records = split.sample(int(path[2]))
+            if len(path) == 3:
+                return records
+            return [record[path[3]] for record in records]
+
         elif key.isdigit():
             key = int(key)
             path_size = len(path)
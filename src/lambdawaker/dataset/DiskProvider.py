@@ -1,5 +1,7 @@
 import datetime
+import os
 import pathlib
+import threading
 from typing import List, Dict, Union, Any
 
 from lambdawaker.file.path.PathResolver import resolve
@@ -12,11 +14,14 @@ class DiskProvider:
 
     def __init__(self):
         self.root: pathlib.Path = None
+        # Folders already created by `store`, so writing many files does not mkdir each time
+        self._created_dirs = set()
 
     def pointTo(self, root_path: str):
         """Sets the base directory for all operations."""
         self.root = resolve(root_path)
         self.root.mkdir(parents=True, exist_ok=True)
+        self._created_dirs = set()
 
     def _get_full_path(self, relative_path: str) -> pathlib.Path:
         """Internal helper to resolve paths and prevent escaping the root."""
@@ -39,6 +44,13 @@ class DiskProvider:
             raise FileNotFoundError(f"File not found: {relative_path}")
         return path.read_bytes()
 
+    def locate(self, relative_path: str) -> str:
+        """Returns the absolute path of a file on disk."""
+        path = self._get_full_path(relative_path)
+        if not path.is_file():
+            raise FileNotFoundError(f"File not found: {relative_path}")
+        return str(path)
+
     def list(self, relative_path: str = ".") -> List[str]:
         """Lists all items in the directory (relative to root)."""
         path = self._get_full_path(relative_path)
@@ -46,6 +58,15 @@ class DiskProvider:
             return []
         return [str(p.relative_to(self.root)) for p in path.iterdir()]
 
+    def list_files(self, relative_path: str = ".") -> List[str]:
+        """Lists the file names in a directory with a single scandir, without building paths."""
+        path = self._get_full_path(relative_path)
+        try:
+            with os.scandir(path) as entries:
+                return [entry.name for entry in entries if entry.is_file()]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
     def count(self, relative_path: str = ".") -> int:
         """Counts items in a directory. Fails if path is a file."""
         path = self._get_full_path(relative_path)
@@ -56,14 +77,34 @@ class DiskProvider:
     def store(self, content: Union[str, bytes], relative_path: str):
         """Writes content to disk, creating parent directories if needed."""
         path = self._get_full_path(relative_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-
+        if path.parent not in self._created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(path.parent)
+
+        try:
+            self._write(path, content)
+        except FileNotFoundError:
+            # The folder was removed behind our back
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._write(path, content)
+
+    @staticmethod
+    def _write(path: pathlib.Path, content: Union[str, bytes]):
         mode = 'wb' if isinstance(content, bytes) else 'w'
         encoding = None if isinstance(content, bytes) else 'utf-8'
 
         with open(path, mode, encoding=encoding) as f:
             f.write(content)
 
+    def replace(self, content: Union[str, bytes], relative_path: str):
+        """Writes content to a temporary file and renames it over the target."""
+        path = self._get_full_path(relative_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._write(tmp_path, content)
+        os.replace(tmp_path, path)
+
     # --- Advanced Utility Methods ---
 
     def exists(self, relative_path: str) -> bool:
@@ -99,5 +140,6 @@ class DiskProvider:
         path = self._get_full_path(relative_path)
         if path.is_dir():
             path.rmdir()
+            self._created_dirs.discard(path)
         else:
             path.unlink(missing_ok=True)
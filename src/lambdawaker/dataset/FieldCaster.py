@@ -1,18 +1,84 @@
 import io
 import json
 import xml.etree.ElementTree as ET
-from typing import Any
+from typing import Any, Callable, Dict, Optional
 
+import numpy as np
 import yaml
+from PIL import Image
+
+from lambdawaker.dataset.LazyImage import LazyImage, decode_image_array
+
+
+def _load_numpy(raw_data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(raw_data))
+
+
+def _save_numpy(data: Any) -> bytes:
+    buf = io.BytesIO()
+    np.save(buf, data)
+    return buf.getvalue()
+
+
+def _save_png(data: Any) -> bytes:
+    if isinstance(data, LazyImage):
+        return data.raw
+    if isinstance(data, np.ndarray):
+        data = Image.fromarray(data)
+    buf = io.BytesIO()
+    data.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def _save_xml(data: Any) -> bytes:
+    # Handle if data is already an ElementTree or an Element
+    if hasattr(data, 'getroot'):
+        data = data.getroot()
+    return ET.tostring(data, encoding='utf-8')
+
+
+def _save_text(data: Any) -> bytes:
+    return str(data).encode('utf-8')
 
 
 class FieldCaster:
     """
     A utility class for casting and serializing data fields based on their type.
+
+    Field types are looked up in a registry, `register` adds custom types or replaces the
+    built-in ones.
     """
 
-    @staticmethod
-    def cast(raw_data: bytes, field_type: str) -> Any:
+    _casters: Dict[str, Callable[[bytes], Any]] = {}
+    _serializers: Dict[str, Callable[[Any], bytes]] = {}
+    _extensions: Dict[str, str] = {}
+
+    @classmethod
+    def register(cls, field_type: str, cast: Optional[Callable[[bytes], Any]] = None,
+                 serialize: Optional[Callable[[Any], bytes]] = None, extension: Optional[str] = None):
+        """
+        Registers how a field type is read and written.
+
+        Args:
+            field_type (str): The type name used in dataset manifests.
+            cast (Optional[Callable[[bytes], Any]], optional): Turns the stored bytes into a value.
+            serialize (Optional[Callable[[Any], bytes]], optional): Turns a value into bytes.
+            extension (Optional[str], optional): File extension of stored fields, e.g. '.png'.
+        """
+        if cast is not None:
+            cls._casters[field_type] = cast
+        if serialize is not None:
+            cls._serializers[field_type] = serialize
+        if extension is not None:
+            cls._extensions[field_type] = extension
+
+    @classmethod
+    def extension(cls, field_type: str) -> str:
+        """Returns the file extension of stored fields of this type ('.bin' if unknown)."""
+        return cls._extensions.get(field_type, '.bin')
+
+    @classmethod
+    def cast(cls, raw_data: bytes, field_type: str) -> Any:
         """
         Casts raw byte data into a specific Python type.
 
@@ -21,60 +87,16 @@ class FieldCaster:
             field_type (str): The target data type (e.g., 'int', 'json', 'PilImage').
 
         Returns:
-            Any: The casted data.
+            Any: The casted data, or the raw bytes for unknown types.
         """
         if not raw_data:
             return None
 
-        # --- Scalar Types ---
-        if field_type == 'int':
-            return int(raw_data.decode('utf-8'))
-
-        elif field_type == 'float':
-            return float(raw_data.decode('utf-8'))
-
-        # --- Structured Data ---
-        elif field_type == 'str':
-            return raw_data.decode('utf-8')
-
-        elif field_type == 'json':
-            return json.loads(raw_data)
-
-        elif field_type == 'yaml':
-            return yaml.safe_load(raw_data)
-
-        # --- Document / XML Types ---
-        elif field_type == 'xml':
-            return ET.fromstring(raw_data.decode('utf-8'))
-
-        elif field_type == 'svgDoc':
-            # Returns an ElementTree object representing the SVG
-            return ET.fromstring(raw_data.decode('utf-8'))
-
-        # --- Scientific / Image Types ---
-        elif field_type == 'numpy':
-            import numpy as np
-            return np.load(io.BytesIO(raw_data))
+        caster = cls._casters.get(field_type)
+        return caster(raw_data) if caster is not None else raw_data
 
-        elif field_type == 'PilImage':
-            try:
-                from PIL import Image
-                return Image.open(io.BytesIO(raw_data))
-            except ImportError:
-                return raw_data
-
-        elif field_type == 'npImage':
-            try:
-                from PIL import Image
-                import numpy as np
-                return np.array(Image.open(io.BytesIO(raw_data)))
-            except ImportError:
-                return raw_data
-
-        return raw_data
-
-    @staticmethod
-    def serialize(data: Any, field_type: str) -> bytes:
+    @classmethod
+    def serialize(cls, data: Any, field_type: str) -> bytes:
         """
         Serializes Python data into bytes based on the specified field type.
 
@@ -85,30 +107,34 @@ class FieldCaster:
         Returns:
             bytes: The serialized data.
         """
-        if field_type in ['int', 'float', 'str']:
-            return str(data).encode('utf-8')
-
-        elif field_type == 'json':
-            return json.dumps(data, indent=2).encode('utf-8')
+        serializer = cls._serializers.get(field_type)
+        if serializer is not None:
+            return serializer(data)
 
-        elif field_type == 'yaml':
-            return yaml.dump(data, default_flow_style=False).encode('utf-8')
-
-        elif field_type in ['xml', 'svgDoc']:
-            # Handle if data is already an ElementTree or an Element
-            if hasattr(data, 'getroot'):
-                data = data.getroot()
-            return ET.tostring(data, encoding='utf-8')
-
-        elif field_type == 'numpy':
-            import numpy as np
-            buf = io.BytesIO()
-            np.save(buf, data)
-            return buf.getvalue()
+        return data if isinstance(data, bytes) else str(data).encode('utf-8')
 
-        elif field_type == 'PilImage':
-            buf = io.BytesIO()
-            data.save(buf, format='PNG')
-            return buf.getvalue()
 
-        return data if isinstance(data, bytes) else str(data).encode('utf-8')
+# --- Scalar Types ---
+FieldCaster.register('int', lambda raw: int(raw.decode('utf-8')), _save_text, '.txt')
+FieldCaster.register('float', lambda raw: float(raw.decode('utf-8')), _save_text, '.txt')
+
+# --- Structured Data ---
+FieldCaster.register('str', lambda raw: raw.decode('utf-8'), _save_text, '.txt')
+FieldCaster.register('json', json.loads, lambda data: json.dumps(data, indent=2).encode('utf-8'), '.json')
+FieldCaster.register('yaml', yaml.safe_load,
+                     lambda data: yaml.dump(data, default_flow_style=False).encode('utf-8'), '.yaml')
+
+# --- Document / XML Types ---
+FieldCaster.register('xml', lambda raw: ET.fromstring(raw.decode('utf-8')), _save_xml, '.xml')
+# Returns an ElementTree object representing the SVG
+FieldCaster.register('svgDoc', lambda raw: ET.fromstring(raw.decode('utf-8')), _save_xml, '.svg')
+
+# --- Scientific / Image Types ---
+FieldCaster.register('numpy', _load_numpy, _save_numpy, '.npy')
+# numpy_mmap fields are memory-mapped by DiskDataset when the provider has local files,
+# from bytes they load like regular numpy fields
+FieldCaster.register('numpy_mmap', _load_numpy, _save_numpy, '.npy')
+# Image.open only reads the header, pixels are decoded on first use
+FieldCaster.register('PilImage', lambda raw: Image.open(io.BytesIO(raw)), _save_png, '.png')
+FieldCaster.register('npImage', decode_image_array, _save_png, '.png')
+FieldCaster.register('LazyImage', LazyImage, _save_png, '.png')
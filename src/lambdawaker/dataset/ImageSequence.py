@@ -1,20 +1,58 @@
 import os
-from typing import List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
 
+import numpy as np
 from PIL import Image
 
+from lambdawaker.dataset.LRUCache import LRUCache
+
+
+def open_image(path: str, max_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Opens and decodes an image, at reduced resolution when it does not need to be larger than `max_size`.
+
+    JPEGs are decoded in draft mode at the smallest 1/2, 1/4 or 1/8 scale still covering
+    `max_size`. Other formats are shrunk by `Image.reduce` by an integer factor, which is
+    much cheaper than resampling. The result is then resized to fit `max_size` exactly,
+    keeping the aspect ratio.
+    """
+    image = Image.open(path)
+    if max_size is None:
+        image.load()
+        return image
+
+    image.draft(image.mode, max_size)
+    factor = min(image.width // max_size[0], image.height // max_size[1])
+    if factor >= 2:
+        image = image.reduce(factor)
+    image.thumbnail(max_size)
+    image.load()
+    return image
+
 
 class ImageSequence:
     """
     A class to represent a sequence of images from a directory.
+
+    By default every access opens the image file again. With `cache_bytes` decoded frames
+    are kept in an LRU cache, and with `prefetch` the next frames are decoded on a background
+    thread while the current one is used. Cached frames are shared, do not modify them in place.
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, cache_bytes: Optional[int] = None, prefetch: int = 0,
+                 max_workers: Optional[int] = None):
         """
         Initialize with a path to a directory containing images.
 
         Args:
             path (str): The path to the directory.
+            cache_bytes (Optional[int], optional): Memory budget of the decoded frame cache.
+                None or 0 disables it. Defaults to None.
+            prefetch (int, optional): Frames after the requested one to decode in the background.
+                Needs the cache, where prefetched frames wait. Defaults to 0.
+            max_workers (Optional[int], optional): Threads used by prefetching and `get_many`.
         """
         if not os.path.isdir(path):
             raise ValueError(f"The path '{path}' is not a valid directory.")
@@ -28,6 +66,14 @@ class ImageSequence:
             if os.path.splitext(f)[1].lower() in valid_extensions
         ])
 
+        self.cache = LRUCache(max_bytes=cache_bytes) if cache_bytes else None
+        self.prefetch = prefetch if self.cache is not None else 0
+        self.max_workers = max_workers
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
     def __len__(self) -> int:
         """
         Returns the total number of valid images in the folder.
@@ -47,6 +93,105 @@ class ImageSequence:
         Returns:
             Image.Image: The PIL Image object.
         """
-        file_name = self.image_files[index]
-        full_path = os.path.join(self.path, file_name)
-        return Image.open(full_path)
+        if self.cache is None:
+            file_name = self.image_files[index]
+            full_path = os.path.join(self.path, file_name)
+            return Image.open(full_path)
+
+        return self.get(index)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _decode(self, index: int, max_size: Optional[Tuple[int, int]]) -> Image.Image:
+        key = (index, max_size)
+        if self.cache is not None:
+            image = self.cache.get(key)
+            if image is not None:
+                return image
+
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            # Being prefetched, wait for it instead of decoding the same frame twice
+            return future.result()
+
+        image = open_image(os.path.join(self.path, self.image_files[index]), max_size)
+        if self.cache is not None:
+            self.cache.put(key, image)
+        return image
+
+    def _prefetch_after(self, index: int, max_size: Optional[Tuple[int, int]]):
+        for next_index in range(index + 1, min(index + 1 + self.prefetch, len(self))):
+            key = (next_index, max_size)
+            if key in self.cache:
+                continue
+
+            executor = self._get_executor()
+            with self._lock:
+                if key in self._pending:
+                    continue
+                future = self._pending[key] = executor.submit(self._prefetch_one, next_index, max_size)
+            future.add_done_callback(lambda _, key=key: self._forget(key))
+
+    def _prefetch_one(self, index: int, max_size: Optional[Tuple[int, int]]) -> Image.Image:
+        image = open_image(os.path.join(self.path, self.image_files[index]), max_size)
+        self.cache.put((index, max_size), image)
+        return image
+
+    def _forget(self, key: Hashable):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def get(self, index: int, max_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """
+        Returns the decoded image at `index`.
+
+        Args:
+            index (int): The index of the image, negative values count from the end.
+            max_size (Optional[Tuple[int, int]], optional): A (width, height) box the image is
+                shrunk to fit in, decoding at reduced resolution where the format allows it
+                (see `open_image`). Defaults to the full resolution.
+
+        Returns:
+            Image.Image: The decoded image.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Image index {index} out of range.")
+
+        image = self._decode(index, max_size)
+        if self.prefetch:
+            self._prefetch_after(index, max_size)
+        return image
+
+    def get_many(self, indices: Sequence[int], max_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Decodes several images in parallel and stacks them into one array.
+
+        Returns:
+            np.ndarray: An array of shape (len(indices), height, width[, bands]).
+
+        Raises:
+            ValueError: If the images do not share the same size and mode.
+        """
+        indices = [index + len(self) if index < 0 else index for index in indices]
+        for index in indices:
+            if not 0 <= index < len(self):
+                raise IndexError(f"Image index {index} out of range.")
+
+        # Decoded without prefetching: a pool thread waiting on a prefetch queued behind it would deadlock
+        executor = self._get_executor()
+        images = list(executor.map(lambda index: self._decode(index, max_size), indices))
+        return np.stack([np.asarray(image) for image in images])
+
+    def close(self):
+        """Stops the background decoding threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,125 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Estimates the memory held by a value, in bytes.
+
+    Uses the buffer size for numpy arrays and PIL images (which `sys.getsizeof` does not
+    see) and falls back to `sys.getsizeof` for everything else.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+
+    size = getattr(value, "size", None)
+    mode = getattr(value, "mode", None)
+    if isinstance(size, tuple) and len(size) == 2 and isinstance(mode, str):
+        # A PIL image, bands are counted as one byte each which is right for the common modes
+        width, height = size
+        return width * height * max(1, len(value.getbands()))
+
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded by item count and/or approximate bytes.
+
+    Every entry carries a size, given to `put` or computed with `sizeof`. When adding an entry
+    would exceed `max_bytes` or `max_items`, the least recently used entries are evicted.
+    Entries larger than `max_bytes` on their own are not stored.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_items: Optional[int] = None,
+                 sizeof: Callable[[Any], int] = approximate_size):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.sizeof = sizeof
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        size = self.sizeof(value) if size is None else size
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+                (self.max_bytes is not None and self._bytes > self.max_bytes)
+                or (self.max_items is not None and len(self._entries) > self.max_items)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_items": self.max_items,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
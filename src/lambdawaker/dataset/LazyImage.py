@@ -0,0 +1,114 @@
+import io
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+# Modes OpenCV decodes to the same array as PIL, palette, LA, 16 bit and CMYK images go through PIL
+_CV2_MODES = {"RGB", "RGBA", "L"}
+
+
+def decode_image_array(raw_data: bytes) -> np.ndarray:
+    """
+    Decodes encoded image bytes into a numpy array, the same array as `np.array(Image.open(...))`.
+
+    Uses `cv2.imdecode` when OpenCV is installed and the image is 8 bit RGB, RGBA or grayscale,
+    which is noticeably faster than going through PIL for PNG and JPEG. Other modes are decoded
+    by PIL, OpenCV would expand palettes to RGB, drop the alpha of LA and keep 16 bit samples.
+    JPEGs may still differ by rounding when OpenCV bundles another libjpeg than PIL.
+    """
+    # Image.open only parses the header, the pixels are decoded by whichever library is used
+    image = Image.open(io.BytesIO(raw_data))
+    if cv2 is not None and image.mode in _CV2_MODES:
+        array = cv2.imdecode(np.frombuffer(raw_data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        bands = len(image.getbands())
+        # 16 bit PNGs open as 8 bit modes in PIL, and a tRNS chunk gives OpenCV an alpha channel
+        if array is not None and array.dtype == np.uint8 and (array.shape[2] if array.ndim == 3 else 1) == bands:
+            if bands == 3:
+                return cv2.cvtColor(array, cv2.COLOR_BGR2RGB)
+            if bands == 4:
+                return cv2.cvtColor(array, cv2.COLOR_BGRA2RGBA)
+            return array
+
+    return np.array(image)
+
+
+class LazyImage:
+    """
+    An encoded image that is only decoded when its pixels are needed.
+
+    `size`, `mode` and `format` are read from the image header. Consumers that only look at
+    them, or send the image on unchanged (see `raw`), never pay for decoding the pixels.
+    """
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._header: Optional[Tuple[Tuple[int, int], str, Optional[str]]] = None
+        self._lock = threading.Lock()
+
+    def _read_header(self):
+        if self._header is None:
+            with self._lock:
+                if self._header is None:
+                    # Image.open only parses the header, pixels are decoded on load()
+                    image = Image.open(io.BytesIO(self.raw))
+                    self._header = (image.size, image.mode, image.format)
+        return self._header
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self._read_header()[0]
+
+    @property
+    def mode(self) -> str:
+        return self._read_header()[1]
+
+    @property
+    def format(self) -> Optional[str]:
+        return self._read_header()[2]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded image, used by LRUCache to weigh cached fields."""
+        return len(self.raw)
+
+    @property
+    def media_type(self) -> str:
+        return Image.MIME.get(self.format, "application/octet-stream")
+
+    def to_pil(self, max_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """
+        Decodes the image with PIL.
+
+        Args:
+            max_size (Optional[Tuple[int, int]], optional): Bounding box the result must fit in.
+                JPEGs are decoded in draft mode at the smallest scale (1/2, 1/4, 1/8) still
+                covering it, which skips most of the decoding work, then resized to fit.
+        """
+        image = Image.open(io.BytesIO(self.raw))
+        if max_size is not None:
+            image.draft(image.mode, max_size)
+            image.thumbnail(max_size)
+        else:
+            image.load()
+        return image
+
+    def to_numpy(self) -> np.ndarray:
+        """Decodes the image into a numpy array, see `decode_image_array`."""
+        return decode_image_array(self.raw)
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.to_numpy()
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self):
+        if self._header is None:
+            return f"LazyImage({len(self.raw)} bytes)"
+        return f"LazyImage({self.format}, {self.mode}, {self.size[0]}x{self.size[1]})"
@@ -0,0 +1,72 @@
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, Sequence, Union
+
+MAGIC = b"LWIDS\x00\x00\x01"
+HEADER = struct.Struct("<8sQ")
+
+
+class MappedIdList(Sequence):
+    """
+    A read-only list of record ids backed by a memory-mapped file.
+
+    The file holds a header, an offsets table and the utf-8 encoded ids back to back, so
+    opening it costs nothing and every process mapping the same file shares its pages
+    through the OS page cache instead of holding its own copy.
+
+    Layout: magic (8 bytes) | count (uint64) | count + 1 offsets (uint64) | id bytes
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a record id index.")
+
+        offsets_end = HEADER.size + 8 * (self._count + 1)
+        self._offsets = memoryview(self._mmap)[HEADER.size:offsets_end].cast("Q")
+        self._data_start = offsets_end
+
+    @staticmethod
+    def write(path: str, ids: Iterable[str]):
+        """Writes ids to `path` atomically, readers never see a partially written file."""
+        encoded = [str(record_id).encode("utf-8") for record_id in ids]
+
+        offsets = [0]
+        for item in encoded:
+            offsets.append(offsets[-1] + len(item))
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(encoded)))
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            for item in encoded:
+                f.write(item)
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"Record id index {index} out of range.")
+
+        start = self._data_start + self._offsets[index]
+        end = self._data_start + self._offsets[index + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"<MappedIdList path={self.path} count={self._count}>"
@@ -0,0 +1,341 @@
+import datetime
+import fnmatch
+import os
+import pathlib
+import posixpath
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Union, Any, Optional
+
+from lambdawaker.dataset.DataProvider import DataProvider
+from lambdawaker.file.path.PathResolver import resolve
+
+INDEX_NAME = "pack.sqlite"
+BLOB_NAME = "pack.{generation}.blob"
+
+# Offset of files whose content lives in the `inline` table instead of the blob
+INLINE = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files (parent);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    modified REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inline (
+    path TEXT PRIMARY KEY,
+    content BLOB NOT NULL
+);
+"""
+
+
+class PackedProvider(DataProvider):
+    """
+    A DataProvider that packs every file into one append-only blob with a SQLite offset index.
+
+    A dataset of a million records is two files instead of millions of inodes, and listing a
+    folder is an indexed query instead of a directory walk. Paths and folders behave like
+    DiskProvider ones: folders exist once a file is stored below them and keep a modification
+    time that changes when their entries are added or removed.
+
+    Overwritten and deleted files leave their old bytes in the blob, `compact` rewrites it
+    with only the live files. Files written with `replace` (the index and columns a dataset
+    rewrites after every change) are kept in SQLite instead, which reuses the pages it frees.
+    """
+
+    def __init__(self):
+        self.root: Optional[pathlib.Path] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._blob_fd: Optional[int] = None
+        self._blob_path: Optional[pathlib.Path] = None
+        self._lock = threading.RLock()
+
+    def pointTo(self, root_path: str):
+        """Sets the base directory holding the pack files, creating them if needed."""
+        self.close()
+
+        self.root = resolve(root_path)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._connection = sqlite3.connect(str(self.root / INDEX_NAME), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(_SCHEMA)
+        self._connection.execute(
+            "INSERT OR IGNORE INTO dirs (path, parent, modified) VALUES ('', NULL, ?)", (time.time(),)
+        )
+        self._connection.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('blob', ?)", (BLOB_NAME.format(generation=0),)
+        )
+        self._connection.commit()
+
+        self._open_blob()
+
+    def _open_blob(self):
+        blob_name = self._connection.execute("SELECT value FROM meta WHERE key = 'blob'").fetchone()[0]
+        self._blob_path = self.root / blob_name
+        self._blob_fd = os.open(str(self._blob_path), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            if self._blob_fd is not None:
+                os.close(self._blob_fd)
+                self._blob_fd = None
+
+    def _normalize(self, relative_path: str) -> str:
+        """Turns a path into the key used in the index, preventing paths outside the root."""
+        if self._connection is None:
+            raise ValueError("Provider not initialized. Call pointTo(path) first.")
+
+        path = posixpath.normpath(str(relative_path).replace("\\", "/")).lstrip("/")
+        if path == ".":
+            return ""
+        if path == ".." or path.startswith("../"):
+            raise PermissionError("Access denied: Path is outside the root directory.")
+        return path
+
+    def _file_row(self, path: str):
+        return self._connection.execute(
+            "SELECT offset, size, modified FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+    def _dir_row(self, path: str):
+        return self._connection.execute("SELECT modified FROM dirs WHERE path = ?", (path,)).fetchone()
+
+    def _touch_dirs(self, path: str, now: float):
+        """Creates the folders above `path` and marks its direct folder as modified."""
+        parent = posixpath.dirname(path)
+        self._connection.execute("UPDATE dirs SET modified = ? WHERE path = ?", (now, parent))
+
+        while parent:
+            grandparent = posixpath.dirname(parent)
+            created = self._connection.execute(
+                "INSERT OR IGNORE INTO dirs (path, parent, modified) VALUES (?, ?, ?)", (parent, grandparent, now)
+            ).rowcount
+            if not created:
+                break
+            self._connection.execute("UPDATE dirs SET modified = ? WHERE path = ?", (now, grandparent))
+            parent = grandparent
+
+    def _put(self, path: str, offset: int, size: int):
+        """Points the index at the content of a file, called inside a transaction."""
+        now = time.time()
+        existed = self._file_row(path) is not None
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files (path, parent, offset, size, modified) VALUES (?, ?, ?, ?, ?)",
+            (path, posixpath.dirname(path), offset, size, now),
+        )
+        if not existed:
+            self._touch_dirs(path, now)
+
+    def _append(self, data: bytes) -> int:
+        offset = os.lseek(self._blob_fd, 0, os.SEEK_END)
+        written = 0
+        while written < len(data):
+            written += os.pwrite(self._blob_fd, data[written:], offset + written)
+        return offset
+
+    # --- Core Methods ---
+
+    def serve(self, relative_path: str) -> bytes:
+        """Reads and returns file content as bytes."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            row = self._file_row(path)
+            if row is None:
+                raise FileNotFoundError(f"File not found: {relative_path}")
+
+            offset, size, _ = row
+            if offset == INLINE:
+                return self._connection.execute("SELECT content FROM inline WHERE path = ?", (path,)).fetchone()[0]
+
+            # Read under the lock, `compact` may swap the blob between the lookup and the read
+            return os.pread(self._blob_fd, size, offset)
+
+    def list(self, relative_path: str = ".") -> List[str]:
+        """Lists all items in the directory (relative to root)."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            files = self._connection.execute("SELECT path FROM files WHERE parent = ?", (path,)).fetchall()
+            dirs = self._connection.execute("SELECT path FROM dirs WHERE parent = ?", (path,)).fetchall()
+        return [row[0] for row in dirs] + [row[0] for row in files]
+
+    def list_files(self, relative_path: str = ".") -> List[str]:
+        """Lists the file names in a directory."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            rows = self._connection.execute("SELECT path FROM files WHERE parent = ?", (path,)).fetchall()
+        return [posixpath.basename(row[0]) for row in rows]
+
+    def count(self, relative_path: str = ".") -> int:
+        """Counts items in a directory. Fails if path is a file."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            if self._dir_row(path) is None:
+                raise ValueError(f"'{relative_path}' is not a directory.")
+            files = self._connection.execute("SELECT COUNT(*) FROM files WHERE parent = ?", (path,)).fetchone()[0]
+            dirs = self._connection.execute("SELECT COUNT(*) FROM dirs WHERE parent = ?", (path,)).fetchone()[0]
+        return files + dirs
+
+    def store(self, content: Union[str, bytes], relative_path: str):
+        """Appends content to the blob and points the path at it, creating parent folders if needed."""
+        path = self._normalize(relative_path)
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+
+        with self._lock:
+            if self._dir_row(path) is not None:
+                raise IsADirectoryError(f"'{relative_path}' is a directory.")
+
+            # The bytes land before the index points at them, a crash leaves unreferenced bytes only
+            offset = self._append(data)
+            with self._connection:
+                self._connection.execute("DELETE FROM inline WHERE path = ?", (path,))
+                self._put(path, offset, len(data))
+
+    def replace(self, content: Union[str, bytes], relative_path: str):
+        """
+        Writes a file into the SQLite index instead of the blob, in a single commit.
+
+        For files rewritten over and over: stored in the blob, every rewrite would leave the
+        previous copy behind as garbage until `compact`.
+        """
+        path = self._normalize(relative_path)
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+
+        with self._lock:
+            if self._dir_row(path) is not None:
+                raise IsADirectoryError(f"'{relative_path}' is a directory.")
+
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO inline (path, content) VALUES (?, ?)", (path, sqlite3.Binary(data))
+                )
+                self._put(path, INLINE, len(data))
+
+    # --- Advanced Utility Methods ---
+
+    def exists(self, relative_path: str) -> bool:
+        """Returns True if the path exists."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            return self._file_row(path) is not None or self._dir_row(path) is not None
+
+    def info(self, relative_path: str) -> Dict[str, Any]:
+        """Returns metadata about a file or directory."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            file_row = self._file_row(path)
+            dir_row = self._dir_row(path) if file_row is None else None
+
+        if file_row is None and dir_row is None:
+            raise FileNotFoundError(f"Path does not exist: {relative_path}")
+
+        name = posixpath.basename(path)
+        if file_row is not None:
+            _, size, modified = file_row
+            return {
+                "name": name,
+                "size_bytes": size,
+                "modified": datetime.datetime.fromtimestamp(modified),
+                "is_file": True,
+                "extension": posixpath.splitext(name)[1],
+            }
+
+        return {
+            "name": name,
+            "size_bytes": 0,
+            "modified": datetime.datetime.fromtimestamp(dir_row[0]),
+            "is_file": False,
+            "extension": "",
+        }
+
+    def search(self, pattern: str, relative_path: str = ".") -> List[str]:
+        """Finds files matching a glob pattern (e.g., '*.csv')."""
+        path = self._normalize(relative_path)
+        with self._lock:
+            if self._dir_row(path) is None:
+                return []
+            if path:
+                rows = self._connection.execute(
+                    "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(path) + 1, path + "/")
+                ).fetchall()
+            else:
+                rows = self._connection.execute("SELECT path FROM files").fetchall()
+
+        return [row[0] for row in rows if fnmatch.fnmatch(posixpath.basename(row[0]), pattern)]
+
+    def delete(self, relative_path: str):
+        """Removes a file or directory (if empty). The file bytes stay in the blob until `compact`."""
+        path = self._normalize(relative_path)
+        with self._lock, self._connection:
+            now = time.time()
+            if self._connection.execute("DELETE FROM files WHERE path = ?", (path,)).rowcount:
+                self._connection.execute("DELETE FROM inline WHERE path = ?", (path,))
+                self._connection.execute(
+                    "UPDATE dirs SET modified = ? WHERE path = ?", (now, posixpath.dirname(path))
+                )
+                return
+
+            if not path or self._dir_row(path) is None:
+                return
+            if self.count(path):
+                raise OSError(f"Directory not empty: {relative_path}")
+
+            self._connection.execute("DELETE FROM dirs WHERE path = ?", (path,))
+            self._connection.execute("UPDATE dirs SET modified = ? WHERE path = ?", (now, posixpath.dirname(path)))
+
+    def garbage_bytes(self) -> int:
+        """Size of the blob not referenced by any file, reclaimed by `compact`."""
+        with self._lock:
+            live = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM files WHERE offset != ?", (INLINE,)
+            ).fetchone()[0]
+            return os.fstat(self._blob_fd).st_size - live
+
+    def compact(self):
+        """
+        Rewrites the live files into a new blob generation.
+
+        The new blob is written next to the old one and the index switches to it in a single
+        SQLite commit, so a crash at any point leaves a consistent pack behind. Other processes
+        that have the pack open must reopen it (`pointTo`) afterwards.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT path, offset, size FROM files WHERE offset != ? ORDER BY offset", (INLINE,)
+            ).fetchall()
+
+            generation = int(self._blob_path.name.split(".")[1]) + 1
+            new_name = BLOB_NAME.format(generation=generation)
+            new_offsets = []
+            with open(self.root / new_name, "wb") as f:
+                for path, offset, size in rows:
+                    new_offsets.append((f.tell(), path))
+                    f.write(os.pread(self._blob_fd, size, offset))
+                f.flush()
+                os.fsync(f.fileno())
+
+            with self._connection:
+                self._connection.executemany("UPDATE files SET offset = ? WHERE path = ?", new_offsets)
+                self._connection.execute("UPDATE meta SET value = ? WHERE key = 'blob'", (new_name,))
+
+            old_path = self._blob_path
+            os.close(self._blob_fd)
+            self._open_blob()
+            os.remove(old_path)
@@ -1,23 +1,48 @@
+from typing import Any, Callable, Dict, Optional
+
+
 class Record:
-    def __init__(self, data: dict):
+    def __init__(self, data: dict, loaders: Optional[Dict[str, Callable[[], Any]]] = None):
         # We store the data in a private attribute
         self._data = data
+        # Fields that are only read and cast on first access, then memoized in _data
+        self._loaders = dict(loaders) if loaders else {}
+
+    def _load(self, name):
+        # The loader is only dropped once it succeeded, a failed load is retried on next access
+        value = self._data[name] = self._loaders[name]()
+        del self._loaders[name]
+        return value
+
+    def is_loaded(self, name) -> bool:
+        return name in self._data
 
     # Supports record.image
     def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
         if name in self._data:
             return self._data[name]
+        if name in self._loaders:
+            return self._load(name)
         raise AttributeError(f"Record has no field '{name}'")
 
     # Supports record["image"]
     def __getitem__(self, key):
-        return self._data[key]
+        if key in self._data:
+            return self._data[key]
+        if key in self._loaders:
+            return self._load(key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._data or key in self._loaders
 
     # Useful for debugging: shows keys in the console
     def __repr__(self):
-        keys = ", ".join(self._data.keys())
+        keys = ", ".join(self.keys())
         return f"Record({keys})"
 
     # Allow iteration over keys like a dict
     def keys(self):
-        return self._data.keys()
+        return [*self._data.keys(), *(name for name in self._loaders if name not in self._data)]
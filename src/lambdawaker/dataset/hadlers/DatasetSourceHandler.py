@@ -1,14 +1,28 @@
-from typing import Optional
+from typing import Optional, Tuple
 
-from lambdawaker.dataset.hadlers.process_data_payload import process_data_payload
+from lambdawaker.dataset.LRUCache import LRUCache
+from lambdawaker.dataset.hadlers.PayloadEncoder import PayloadEncoder
+from lambdawaker.dataset.hadlers.process_data_payload import EncodedPayload
+
+DEFAULT_PAYLOAD_CACHE_BYTES = 256 * 1024 * 1024
+
+# Path segments that resolve to different records on every request
+RANDOM_SEGMENTS = ("random", "sample")
+
+
+def _is_random(path) -> bool:
+    return any(segment in RANDOM_SEGMENTS for segment in path)
 
 
 class DataSetsHandler:
-    def __init__(self, dataset_sources: Optional[list] = None):
+    def __init__(self, dataset_sources: Optional[list] = None, payload_cache_bytes: Optional[int] = DEFAULT_PAYLOAD_CACHE_BYTES,
+                 encoder: Optional[PayloadEncoder] = None):
         dataset_sources = dataset_sources or []
         self.data_sources_dict = {
             data_sources.id.lower(): data_sources for data_sources in dataset_sources
         }
+        self.payload_cache = LRUCache(max_bytes=payload_cache_bytes)
+        self.encoder = encoder if encoder is not None else PayloadEncoder()
 
     def __getitem__(self, item):
         path = item.split("/")
@@ -20,31 +34,84 @@ class DataSetsHandler:
             ds = self.data_sources_dict[ds_id.lower()]
             return ds[record_path]
 
+    def file(self, item) -> Optional[Tuple[str, str]]:
+        """
+        Returns (media_type, absolute path) when a dataset resource is an unmodified file on
+        the local disk, so it can be sent straight from the file. None otherwise.
+        """
+        path = item.split("/")
+        if len(path) <= 2 or _is_random(path[2:]):
+            return None
+
+        ds = self.data_sources_dict[("/".join(path[:2])).lower()]
+        if not hasattr(ds, "raw_file"):
+            return None
+
+        return ds.raw_file("/".join(path[2:]))
+
+    def payload(self, item, accept: Optional[str] = None) -> EncodedPayload:
+        """
+        Returns a dataset resource encoded for transmission.
+
+        Fields that are stored in a servable format are returned with their original bytes,
+        anything else goes through the PayloadEncoder, which picks the image format from the
+        `accept` header. Results of paths that always resolve to the same data (no "random" or
+        "sample" segment) are kept in a size-bounded LRU cache, keyed on the dataset version so
+        inserts and deletes do not serve stale entries, and on the negotiated format.
+
+        Raises:
+            KeyError, IndexError, ValueError: If the resource does not exist or cannot be encoded.
+        """
+        path = item.split("/")
+        if len(path) <= 2:
+            content_type, body = self.encoder.encode(self[item], accept)
+            return EncodedPayload.create(content_type, body)
+
+        ds_id = "/".join(path[:2]).lower()
+        record_path = "/".join(path[2:])
+        ds = self.data_sources_dict[ds_id]
+
+        cacheable = not _is_random(path[2:])
+        key = (ds_id, record_path, getattr(ds, "version", 0), self.encoder.variant(accept))
+        if cacheable:
+            cached = self.payload_cache.get(key)
+            if cached is not None:
+                return cached
+
+        raw = ds.raw(record_path) if hasattr(ds, "raw") else None
+        if raw is not None:
+            content_type, body = raw
+        else:
+            content_type, body = self.encoder.encode(ds[record_path], accept)
+
+        if content_type is None:
+            raise ValueError(f"Dataset resource could not be encoded: {item}")
+
+        payload = EncodedPayload.create(content_type, body)
+        if cacheable:
+            self.payload_cache.put(key, payload, size=len(payload.body))
+        return payload
+
     def __call__(self, route, request):
         cleaned_url = request.url.replace("lw.ds://", "")
 
         split = cleaned_url.split("/")
         dataset_id = "/".join(split[:2]).lower()
-        resource_path = "/".join(split[2:])
-
-        dataset = self.data_sources_dict.get(dataset_id, None)
 
-        if dataset is None:
+        if dataset_id not in self.data_sources_dict:
             print(f"> Dataset not found: {dataset_id}")
             route.continue_()
             return
 
-        data = dataset[resource_path]
-
-        content_type, file_data = process_data_payload(data)
-
-        if content_type is None:
+        try:
+            payload = self.payload(cleaned_url, request.headers.get("accept"))
+        except (KeyError, IndexError, ValueError):
             print(f"> File not found: {cleaned_url}")
             route.continue_()
             return
 
         route.fulfill(
             status=200,
-            content_type=content_type,
-            body=file_data
+            content_type=payload.content_type,
+            body=payload.body
         )
@@ -1,34 +1,117 @@
 import random
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-from datasets import load_dataset
+from datasets import DownloadConfig, load_dataset, load_from_disk
 
 
 class HfDatasetSource:
-    def __init__(self, dataset_id: str):
-        self.dataset = load_dataset(dataset_id)
+    """
+    A Hugging Face dataset exposed through the same paths as DiskDataset ("<split>/<index>/<field>").
+
+    Splits are loaded on first use and stay memory-mapped Arrow tables, so opening a large
+    dataset costs nothing until a template touches it. Field lookups read a projection of the
+    split on that single column, the other columns (e.g. images) are never decoded. `dataset`
+    still returns every split, loading them all on first access.
+
+    Args:
+        dataset_id (str): The dataset id on the Hub, also the id templates address it by.
+        local_path (Optional[str], optional): A dataset written with `save_to_disk`. When set it
+            is loaded with `load_from_disk` and the Hub is never contacted.
+        offline (bool, optional): Only use files already in the local Hugging Face cache.
+        cache_dir (Optional[str], optional): The Hugging Face cache directory to use.
+    """
+
+    def __init__(self, dataset_id: str, local_path: Optional[str] = None, offline: bool = False,
+                 cache_dir: Optional[str] = None):
         self.id = dataset_id
+        self.local_path = local_path
+        self.offline = offline
+        self.cache_dir = cache_dir
+
+        self._splits: Dict[str, Any] = {}
+        self._projections: Dict[Tuple[str, str], Any] = {}
+        self._saved = None
+        self._dataset = None
+        self._lock = threading.Lock()
+
+    @property
+    def dataset(self):
+        """Every split at once (a DatasetDict), loaded on first access. Paths only load the splits they use."""
+        if self._dataset is None:
+            with self._lock:
+                if self._dataset is None:
+                    self._dataset = self._load_split(None)
+        return self._dataset
+
+    def _load_split(self, split_name: Optional[str]):
+        """Loads one split, or every split when `split_name` is None."""
+        if self.local_path is not None:
+            if self._saved is None:
+                self._saved = load_from_disk(self.local_path)
+            # A single saved Dataset (not a DatasetDict) answers to every split name
+            if split_name is None or not hasattr(self._saved, "keys"):
+                return self._saved
+            return self._saved[split_name]
+
+        download_config = DownloadConfig(local_files_only=True) if self.offline else None
+        return load_dataset(
+            self.id,
+            split=split_name,
+            cache_dir=self.cache_dir,
+            download_config=download_config,
+            download_mode="reuse_dataset_if_exists" if self.offline else None,
+        )
+
+    def split(self, split_name: str):
+        """Returns a split, loading it on first use."""
+        split = self._splits.get(split_name)
+        if split is None:
+            with self._lock:
+                split = self._splits.get(split_name)
+                if split is None:
+                    split = self._splits[split_name] = self._load_split(split_name)
+        return split
+
+    def column(self, split_name: str, field: str):
+        """Returns the split projected on one column, rows read from it only decode that field."""
+        key = (split_name, field)
+        projection = self._projections.get(key)
+        if projection is None:
+            # select_columns is a view over the same Arrow table, nothing is copied
+            projection = self._projections[key] = self.split(split_name).select_columns([field])
+        return projection
 
     def __getitem__(self, item):
         path = item.split("/")
         split_name = path[0]
-        split = self.dataset[split_name]
         key = path[1]
+        field = path[2] if len(path) > 2 else None
 
         if key == "len":
-            return len(split)
+            return self.split(split_name).num_rows
 
         elif key == "random":
-            limit = len(split)
-            return split[random.randint(0, limit)]
+            split = self.split(split_name)
+            index = random.randrange(split.num_rows)
+            if field is None:
+                return split[index]
+            return self.column(split_name, field)[index][field]
+
+        elif key == "sample" and len(path) in (3, 4) and path[2].isdigit():
+            split = self.split(split_name)
+            indices = random.sample(range(split.num_rows), int(path[2]))
+            if len(path) == 3:
+                return [split[index] for index in indices]
+            return self.column(split_name, path[3])[indices][path[3]]
+
         elif key.isdigit():
             key = int(key)
             path_size = len(path)
 
             if path_size == 2:
-                return split[key]
+                return self.split(split_name)[key]
             elif path_size == 3:
-                field = path[2]
-                data = split[key][field]
-                return data
+                return self.column(split_name, field)[key][field]
 
         raise ValueError(f"Unsupported data type: {path}")
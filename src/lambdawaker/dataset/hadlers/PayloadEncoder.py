@@ -0,0 +1,143 @@
+import io
+import weakref
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from lambdawaker.dataset.LRUCache import LRUCache
+from lambdawaker.dataset.hadlers.process_data_payload import process_data_payload
+
+# Modes JPEG can store as they are, anything else without transparency is sent as PNG
+_JPEG_MODES = {"RGB", "L", "CMYK"}
+
+
+def accepts(accept_header: Optional[str], media_type: str) -> bool:
+    """
+    Returns True when an `Accept` header explicitly lists `media_type` with a non-zero quality.
+
+    Wildcards are ignored on purpose, `*/*` does not mean a client decodes WebP.
+    """
+    if not accept_header:
+        return False
+
+    for entry in accept_header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        if name.lower() != media_type:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def _is_frozen(data: Any) -> bool:
+    """True for arrays nothing can write to, not even through a writeable array they are a view of."""
+    while isinstance(data, np.ndarray):
+        if data.flags.writeable:
+            return False
+        data = data.base
+    return True
+
+
+class PayloadEncoder:
+    """
+    Encodes decoded dataset values for transmission, with tunable image encoding.
+
+    Images go out as PNG when they have transparency (or a mode JPEG cannot store) and as
+    JPEG otherwise, or as WebP for clients whose `Accept` header lists `image/webp` when
+    `webp` is enabled. Everything else is encoded by `process_data_payload`.
+
+    The encoded bytes of the last `memo_items` read-only arrays are kept per object identity,
+    so an `npImage` field shared through the dataset field cache is encoded once however many
+    paths (including uncached `random` ones) serve it. PIL images are mutable and always
+    encoded again.
+
+    Args:
+        png_compress_level (int): zlib level of PNG output, 0-9. Low levels encode several
+            times faster than PIL's default of 6 for slightly larger files.
+        jpeg_quality (int): JPEG quality, 1-95.
+        webp (bool): Serve WebP to clients that accept it.
+        webp_quality (int): Quality of lossy WebP, 0-100.
+        webp_lossless (bool): Encode images with transparency as lossless WebP, opaque ones
+            are always lossy.
+        webp_method (int): WebP speed/size trade-off, 0 (fast) to 6 (small).
+        memo_items (int): Encoded read-only arrays memoized by identity, 0 disables the memo.
+    """
+
+    def __init__(self, png_compress_level: int = 1, jpeg_quality: int = 85, webp: bool = False,
+                 webp_quality: int = 80, webp_lossless: bool = True, webp_method: int = 4, memo_items: int = 256):
+        self.png_compress_level = png_compress_level
+        self.jpeg_quality = jpeg_quality
+        self.webp = webp
+        self.webp_quality = webp_quality
+        self.webp_lossless = webp_lossless
+        self.webp_method = webp_method
+        self.memo = LRUCache(max_items=memo_items) if memo_items else None
+
+    def variant(self, accept: Optional[str]) -> str:
+        """The image format variant a client gets, part of cache keys of negotiated payloads."""
+        return "webp" if self.webp and accepts(accept, "image/webp") else ""
+
+    def encode(self, data: Any, accept: Optional[str] = None) -> Tuple[str, Any]:
+        """
+        Returns (mime_type, bytes/str) for a decoded value, see process_data_payload.
+
+        Args:
+            data (Any): The value to encode.
+            accept (Optional[str], optional): The `Accept` header of the client.
+        """
+        if isinstance(data, np.ndarray):
+            if data.ndim < 2:
+                return process_data_payload(data)
+        elif not isinstance(data, Image.Image):
+            return process_data_payload(data)
+
+        variant = self.variant(accept)
+        key = (id(data), variant)
+        # Images and writeable arrays may change in place, only read-only arrays (like field cache
+        # entries) are memoized
+        memoize = self.memo is not None and isinstance(data, np.ndarray) and _is_frozen(data)
+        if memoize:
+            memoized = self.memo.get(key)
+            # The id of a dead object can be reused, the weak reference tells them apart
+            if memoized is not None and memoized[0]() is data:
+                return memoized[1], memoized[2]
+
+        content_type, body = self.encode_image(data, variant)
+
+        if memoize:
+            try:
+                self.memo.put(key, (weakref.ref(data), content_type, body), size=len(body))
+            except TypeError:
+                # Not weak-referenceable, skip the memo
+                pass
+        return content_type, body
+
+    def encode_image(self, data: Any, variant: str = "") -> Tuple[str, bytes]:
+        image = Image.fromarray(data) if isinstance(data, np.ndarray) else data
+        buffer = io.BytesIO()
+
+        if variant == "webp":
+            alpha = _has_alpha(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if alpha else "RGB")
+            image.save(buffer, format="WEBP", quality=self.webp_quality, method=self.webp_method,
+                       lossless=alpha and self.webp_lossless)
+            return "image/webp", buffer.getvalue()
+
+        if image.mode in _JPEG_MODES:
+            image.save(buffer, format="JPEG", quality=self.jpeg_quality)
+            return "image/jpeg", buffer.getvalue()
+
+        image.save(buffer, format="PNG", compress_level=self.png_compress_level)
+        return "image/png", buffer.getvalue()
@@ -1,10 +1,56 @@
+import hashlib
 import io
 import json
+import mimetypes
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Optional
 
 import numpy as np
 from PIL import Image
 
+from lambdawaker.dataset.LazyImage import LazyImage
+
+# Field types whose stored bytes are already what process_data_payload would produce,
+# mapped to the media type to serve them with (None: guess it from the file extension).
+# 'xml' is not listed, its media type depends on the root element (SVG or not).
+RAW_MEDIA_TYPES = {
+    'str': 'text/plain',
+    'int': 'application/json',
+    'float': 'application/json',
+    'json': 'application/json',
+    'svgDoc': 'image/svg+xml',
+    'PilImage': None,
+    'npImage': None,
+    'LazyImage': None,
+}
+
+
+def raw_media_type(field_type: str, file_name: str) -> Optional[str]:
+    """
+    Returns the media type to serve a stored field file as-is, or None if it has to be decoded
+    and re-encoded through process_data_payload.
+    """
+    if field_type not in RAW_MEDIA_TYPES:
+        return None
+
+    return RAW_MEDIA_TYPES[field_type] or mimetypes.guess_type(file_name)[0]
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """A dataset resource ready to be sent: its media type, bytes and an ETag of the bytes."""
+    content_type: str
+    body: bytes
+    etag: str
+
+    @classmethod
+    def create(cls, content_type: str, body) -> 'EncodedPayload':
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        return cls(content_type, body, etag)
+
 
 def process_data_payload(data):
     """
@@ -16,7 +62,11 @@ def process_data_payload(data):
         return "text/plain", data
 
     if isinstance(data, (int, float, list, tuple, dict)):
-        return "application/json", json.dumps(data)
+        try:
+            return "application/json", json.dumps(data)
+        except TypeError:
+            # e.g. a list of images from a "sample" path, there is no single payload for it
+            raise ValueError(f"Cannot encode a {type(data).__name__} of non-JSON values")
 
     if isinstance(data, (ET.Element, ET.ElementTree)):
 
@@ -30,6 +80,10 @@ def process_data_payload(data):
         mime = "image/svg+xml" if "svg" in root.tag.lower() else "application/xml"
         return mime, xml_str
 
+    if isinstance(data, LazyImage):
+        # Already encoded, send it on without decoding
+        return data.media_type, data.raw
+
     if isinstance(data, (Image.Image, np.ndarray)):
         if isinstance(data, np.ndarray):
 
@@ -0,0 +1,39 @@
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def prefetch_map(func: Callable[[T], R], items: Iterable[T], num_workers: int = 4, prefetch: int = 2) -> Iterator[R]:
+    """
+    Like `map(func, items)`, but runs `func` ahead of the consumer on a thread pool.
+
+    Results are yielded in the order of `items`. At most `num_workers * prefetch` results are
+    pending or waiting to be consumed at any time, so memory stays bounded however long
+    `items` is. Closing the generator early cancels the calls that did not start yet.
+
+    Args:
+        func (Callable): The function applied to every item.
+        items (Iterable): The items, consumed lazily.
+        num_workers (int, optional): Threads calling `func`, 0 runs it in the consumer thread.
+            Defaults to 4.
+        prefetch (int, optional): Results read ahead per worker. Defaults to 2.
+    """
+    if num_workers <= 0:
+        yield from map(func, items)
+        return
+
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=num_workers)
+    try:
+        pending = deque(executor.submit(func, item) for item in itertools.islice(items, num_workers * max(1, prefetch)))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(func, item))
+            yield result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -20,6 +20,7 @@ class ProtocolHandler:
         PROGRESS: <int>
         STATUS: <str>
         MESSAGE: <str>
+        STATS: <key>=<number> [<key>=<number> ...]
         """
         line = line.strip()
         if not line:
@@ -45,6 +46,16 @@ class ProtocolHandler:
                 return True
             except IndexError:
                 pass
+        elif line.startswith("STATS:"):
+            try:
+                stats = {}
+                for pair in line.split(":", 1)[1].split():
+                    key, value = pair.split("=", 1)
+                    stats[key] = float(value) if "." in value else int(value)
+                state.stats.update(stats)
+                return True
+            except (ValueError, IndexError):
+                pass
 
         if log_file:
             try:
@@ -25,6 +25,7 @@ class WorkerState:
     message: str = ""
     attempts: int = 0
     extra_data: Dict[str, Any] = field(default_factory=dict)
+    stats: Dict[str, Any] = field(default_factory=dict)
 
     # UI related
     progress_obj: Optional[Progress] = None
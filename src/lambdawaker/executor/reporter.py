@@ -77,6 +77,8 @@ class RichReporter:
             ("range ", "dim"), (f"{start_idx}..{end_idx}", "dim"),
             ("  •  ", "dim"), (f"try {state.attempts}", "dim")
         )
+        for key, value in state.stats.items():
+            subtitle.append_text(Text.assemble(("  •  ", "dim"), (f"{key} {value}", "dim")))
 
         return Panel(state.progress_obj, title=title, subtitle=subtitle)
 
@@ -0,0 +1,100 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Computes the q-th percentile (0-100) of a list of values using linear interpolation.
+
+    Args:
+        values (List[float]): The samples. Does not need to be sorted.
+        q (float): The percentile to compute, between 0 and 100.
+
+    Returns:
+        float: The interpolated percentile, or NaN if there are no samples.
+    """
+    if not values:
+        return math.nan
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * (q / 100.0)
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return ordered[int(position)]
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class StageStats:
+    """
+    Collects latency samples per named stage and summarizes them as percentiles.
+
+    Samples are kept per stage in insertion order. When a window is given only the most
+    recent `window` samples of each stage are kept, which makes the percentiles rolling.
+    """
+
+    def __init__(self, window: Optional[int] = None, quantiles: Iterable[float] = (50, 90, 99)):
+        self.window = window
+        self.quantiles = tuple(quantiles)
+        self._samples: Dict[str, deque] = {}
+        self._totals: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        """Adds one sample, in seconds, to a stage."""
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = 0
+            samples.append(seconds)
+            self._totals[stage] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the body of a `with` block and records it under `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def stages(self) -> List[str]:
+        with self._lock:
+            return list(self._samples.keys())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarizes every stage.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Per stage, the total sample count, and over the kept
+            samples the mean, min, max and configured percentiles, all in milliseconds.
+        """
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+            totals = dict(self._totals)
+
+        result = {}
+        for stage, samples in snapshot.items():
+            entry = {
+                "count": totals[stage],
+                "mean_ms": 1000 * sum(samples) / len(samples),
+                "min_ms": 1000 * min(samples),
+                "max_ms": 1000 * max(samples),
+            }
+            for q in self.quantiles:
+                entry[f"p{q:g}_ms"] = 1000 * percentile(samples, q)
+            result[stage] = entry
+
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+            self._totals = {}
@@ -1,21 +1,168 @@
+import os
+from typing import Optional
+
 from playwright.async_api import async_playwright
 
 
+def _process_tree_rss_mb(root_pid: Optional[int] = None) -> Optional[float]:
+    """
+    Returns the resident memory, in MB, of every process descending from `root_pid`.
+
+    The Playwright driver and the Chromium processes it launches are children of this
+    process, so by default the whole browser tree is measured. Reads /proc, so it only
+    works on Linux; returns None elsewhere.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    root_pid = root_pid if root_pid is not None else os.getpid()
+
+    children = {}
+    rss_pages = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/statm", "r") as f:
+                statm = f.read().split()
+        except OSError:
+            continue
+
+        # The command name is in parentheses and may contain spaces, fields resume after it
+        fields = stat[stat.rfind(")") + 2:].split()
+        parent = int(fields[1])
+        pid = int(entry)
+        children.setdefault(parent, []).append(pid)
+        rss_pages[pid] = int(statm[1])
+
+    total_pages = 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        total_pages += rss_pages.get(pid, 0)
+        pending.extend(children.get(pid, []))
+
+    return total_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
 class AsyncPlaywrightRenderer:
-    def __init__(self):
+    """
+    Owns the Playwright browser, context and page used to render cards.
+
+    Long runs are kept healthy by recycling the context (and its pages) after
+    `max_renders_per_context` renders or once the browser process tree grows past
+    `max_rss_mb`. A crashed page triggers a recycle and a disconnected browser is
+    relaunched, both on the next call to `ensure_ready`.
+    """
+
+    def __init__(self, max_renders_per_context: Optional[int] = None, max_rss_mb: Optional[float] = None,
+                 rss_check_interval: int = 10):
         self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
 
+        self.max_renders_per_context = max_renders_per_context
+        self.max_rss_mb = max_rss_mb
+        self.rss_check_interval = rss_check_interval
+
+        self.render_count = 0
+        self.recycle_count = 0
+        self.crash_count = 0
+        self.relaunch_count = 0
+        # Bumped whenever the context is replaced, pages from older generations are gone
+        self.generation = 0
+
+        self._headless = True
+        self._closing = False
+        self._page_crashed = False
+        self._browser_lost = False
+
     async def start(self, headless=True):
+        self._headless = headless
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=headless)
-        self.context = await self.browser.new_context()
-        self.page = await self.context.new_page()
+        await self._launch()
         return self
 
+    async def _launch(self):
+        self.browser = await self.playwright.chromium.launch(headless=self._headless)
+        self.browser.on("disconnected", self._on_disconnected)
+        self._browser_lost = False
+        await self._new_context()
+
+    async def _new_context(self):
+        self.context = await self.browser.new_context()
+        self.page = await self.new_page()
+        self.render_count = 0
+        self._page_crashed = False
+        self.generation += 1
+
+    def _on_crash(self, page):
+        self.crash_count += 1
+        self._page_crashed = True
+
+    def _on_disconnected(self, browser):
+        if not self._closing:
+            self.crash_count += 1
+            self._browser_lost = True
+
+    @property
+    def is_broken(self) -> bool:
+        return self._browser_lost or self._page_crashed
+
+    async def new_page(self):
+        page = await self.context.new_page()
+        page.on("crash", self._on_crash)
+        return page
+
+    def _should_recycle(self) -> bool:
+        if self.max_renders_per_context is not None and self.render_count >= self.max_renders_per_context:
+            return True
+
+        if self.max_rss_mb is not None and self.render_count > 0 and self.render_count % self.rss_check_interval == 0:
+            rss = _process_tree_rss_mb()
+            return rss is not None and rss > self.max_rss_mb
+
+        return False
+
+    async def ensure_ready(self):
+        """Relaunches a lost browser, or recycles the context if it crashed or hit a limit."""
+        if self._browser_lost or not self.browser.is_connected():
+            await self.relaunch()
+        elif self._page_crashed or self._should_recycle():
+            await self.recycle()
+
+    async def recycle(self):
+        try:
+            await self.context.close()
+        except Exception:
+            # A crashed context may already be gone
+            pass
+        await self._new_context()
+        self.recycle_count += 1
+
+    async def relaunch(self):
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+        await self._launch()
+        self.relaunch_count += 1
+
+    def mark_render(self):
+        self.render_count += 1
+
+    def stats(self) -> dict:
+        return {
+            "recycles": self.recycle_count,
+            "relaunches": self.relaunch_count,
+            "crashes": self.crash_count,
+        }
+
     async def close(self):
+        self._closing = True
         if self.context:
             await self.context.close()
         if self.browser:
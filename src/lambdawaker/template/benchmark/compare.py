@@ -0,0 +1,44 @@
+from typing import Any, Dict, List
+
+COMPARED_METRICS = ("p50_ms", "p90_ms")
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1) -> List[str]:
+    """
+    Compares two benchmark reports and lists the regressions of `current` against `baseline`.
+
+    A regression is a throughput drop, or a stage latency increase, larger than `threshold`
+    (relative, 0.1 means 10%). Stages missing from either report are ignored.
+
+    Args:
+        baseline (Dict[str, Any]): A report previously written by the benchmark.
+        current (Dict[str, Any]): The report of the current run.
+        threshold (float): The tolerated relative change.
+
+    Returns:
+        List[str]: One human readable line per regression, empty if there are none.
+    """
+    regressions = []
+
+    base_throughput = baseline.get("cards_per_second") or 0
+    current_throughput = current.get("cards_per_second") or 0
+    if base_throughput > 0 and current_throughput < base_throughput * (1 - threshold):
+        regressions.append(
+            f"throughput: {current_throughput:.2f} cards/s < {base_throughput:.2f} cards/s"
+        )
+
+    base_stages = baseline.get("stages", {})
+    current_stages = current.get("stages", {})
+    for stage in sorted(set(base_stages) & set(current_stages)):
+        for metric in COMPARED_METRICS:
+            base_value = base_stages[stage].get(metric)
+            current_value = current_stages[stage].get(metric)
+            if not base_value or current_value is None:
+                continue
+
+            if current_value > base_value * (1 + threshold):
+                regressions.append(
+                    f"{stage}.{metric}: {current_value:.2f}ms > {base_value:.2f}ms"
+                )
+
+    return regressions
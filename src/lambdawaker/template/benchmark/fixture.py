@@ -0,0 +1,84 @@
+import json
+import random
+from pathlib import Path
+from typing import Tuple
+
+import yaml
+from PIL import Image
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+
+FIXTURE_DATASET_ID = "bench/fixture"
+
+FIXTURE_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <style>
+        #view-port {
+            width: 856px;
+            height: 540px;
+            border-radius: 32px;
+            font-family: sans-serif;
+            color: {{ env.theme.text_color.to_rgb_hex() }};
+            border: 8px solid {{ env.theme.primary_color.to_rgb_hex() }};
+            box-sizing: border-box;
+            padding: 32px;
+        }
+    </style>
+</head>
+<body>
+{% set record = ds["bench/fixture/all/" ~ data.id] %}
+<div id="view-port">
+    <h1>{{ common.title }}</h1>
+    <img src="/ds/bench/fixture/all/{{ data.id }}/photo" width="256" height="256">
+    <p>{{ record.name }}</p>
+    <p>{{ gen.name.first().data }} {{ gen.name.last().data }}</p>
+</div>
+</body>
+</html>
+"""
+
+
+def write_fixture(root: str, record_count: int = 50, seed: int = 0) -> Tuple[Path, Path]:
+    """
+    Writes a small, deterministic site and dataset for benchmarking the render pipeline.
+
+    Args:
+        root (str): Directory where the fixture is created.
+        record_count (int): Number of dataset records to generate.
+        seed (int): Seed for the generated record contents.
+
+    Returns:
+        Tuple[Path, Path]: The site path and the dataset path.
+    """
+    root = Path(root)
+    site_path = root / "site"
+    dataset_path = root / "dataset"
+
+    template_dir = site_path / "id_cards" / "bench"
+    (template_dir / "meta").mkdir(parents=True, exist_ok=True)
+    (template_dir / "index.html.j2").write_text(FIXTURE_TEMPLATE, encoding="utf-8")
+    (template_dir / "meta.yaml").write_text(yaml.dump({"class": "id_card"}), encoding="utf-8")
+    (template_dir / "meta" / "common.json").write_text(json.dumps({"title": "Benchmark Card"}), encoding="utf-8")
+
+    dataset_path.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "id": FIXTURE_DATASET_ID,
+        "fields": [
+            {"name": "name", "source": "name", "type": "str"},
+            {"name": "photo", "source": "photo", "type": "PilImage"},
+        ]
+    }
+    (dataset_path / "manifest.yaml").write_text(yaml.dump(manifest, sort_keys=False), encoding="utf-8")
+
+    rng = random.Random(seed)
+    with DiskDataset(str(dataset_path)) as dataset:
+        for record_id in range(record_count):
+            color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255), 255)
+            dataset.insert(str(record_id), {
+                "name": f"Record {record_id}",
+                "photo": Image.new("RGBA", (256, 256), color),
+            })
+
+    return site_path, dataset_path
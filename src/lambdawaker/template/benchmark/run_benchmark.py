@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import uvicorn
+
+from lambdawaker.log.StageStats import StageStats
+from lambdawaker.template.benchmark.compare import compare_reports
+from lambdawaker.template.benchmark.fixture import write_fixture
+from lambdawaker.template.render.CardRenderer import RENDER_MODES
+from lambdawaker.template.render_in_series import render
+from lambdawaker.template.server.TemplateServer import TemplateServer
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class BackgroundServer:
+    """Runs a TemplateServer with uvicorn in a daemon thread for the duration of a `with` block."""
+
+    def __init__(self, site_path: str, datasets: List[str], port: Optional[int] = None):
+        self.port = port or _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.template_server = TemplateServer(site_path, datasets)
+        self.server = uvicorn.Server(uvicorn.Config(
+            self.template_server.app,
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Template server failed to start.")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def run_workload(base_url: str, records: int, seed: int, render_mode: str, outdir: str, headless: bool = True) -> Dict[str, Any]:
+    """
+    Renders records [0, records) through `render_in_series.render` and builds a report.
+
+    The random generators are seeded so colors and backgrounds are the same between runs.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    stats = StageStats()
+
+    start = time.perf_counter()
+    # render() speaks the executor protocol on stdout, keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()) as protocol_output:
+        succeeded = asyncio.run(render(
+            (0, records),
+            base_url=base_url,
+            headless=headless,
+            outdir=outdir,
+            render_mode=render_mode,
+            stats=stats,
+        ))
+    elapsed = time.perf_counter() - start
+
+    if not succeeded:
+        raise RuntimeError(f"Benchmark workload failed:\n{protocol_output.getvalue()}")
+
+    stages = stats.summary()
+    cards = stages.get("card", {}).get("count", 0)
+
+    return {
+        "records": records,
+        "seed": seed,
+        "render_mode": render_mode,
+        "cards": cards,
+        "elapsed_s": elapsed,
+        "cards_per_second": cards / elapsed if elapsed > 0 else 0.0,
+        "stages": stages,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        description="Benchmark the end-to-end card rendering pipeline against a TemplateServer."
+    )
+
+    p.add_argument("--site", default=None, help="Site path. A generated fixture is used when omitted.")
+    p.add_argument("--dataset", action="append", default=None, help="Dataset path, can be repeated.")
+    p.add_argument("--records", default=20, type=int, help="Number of records to render (default: %(default)s)")
+    p.add_argument("--seed", default=0, type=int, help="Workload seed (default: %(default)s)")
+    p.add_argument("--render-mode", choices=RENDER_MODES, default="navigate", help="(default: %(default)s)")
+    p.add_argument("--port", default=None, type=int, help="Server port, a free one is picked when omitted.")
+    p.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    p.add_argument("--compare", default=None, help="Baseline JSON report to compare against.")
+    p.add_argument(
+        "--threshold", default=0.1, type=float,
+        help="Relative change tolerated before a stage counts as regressed (default: %(default)s)",
+    )
+    p.add_argument(
+        "--headless",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run browser headless (default: %(default)s).",
+    )
+
+    return p
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="lw_bench_") as workdir:
+        site_path, datasets = args.site, args.dataset or []
+        if site_path is None:
+            fixture_site, fixture_dataset = write_fixture(Path(workdir) / "fixture", record_count=args.records, seed=args.seed)
+            site_path, datasets = str(fixture_site), [str(fixture_dataset)]
+
+        with BackgroundServer(site_path, datasets, port=args.port) as server:
+            report = run_workload(
+                server.base_url,
+                records=args.records,
+                seed=args.seed,
+                render_mode=args.render_mode,
+                outdir=str(Path(workdir) / "output"),
+                headless=args.headless,
+            )
+
+    report_json = json.dumps(report, indent=2)
+    print(report_json)
+
+    if args.output:
+        Path(args.output).write_text(report_json, encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, report, threshold=args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
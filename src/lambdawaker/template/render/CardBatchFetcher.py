@@ -0,0 +1,75 @@
+import json
+import re
+from typing import Dict, Optional, Tuple
+
+from lambdawaker.draw.color.HSLuvColor import HSLuvColor
+from lambdawaker.draw.color.generate_color import generate_hsluv_black_text_contrasting_color
+from lambdawaker.template.AsyncPlaywrightRenderer import AsyncPlaywrightRenderer
+
+_HEAD_TAG = re.compile(r"<head(\s[^>]*)?>", re.IGNORECASE)
+
+
+def with_base_href(html: str, url: str) -> str:
+    """
+    Adds a `<base href>` to a page, so its relative and root-relative URLs resolve against
+    the server when it is loaded with `page.set_content` instead of navigating to `url`.
+    """
+    base = f'<base href="{url}">'
+
+    match = _HEAD_TAG.search(html)
+    if match is not None:
+        return html[:match.end()] + base + html[match.end():]
+    return base + html
+
+
+class CardBatchFetcher:
+    """
+    Pre-fetches the HTML of several cards of a template with one /render-batch/ request.
+
+    Asking for a record that is not fetched yet requests the window
+    [record_id, record_id + batch_size), capped at `stop`. The primary colors are generated
+    here, so they can be passed on to the image processor like in the other render modes.
+    """
+
+    def __init__(self, base_url: str, renderer: AsyncPlaywrightRenderer, batch_size: int = 32,
+                 stop: Optional[int] = None):
+        self.base_url = base_url
+        self.renderer = renderer
+        self.batch_size = batch_size
+        self.stop = stop
+        self._cards: Dict[Tuple[str, int], Tuple[dict, HSLuvColor]] = {}
+
+    async def _fetch(self, template_name: str, record_id: int):
+        stop = record_id + self.batch_size
+        if self.stop is not None:
+            stop = max(record_id + 1, min(stop, self.stop))
+
+        record_ids = list(range(record_id, stop))
+        colors = [generate_hsluv_black_text_contrasting_color() for _ in record_ids]
+
+        response = await self.renderer.context.request.post(
+            f"{self.base_url}/render-batch/id_cards/{template_name}",
+            data={
+                "ids": record_ids,
+                "primary_colors": [color.to_hsl_tuple() for color in colors],
+            },
+        )
+        if not response.ok:
+            raise RuntimeError(f"Batch render request failed with status {response.status}: {template_name}")
+
+        body = await response.text()
+        for line, color in zip(body.splitlines(), colors):
+            result = json.loads(line)
+            self._cards[(template_name, result["record_id"])] = (result, color)
+
+    async def get(self, template_name: str, record_id: int) -> Tuple[str, HSLuvColor]:
+        """Returns the HTML (with a `<base href>`) and the primary color of a card."""
+        key = (template_name, record_id)
+        if key not in self._cards:
+            await self._fetch(template_name, record_id)
+
+        result, color = self._cards.pop(key)
+        if "html" not in result:
+            raise RuntimeError(f"Failed to render record {record_id} of {template_name}: {result.get('error')}")
+
+        return with_base_href(result["html"], result["url"]), color
@@ -1,16 +1,19 @@
 import os
 from io import BytesIO
+from typing import Optional
 
 from PIL import Image
 
 from lambdawaker.draw import card_background as card_background_module
 from lambdawaker.file.path.ensure_directory import ensure_directory_for_file
+from lambdawaker.log.StageStats import StageStats
 from lambdawaker.reflection.query import select_random_function_from_module_and_submodules
 
 
 class CardImageProcessor:
-    def __init__(self, outdir: str):
+    def __init__(self, outdir: str, stats: Optional[StageStats] = None):
         self.outdir = outdir
+        self.stats = stats if stats is not None else StageStats()
 
     def process_and_save_image(self, image_bytes: bytes, record_id: int, template_name: str, primary_color) -> Image.Image:
         background_paint_function = select_random_function_from_module_and_submodules(
@@ -20,17 +23,20 @@ class CardImageProcessor:
 
         first_layer_image = Image.open(BytesIO(image_bytes))
 
-        _, card_background_image = background_paint_function(
-            first_layer_image.size,
-            primary_color,
-        )
-
-        canvas = Image.new("RGBA", first_layer_image.size)
-        for image in [card_background_image, first_layer_image]:
-            canvas.paste(image, (0, 0), image)
-
-        image_output_path = os.path.join(self.outdir, "img", f"{record_id}_{template_name}.png")
-        ensure_directory_for_file(image_output_path)
-        canvas.save(image_output_path)
+        with self.stats.stage("background"):
+            _, card_background_image = background_paint_function(
+                first_layer_image.size,
+                primary_color,
+            )
+
+        with self.stats.stage("composite"):
+            canvas = Image.new("RGBA", first_layer_image.size)
+            for image in [card_background_image, first_layer_image]:
+                canvas.paste(image, (0, 0), image)
+
+        with self.stats.stage("write"):
+            image_output_path = os.path.join(self.outdir, "img", f"{record_id}_{template_name}.png")
+            ensure_directory_for_file(image_output_path)
+            canvas.save(image_output_path)
 
         return canvas
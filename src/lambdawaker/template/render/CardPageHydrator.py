@@ -0,0 +1,104 @@
+from typing import Dict
+
+from playwright.async_api import Page
+
+from lambdawaker.template.AsyncPlaywrightRenderer import AsyncPlaywrightRenderer
+
+HYDRATE_SCRIPT = """
+async (payload) => {
+    const doc = new DOMParser().parseFromString(payload.html, "text/html");
+    const next = doc.querySelector("#view-port");
+    const current = document.querySelector("#view-port");
+    if (!next || !current) {
+        return false;
+    }
+
+    // Inline styles may depend on the record (theme colors), linked stylesheets stay parsed.
+    document.head.querySelectorAll("style").forEach((style) => style.remove());
+    doc.head.querySelectorAll("style").forEach((style) => document.head.appendChild(document.adoptNode(style)));
+
+    current.replaceWith(document.adoptNode(next));
+
+    window.__lw_context__ = payload.context;
+
+    // Scripts parsed by DOMParser never run, recreate them so the card runs them like after a navigation.
+    // They execute in document order, external ones included, before lw:hydrate is dispatched.
+    for (const parsed of Array.from(next.querySelectorAll("script"))) {
+        const script = document.createElement("script");
+        for (const attribute of Array.from(parsed.attributes)) {
+            script.setAttribute(attribute.name, attribute.value);
+        }
+        script.textContent = parsed.textContent;
+        if (script.src) {
+            script.async = false;
+            const loaded = new Promise((resolve) => {
+                script.onload = script.onerror = resolve;
+            });
+            parsed.replaceWith(script);
+            await loaded;
+        } else {
+            parsed.replaceWith(script);
+        }
+    }
+
+    document.dispatchEvent(new CustomEvent("lw:hydrate", {detail: payload.context}));
+
+    const images = Array.from(document.querySelectorAll("#view-port img"));
+    await Promise.all(images.map((img) => img.decode().catch(() => null)));
+    await document.fonts.ready;
+    return true;
+}
+"""
+
+
+class CardPageHydrator:
+    """
+    Keeps one page per template loaded and swaps records into it instead of navigating.
+
+    The first card of a template is loaded with a regular navigation. Every following card
+    fetches the `/hydrate/...` JSON payload and injects it through `page.evaluate`, so the
+    browser keeps the parsed CSS, decoded fonts and the rest of the DOM between cards.
+
+    Only `#view-port` and the inline `<style>` elements are replaced. Scripts inside `#view-port`
+    run again on every swap, in document order, and a `lw:hydrate` event carrying the record
+    context follows them. Scripts elsewhere on the page only run on the first load, templates
+    that set up state there should redo it when they receive `lw:hydrate`.
+    """
+
+    def __init__(self, base_url: str, renderer: AsyncPlaywrightRenderer):
+        self.base_url = base_url
+        self.renderer = renderer
+        self._pages: Dict[str, Page] = {}
+        self._generation = renderer.generation
+
+    async def load(self, record_id: int, template_name: str, query: str) -> Page:
+        render_url = f"{self.base_url}/render/id_cards/{template_name}/{record_id}?{query}"
+
+        if self._generation != self.renderer.generation:
+            # The renderer recycled its context, the pages we held are closed
+            self._pages = {}
+            self._generation = self.renderer.generation
+
+        page = self._pages.get(template_name)
+        if page is None:
+            page = await self.renderer.new_page()
+            self._pages[template_name] = page
+            await page.goto(render_url)
+            return page
+
+        response = await page.request.get(f"{self.base_url}/hydrate/id_cards/{template_name}/{record_id}?{query}")
+        if not response.ok:
+            raise RuntimeError(f"Hydration request failed with status {response.status}: {render_url}")
+
+        payload = await response.json()
+        if not await page.evaluate(HYDRATE_SCRIPT, payload):
+            # The template has no #view-port to swap, fall back to a full navigation
+            await page.goto(render_url)
+
+        return page
+
+    async def close(self):
+        if self._generation == self.renderer.generation:
+            for page in self._pages.values():
+                await page.close()
+        self._pages = {}
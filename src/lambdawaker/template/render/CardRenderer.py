@@ -1,11 +1,18 @@
-from typing import Tuple
+import time
+from typing import Tuple, Optional
 
 import requests
+from playwright.async_api import Error as PlaywrightError
 
 from lambdawaker.draw.color.generate_color import generate_hsluv_black_text_contrasting_color
+from lambdawaker.log.StageStats import StageStats
 from lambdawaker.template.AsyncPlaywrightRenderer import AsyncPlaywrightRenderer
+from lambdawaker.template.render.CardBatchFetcher import CardBatchFetcher
 from lambdawaker.template.render.CardImageProcessor import CardImageProcessor
 from lambdawaker.template.render.CardMetadataHandler import CardMetadataHandler
+from lambdawaker.template.render.CardPageHydrator import CardPageHydrator
+
+RENDER_MODES = ("navigate", "hydrate", "batch")
 
 
 def fetch_available_templates(base_url: str) -> Tuple[str, ...]:
@@ -19,19 +26,30 @@ def fetch_available_templates(base_url: str) -> Tuple[str, ...]:
 
 
 class CardRenderer:
-    def __init__(self, base_url: str, outdir: str = "./output/", headless: bool = True):
+    def __init__(self, base_url: str, outdir: str = "./output/", headless: bool = True, render_mode: str = "navigate",
+                 stats: Optional[StageStats] = None, recycle_after: Optional[int] = None, max_rss_mb: Optional[float] = None,
+                 batch_size: int = 32, batch_stop: Optional[int] = None):
+        if render_mode not in RENDER_MODES:
+            raise ValueError(f"Unsupported render mode '{render_mode}', expected one of {RENDER_MODES}")
+
         self.base_url = base_url
         self.outdir = outdir
         self.headless = headless
-        self.renderer = AsyncPlaywrightRenderer()
+        self.render_mode = render_mode
+        self.renderer = AsyncPlaywrightRenderer(max_renders_per_context=recycle_after, max_rss_mb=max_rss_mb)
+        self.hydrator = CardPageHydrator(base_url, self.renderer)
+        self.batch_fetcher = CardBatchFetcher(base_url, self.renderer, batch_size=batch_size, stop=batch_stop)
+        self.page = None
+        self.stats = stats if stats is not None else StageStats()
         self._available_templates = None
-        self.image_processor = CardImageProcessor(outdir)
+        self.image_processor = CardImageProcessor(outdir, stats=self.stats)
         self.metadata_handler = CardMetadataHandler(base_url, outdir)
 
     async def start(self):
         await self.renderer.start(headless=self.headless)
 
     async def close(self):
+        await self.hydrator.close()
         await self.renderer.close()
 
     async def get_available_templates(self) -> Tuple[str, ...]:
@@ -45,35 +63,60 @@ class CardRenderer:
             await self.render_single_card(record_id, template_name)
 
     async def render_single_card(self, record_id: int, template_name: str):
+        await self.renderer.ensure_ready()
+        try:
+            await self._render_single_card(record_id, template_name)
+        except PlaywrightError:
+            if not self.renderer.is_broken:
+                raise
+            # The page or browser died under us, start fresh and retry the card once
+            await self.renderer.ensure_ready()
+            await self._render_single_card(record_id, template_name)
+
+        self.renderer.mark_render()
+
+    async def _render_single_card(self, record_id: int, template_name: str):
+        card_start = time.perf_counter()
         primary_color = generate_hsluv_black_text_contrasting_color()
 
-        url = (
-            f"{self.base_url}/render/id_cards/{template_name}/{record_id}"
-            f"?primary_color={primary_color.to_hsl_tuple()}"
-        )
+        query = f"primary_color={primary_color.to_hsl_tuple()}"
 
-        page = self.renderer.page
-        await page.goto(url)
+        with self.stats.stage("navigation"):
+            if self.render_mode == "batch":
+                html, primary_color = await self.batch_fetcher.get(template_name, record_id)
+                page = self.renderer.page
+                await page.set_content(html)
+            elif self.render_mode == "hydrate":
+                page = await self.hydrator.load(record_id, template_name, query)
+            else:
+                page = self.renderer.page
+                await page.goto(f"{self.base_url}/render/id_cards/{template_name}/{record_id}?{query}")
+            self.page = page
 
-        card = await page.wait_for_selector("#view-port")
-        image_bytes = await card.screenshot(omit_background=True)
+            card = await page.wait_for_selector("#view-port")
+
+        with self.stats.stage("screenshot"):
+            image_bytes = await card.screenshot(omit_background=True)
 
         first_layer_image = self.image_processor.process_and_save_image(
             image_bytes, record_id, template_name, primary_color
         )
 
-        meta = self.metadata_handler.fetch_template_meta(template_name)
+        with self.stats.stage("metadata"):
+            meta = self.metadata_handler.fetch_template_meta(template_name)
+
+            w, h = first_layer_image.size
+            elements = [{
+                "class": meta["class"],
+                "boundingBox": [0, 0, w, h]
+            }]  # + await self.capture_elements()
 
-        w, h = first_layer_image.size
-        elements = [{
-            "class": meta["class"],
-            "boundingBox": [0, 0, w, h]
-        }]  # + await self.capture_elements()
+            self.metadata_handler.save_object_detection_log(record_id, template_name, elements)
 
-        self.metadata_handler.save_object_detection_log(record_id, template_name, elements)
+        self.stats.record("card", time.perf_counter() - card_start)
 
     async def capture_elements(self):
-        page = self.renderer.page
+        page = self.page or self.renderer.page
         selector = "[data-class]"
 
         # Ensure at least one exists before continuing
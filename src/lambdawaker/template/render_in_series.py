@@ -2,9 +2,10 @@
 import argparse
 import asyncio
 import traceback
-from typing import Tuple
+from typing import Tuple, Optional
 
-from lambdawaker.template.render.CardRenderer import CardRenderer
+from lambdawaker.log.StageStats import StageStats
+from lambdawaker.template.render.CardRenderer import CardRenderer, RENDER_MODES
 
 
 async def render(
@@ -13,9 +14,24 @@ async def render(
         base_url: str,
         headless: bool = True,
         outdir: str = "./output/img/",
-):
+        render_mode: str = "navigate",
+        stats: Optional[StageStats] = None,
+        recycle_after: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+        batch_size: int = 32,
+) -> bool:
     print("STATUS: RUNNING")
-    card_renderer = CardRenderer(base_url=base_url, outdir=outdir, headless=headless)
+    card_renderer = CardRenderer(
+        base_url=base_url,
+        outdir=outdir,
+        headless=headless,
+        render_mode=render_mode,
+        stats=stats,
+        recycle_after=recycle_after,
+        max_rss_mb=max_rss_mb,
+        batch_size=batch_size,
+        batch_stop=ds_range[1],
+    )
     await card_renderer.start()
 
     start, end = ds_range
@@ -26,10 +42,11 @@ async def render(
         print(f"MESSAGE: Failed to fetch templates: {e}")
         print("STATUS: FAILED")
         await card_renderer.close()
-        return
+        return False
 
     try:
         local_count = 0
+        reported_stats = None
         for record_id in range(start, end):
             print(f"MESSAGE: Processing record {record_id}")
             await card_renderer.render_record(record_id)
@@ -37,11 +54,18 @@ async def render(
             local_count += 1
             print(f"PROGRESS: {local_count}")
 
+            renderer_stats = card_renderer.renderer.stats()
+            if renderer_stats != reported_stats:
+                print("STATS: " + " ".join(f"{key}={value}" for key, value in renderer_stats.items()))
+                reported_stats = renderer_stats
+
         print("STATUS: SUCCESS")
+        return True
     except Exception as e:
         error_message = traceback.format_exc()
         print(f"MESSAGE: Error during rendering: {error_message}")
         print("STATUS: FAILED")
+        return False
     finally:
         await card_renderer.close()
 
@@ -69,6 +93,32 @@ def build_parser() -> argparse.ArgumentParser:
         default="./output",
         help="Output directory (default: %(default)s)",
     )
+    p.add_argument(
+        "--render-mode",
+        choices=RENDER_MODES,
+        default="navigate",
+        help="navigate loads every card with a full page load, hydrate keeps one page per template "
+             "and injects each record into it, batch fetches the HTML of many cards per request and "
+             "loads it with set_content (default: %(default)s)",
+    )
+    p.add_argument(
+        "--batch-size",
+        default=32,
+        type=int,
+        help="Cards fetched per request in batch render mode (default: %(default)s)",
+    )
+    p.add_argument(
+        "--recycle-after",
+        default=None,
+        type=int,
+        help="Recycle the browser context after this many cards (default: never)",
+    )
+    p.add_argument(
+        "--max-rss-mb",
+        default=None,
+        type=float,
+        help="Recycle the browser context once the browser processes use more memory than this (default: no limit)",
+    )
 
     return p
 
@@ -83,6 +133,10 @@ def main() -> int:
             base_url=args.base_url,
             headless=args.headless,
             outdir=args.outdir,
+            render_mode=args.render_mode,
+            recycle_after=args.recycle_after,
+            max_rss_mb=args.max_rss_mb,
+            batch_size=args.batch_size,
         )
     )
     return 0
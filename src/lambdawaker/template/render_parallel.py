@@ -38,7 +38,14 @@ def run_dispatcher(dataset_size, config):
             "--end", str(end),
             "--base-url", config.base_url,
             "--outdir", config.outdir,
+            "--render-mode", getattr(config, "render_mode", "navigate"),
         ]
+        if getattr(config, "recycle_after", None) is not None:
+            cmd += ["--recycle-after", str(config.recycle_after)]
+        if getattr(config, "max_rss_mb", None) is not None:
+            cmd += ["--max-rss-mb", str(config.max_rss_mb)]
+        if getattr(config, "batch_size", None) is not None:
+            cmd += ["--batch-size", str(config.batch_size)]
         if config.headless:
             cmd.append("--headless")
         else:
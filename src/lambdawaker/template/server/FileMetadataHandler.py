@@ -1,35 +1,101 @@
 import mimetypes
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Optional, Tuple
 
 from fastapi import HTTPException
 
 
 class FileMetadataHandler:
-    def __init__(self, root_path: Union[str, Path]):
+    """
+    Answers INFO requests with the metadata of a file or the entries of a directory.
+
+    Directory listings are built with `os.scandir`, which reuses the entry type returned by
+    the directory read, and are cached per directory. With `check_mtime` enabled a listing is
+    rebuilt when the directory mtime changes, which happens whenever an entry is added, removed
+    or renamed (edits to an existing file do not touch it, so their size and mtime may lag until
+    the directory changes or `clear` is called). With it disabled a listing is built once.
+    """
+
+    def __init__(self, root_path: Union[str, Path], check_mtime: bool = True):
         self.root = Path(root_path).resolve()
         if not self.root.exists():
             raise ValueError(f"Root path {root_path} does not exist.")
 
+        self.check_mtime = check_mtime
+        self._listings: Dict[str, Tuple[int, List[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root)
+
     def _get_metadata(self, entry: Path) -> Dict:
         """Helper to extract metadata for a single file or directory."""
         stats = entry.stat()
+        is_dir = entry.is_dir()
+
+        return self._build_metadata(entry.name, str(entry.relative_to(self.root)), stats, is_dir)
 
-        mimetype = "inode/directory" if entry.is_dir() else mimetypes.guess_type(entry)[0]
+    @staticmethod
+    def _build_metadata(name: str, relative_path: str, stats: os.stat_result, is_dir: bool) -> Dict:
+        mimetype = "inode/directory" if is_dir else mimetypes.guess_type(name)[0]
 
         return {
-            "name": entry.name,
+            "name": name,
             "size": stats.st_size,
             "st_mtime": datetime.fromtimestamp(stats.st_mtime).isoformat(),
-            "path": str(entry.relative_to(self.root)),
+            "path": relative_path,
             "mimetype": mimetype,
-            "is_dir": entry.is_dir(),
-            "extension": entry.suffix if entry.is_file() else None,
+            "is_dir": is_dir,
+            "extension": os.path.splitext(name)[1] if not is_dir else None,
         }
 
-    def __call__(self, relative_path: str = "") -> Union[List[Dict], Dict]:
-        # 1. Resolve target path and prevent directory traversal
+    def _scan(self, target: Path) -> List[Dict]:
+        prefix = self._relative(str(target))
+        prefix = "" if prefix == "." else prefix
+
+        listing = []
+        with os.scandir(target) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                    stats = entry.stat()
+                except OSError:
+                    # Broken symlinks or entries removed while scanning
+                    continue
+
+                relative_path = os.path.join(prefix, entry.name) if prefix else entry.name
+                listing.append(self._build_metadata(entry.name, relative_path, stats, is_dir))
+
+        listing.sort(key=lambda item: item["name"])
+        return listing
+
+    def list_directory(self, target: Path) -> List[Dict]:
+        """Returns the cached metadata of every entry of `target`, sorted by name."""
+        key = str(target)
+        cached = self._listings.get(key)
+
+        if cached is not None and not self.check_mtime:
+            return cached[1]
+
+        mtime = os.stat(target).st_mtime_ns
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        listing = self._scan(target)
+        with self._lock:
+            self._listings[key] = (mtime, listing)
+
+        return listing
+
+    def clear(self):
+        with self._lock:
+            self._listings = {}
+
+    def _resolve(self, relative_path: str) -> Path:
+        # Resolve target path and prevent directory traversal
         target = (self.root / relative_path.lstrip("/")).resolve()
 
         if not target.exists():
@@ -38,9 +104,23 @@ class FileMetadataHandler:
         if not str(target).startswith(str(self.root)):
             raise HTTPException(status_code=403, detail="Access denied")
 
-        # 2. Logic for Directories
+        return target
+
+    def page(self, relative_path: str = "", offset: int = 0, limit: Optional[int] = None) -> Tuple[Union[List[Dict], Dict], Optional[int]]:
+        """
+        Like `__call__`, but directory listings are sliced to [offset, offset + limit).
+
+        Returns the metadata and, for directories, the total number of entries (None for files).
+        """
+        target = self._resolve(relative_path)
+
         if target.is_dir():
-            return [self._get_metadata(item) for item in target.iterdir()]
+            listing = self.list_directory(target)
+            end = None if limit is None else offset + limit
+            return listing[offset:end], len(listing)
 
-        # 3. Logic for Files
-        return self._get_metadata(target)
+        return self._get_metadata(target), None
+
+    def __call__(self, relative_path: str = "") -> Union[List[Dict], Dict]:
+        metadata, _ = self.page(relative_path)
+        return metadata
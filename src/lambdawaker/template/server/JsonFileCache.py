@@ -0,0 +1,53 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+
+class JsonFileCache:
+    """
+    Keeps parsed JSON files in memory, keyed by path.
+
+    With `check_mtime` enabled every `get` stats the file and re-parses it when its
+    mtime or size changed. With it disabled a file is read once and served from memory
+    until `clear` is called, which is what a production server without template edits wants.
+    Missing files are cached as well and resolve to the default.
+    """
+
+    def __init__(self, check_mtime: bool = True):
+        self.check_mtime = check_mtime
+        self._entries: Dict[str, Tuple[Optional[Tuple[int, int]], Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stats = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stats.st_mtime_ns, stats.st_size
+
+    def get(self, path: str, default: Any = None) -> Any:
+        entry = self._entries.get(path)
+
+        if entry is not None and not self.check_mtime:
+            signature, value = entry
+            return value if signature is not None else default
+
+        signature = self._signature(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1] if signature is not None else default
+
+        value = None
+        if signature is not None:
+            with open(path, "r") as f:
+                value = json.load(f)
+
+        with self._lock:
+            self._entries[path] = (signature, value)
+
+        return value if signature is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
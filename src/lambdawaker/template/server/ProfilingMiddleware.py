@@ -0,0 +1,55 @@
+import time
+
+from lambdawaker.template.server.RequestProfiler import RequestProfiler
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return f"{scope['method']} (unmatched)"
+    return f"{scope['method']} {path or '/'}"
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that times the stages of every request through a RequestProfiler.
+
+    Each stage marked with `profile_stage` while handling the request is added to the
+    response as a `Server-Timing: <stage>;dur=<ms>` entry, and the request is recorded in
+    the rolling statistics of its route template (e.g. `GET /render/{template_type}/...`).
+    Stages may nest, `render` includes the `dataset` and `fields` time spent inside it.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings = self.profiler.begin()
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                self.profiler.finish(_route_name(scope), dict(timings), time.perf_counter() - start)
+
+        async def send_with_stages(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                for stage, seconds in timings.items():
+                    headers.append((b"server-timing", f"{stage};dur={seconds * 1000:.2f}".encode("latin-1")))
+                message = {**message, "headers": headers}
+                record()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stages)
+        finally:
+            record()
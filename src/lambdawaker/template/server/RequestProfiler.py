@@ -0,0 +1,157 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from lambdawaker.log.StageStats import StageStats
+
+# Stage timings (seconds) of the request being handled, None when profiling is off
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("lw_request_timings", default=None)
+# Whether the blocking work of the request being handled runs under cProfile
+_sampled: ContextVar[bool] = ContextVar("lw_request_sampled", default=False)
+
+
+@contextmanager
+def profile_stage(name: str):
+    """
+    Adds the time spent in the `with` block to stage `name` of the current request.
+
+    Repeated stages accumulate. Outside of a profiled request this does nothing but one
+    context variable lookup, so it can stay in the request path permanently.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed(func, stage: str):
+    """Wraps a callable so every call is counted in `stage` of the current request."""
+
+    def wrapper(*args, **kwargs):
+        with profile_stage(stage):
+            return func(*args, **kwargs)
+
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def instrument_tree(tree: Any, stage: str) -> Any:
+    """
+    Returns a copy of a (nested) dict with every callable wrapped by `timed` and every other
+    object behind a `TimedProxy`, used to time the `gen` field generators the templates call.
+    """
+    if isinstance(tree, dict):
+        return {key: instrument_tree(value, stage) for key, value in tree.items()}
+    if isinstance(tree, (str, bytes, int, float, bool, type(None))):
+        return tree
+    if callable(tree) and not isinstance(tree, type):
+        return timed(tree, stage)
+    return TimedProxy(tree, stage)
+
+
+class TimedProxy:
+    """
+    Counts `obj[key]` lookups and calls to the methods of `obj` in a profiling stage, used
+    for the `ds` dataset handler and generator objects such as PseudoTextGenerator.
+    """
+
+    def __init__(self, obj, stage: str):
+        self._obj = obj
+        self._stage = stage
+
+    def __getitem__(self, item):
+        with profile_stage(self._stage):
+            return self._obj[item]
+
+    def __getattr__(self, name):
+        value = getattr(self._obj, name)
+        if callable(value) and not isinstance(value, type):
+            return timed(value, self._stage)
+        return value
+
+
+class RequestProfiler:
+    """
+    Per-request stage timings, rolling per-route percentiles and sampled cProfile dumps.
+
+    `ProfilingMiddleware` opens a request with `begin`, the server code marks stages with
+    `profile_stage`, and `finish` folds the timings into the StageStats of the route.
+    When `profile_dir` is set, a `sample_rate` fraction of the requests run their blocking
+    work (see `call`) under cProfile and the profiles are written there as `.prof` files.
+    """
+
+    def __init__(self, window: int = 1000, profile_dir: Optional[str] = None, sample_rate: float = 0.0):
+        self.window = window
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate if profile_dir is not None else 0.0
+
+        self.routes: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._profile_count = 0
+
+        if profile_dir is not None:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def begin(self) -> Dict[str, float]:
+        timings = {}
+        _timings.set(timings)
+        _sampled.set(self.sample_rate > 0 and random.random() < self.sample_rate)
+        return timings
+
+    def finish(self, route: str, timings: Dict[str, float], total: float):
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = StageStats(window=self.window)
+
+        stats.record("total", total)
+        for stage, seconds in timings.items():
+            stats.record(stage, seconds)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self._lock:
+            routes = dict(self.routes)
+        return {route: stats.summary() for route, stats in sorted(routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+    def call(self, func, *args):
+        """Runs `func(*args)`, under cProfile when the current request was sampled."""
+        if not _sampled.get():
+            return func(*args)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows only one at a time), skip this one
+            return func(*args)
+
+        try:
+            return func(*args)
+        finally:
+            profiler.disable()
+            self._dump(profiler, getattr(func, "__name__", "call"))
+
+    def _dump(self, profiler: cProfile.Profile, name: str):
+        with self._lock:
+            self._profile_count += 1
+            count = self._profile_count
+
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        path = os.path.join(self.profile_dir, f"{int(time.time())}_{os.getpid()}_{count}_{safe_name}.prof")
+        profiler.dump_stats(path)
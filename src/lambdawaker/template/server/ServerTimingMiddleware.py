@@ -0,0 +1,30 @@
+import time
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that reports how long the app took to produce a response.
+
+    The time from receiving the request until the response headers are sent is added
+    as a `Server-Timing: app;dur=<ms>` header, which browsers show in their network panel.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                duration_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", f"app;dur={duration_ms:.2f}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
@@ -1,116 +1,179 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
 import mimetypes
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Dict, Any, Optional, Mapping, List, Sequence
 
 from fastapi import FastAPI, HTTPException
-from jinja2 import FileSystemLoader, select_autoescape
+from jinja2 import FileSystemLoader, FileSystemBytecodeCache, select_autoescape
 from jinja2.exceptions import TemplateNotFound
+from pydantic import BaseModel
 from starlette.requests import Request
-from starlette.responses import Response, FileResponse, RedirectResponse
+from starlette.responses import Response, FileResponse, RedirectResponse, JSONResponse, StreamingResponse
 from starlette.staticfiles import StaticFiles
 
 from lambdawaker.dataset.DiskDataset import DiskDataset
-from lambdawaker.dataset.hadlers.DatasetSourceHandler import DataSetsHandler
-from lambdawaker.dataset.hadlers.process_data_payload import process_data_payload
+from lambdawaker.dataset.hadlers.DatasetSourceHandler import DataSetsHandler, DEFAULT_PAYLOAD_CACHE_BYTES
+from lambdawaker.dataset.hadlers.PayloadEncoder import PayloadEncoder
 from lambdawaker.draw.color.HSLuvColor import to_hsluv_color
 from lambdawaker.draw.color.generate_color import generate_hsluv_black_text_contrasting_color
 from lambdawaker.template.fields import field_generators
 from lambdawaker.template.server.FileMetadataHandler import FileMetadataHandler
+from lambdawaker.template.server.JsonFileCache import JsonFileCache
+from lambdawaker.template.server.ProfilingMiddleware import ProfilingMiddleware
 from lambdawaker.template.server.RelativeLoader import RelativeEnvironment
+from lambdawaker.template.server.RequestProfiler import RequestProfiler, TimedProxy, profile_stage, instrument_tree
+from lambdawaker.template.server.ServerTimingMiddleware import ServerTimingMiddleware
+from lambdawaker.template.server.byte_range import byte_range_response
+
+
+class BatchRenderRequest(BaseModel):
+    """
+    Body of /render-batch/: either explicit `ids` or the range [start, stop).
+
+    `primary_colors` holds one (H, S, L, A) color per record, records without one get a
+    generated color, returned in their result line.
+    """
+    ids: Optional[List[int]] = None
+    start: Optional[int] = None
+    stop: Optional[int] = None
+    primary_colors: Optional[List[Tuple[float, float, float, float]]] = None
+
+    def record_ids(self) -> Sequence[int]:
+        """The requested ids, a range is returned as is so its size can be checked before use."""
+        if self.ids is not None:
+            return self.ids
+        if self.start is None or self.stop is None:
+            raise HTTPException(status_code=400, detail="Either ids or start and stop are required")
+        return range(self.start, self.stop)
 
 
 class TemplateServer:
-    def __init__(self, site_path: str, datasets: list):
+    def __init__(self, site_path: str, datasets: list, auto_reload: bool = True, bytecode_cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 payload_cache_bytes: Optional[int] = DEFAULT_PAYLOAD_CACHE_BYTES, id_index_dir: Optional[str] = None,
+                 max_batch_size: int = 1000, profiling: bool = False, profile_dir: Optional[str] = None,
+                 profile_sample_rate: float = 0.0, payload_encoder: Optional[PayloadEncoder] = None):
+        """
+        Args:
+            site_path (str): Root of the site with the Jinja templates and static files.
+            datasets (list): Paths of the DiskDatasets exposed to the templates and under /ds/.
+            auto_reload (bool): When True, templates and `meta/common.json` files are checked for
+                changes on every request. Set it to False in production so they are loaded once.
+            bytecode_cache_dir (Optional[str]): Directory where Jinja keeps compiled templates, so
+                new server processes skip compiling them again.
+            max_workers (Optional[int]): Threads of the executor that runs blocking request work.
+                Defaults to the ThreadPoolExecutor default.
+            max_concurrency (Optional[int]): Maximum number of requests doing blocking work at the
+                same time. Unlimited (bounded by the executor) when None.
+            payload_cache_bytes (Optional[int]): Memory budget of the encoded /ds/ payload cache.
+            id_index_dir (Optional[str]): Directory with shared record id indexes, named by
+                `id_index_file_name`. Datasets with an index there memory-map it instead of
+                scanning their folders, see `serve.py`.
+            max_batch_size (int): Maximum number of records of one /render-batch/ request.
+            profiling (bool): Time the stages of every request (template, render, dataset, fields,
+                color), report them as Server-Timing entries and keep per-route percentiles at /_stats.
+            profile_dir (Optional[str]): With profiling, directory where sampled cProfile dumps go.
+            profile_sample_rate (float): Fraction of the requests profiled with cProfile.
+            payload_encoder (Optional[PayloadEncoder]): How /ds/ values that are not served from
+                their stored bytes are encoded (PNG/JPEG/WebP settings, `Accept` negotiation).
+        """
         self.site_path = Path(site_path).resolve()
         self.datasets = datasets
-
-        self.app = FastAPI()
+        self.auto_reload = auto_reload
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self.payload_cache_bytes = payload_cache_bytes
+        self.id_index_dir = id_index_dir
+        self.max_batch_size = max_batch_size
+        self.payload_encoder = payload_encoder if payload_encoder is not None else PayloadEncoder()
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="template-server")
+        self._limiter = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+        self.profiler = RequestProfiler(profile_dir=profile_dir, sample_rate=profile_sample_rate) if profiling else None
+
+        self.app = FastAPI(lifespan=self._lifespan)
+        self.app.add_middleware(ServerTimingMiddleware)
+        if self.profiler is not None:
+            self.app.add_middleware(ProfilingMiddleware, profiler=self.profiler)
         self._setup_jinja()
         self._setup_datasets()
         self._setup_routes()
         self._setup_static()
 
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        yield
+        self.executor.shutdown(wait=False)
+
     def _setup_jinja(self):
+        bytecode_cache = None
+        if self.bytecode_cache_dir is not None:
+            os.makedirs(self.bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(self.bytecode_cache_dir)
+
         self.env = RelativeEnvironment(
             loader=FileSystemLoader(str(self.site_path)),
             autoescape=select_autoescape(["html", "xml", "svg"]),
+            auto_reload=self.auto_reload,
+            bytecode_cache=bytecode_cache,
         )
+        self.common_cache = JsonFileCache(check_mtime=self.auto_reload)
 
     def _setup_datasets(self):
         dataset_paths = self.datasets
-        datasets = [DiskDataset(path) for path in dataset_paths]
+        # Loading is mostly waiting on the filesystem, load every dataset at once
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(dataset_paths)))) as executor:
+            datasets = list(executor.map(
+                lambda path: DiskDataset(path, id_index_path=self._id_index_path(path)), dataset_paths
+            ))
+
+        self.dataset_handler = DataSetsHandler(
+            datasets, payload_cache_bytes=self.payload_cache_bytes, encoder=self.payload_encoder
+        )
 
-        self.dataset_handler = DataSetsHandler(datasets)
+        # What the templates see as `ds` and `gen`, timed per call when profiling
+        self.template_datasets = self.dataset_handler
+        self.field_generators = field_generators
+        if self.profiler is not None:
+            self.template_datasets = TimedProxy(self.dataset_handler, "dataset")
+            self.field_generators = instrument_tree(field_generators, "fields")
 
     def _setup_routes(self):
-        self.handel_path_info = FileMetadataHandler(self.site_path)
+        self.handel_path_info = FileMetadataHandler(self.site_path, check_mtime=self.auto_reload)
+
+        if self.profiler is not None:
+            @self.app.get("/_stats")
+            async def profiling_stats():
+                return self.profiler.summary()
 
         @self.app.get("/render/{template_type}/{variant}/{record_id:int}")
-        def render_card_by_record(
+        async def render_card_by_record(
                 template_type: str,
                 variant: str,
                 record_id: int,
                 request: Request,
                 primary_color: Tuple[float, float, float, float] = (0, 0, 0, 1)
         ):
-            path = os.path.join(template_type, variant, "index.html.j2")
-            if not self.site_path.joinpath(path).exists():
-                raise HTTPException(status_code=404, detail="Template not found")
-
-            env_path = str(self.site_path.joinpath(template_type, variant, "meta", "common.json"))
-            common = {}
-
-            if os.path.exists(env_path):
-                with open(env_path, 'r') as f:
-                    import json
-                    common = json.load(f)
-
-            return self.render_template(
-                path,
-                request,
-                primary_color,
-                data={
-                    "data": {
-                        "id": record_id
-                    },
-                    "common": common
-                }
-            )
+            return await self.run_blocking(self._render_card, template_type, variant, record_id, request, primary_color)
 
         @self.app.get("/render/{template_type}/{variant}/")
-        def render_card_by_random_record(
+        async def render_card_by_random_record(
                 template_type: str,
                 variant: str,
                 request: Request,
                 primary_color: Tuple[float, float, float, float] = (0, 0, 0, 1)
         ):
-            path = os.path.join(template_type, variant, "index.html.j2")
-            if not self.site_path.joinpath(path).exists():
-                raise HTTPException(status_code=404, detail="Template not found")
-
-            env_path = str(self.site_path.joinpath(template_type, variant, "meta", "common.json"))
-            common = {}
-
-            if os.path.exists(env_path):
-                with open(env_path, 'r') as f:
-                    import json
-                    common = json.load(f)
-
-            return self.render_template(
-                path,
-                request,
-                primary_color,
-                data={
-                    "data": {
-                        "id": "random"
-                    },
-                    "common": common
-                }
-            )
+            return await self.run_blocking(self._render_card, template_type, variant, "random", request, primary_color)
 
         @self.app.get("/render/{template_type}/{variant}")
-        def render_card_random_record_redirect(
+        async def render_card_random_record_redirect(
                 template_type: str,
                 variant: str,
         ):
@@ -119,55 +182,232 @@ class TemplateServer:
                 status_code=307,  # preserves method & body
             )
 
+        @self.app.get("/hydrate/{template_type}/{variant}/{record_id:int}")
+        async def hydrate_card_by_record(
+                template_type: str,
+                variant: str,
+                record_id: int,
+                request: Request,
+                primary_color: Tuple[float, float, float, float] = (0, 0, 0, 1)
+        ):
+            return await self.run_blocking(self._render_card, template_type, variant, record_id, request, primary_color, True)
+
+        @self.app.post("/render-batch/{template_type}/{variant}")
+        async def render_card_batch(
+                template_type: str,
+                variant: str,
+                batch: BatchRenderRequest,
+                request: Request,
+        ):
+            return await self._render_card_batch(template_type, variant, batch, request)
+
         @self.app.get("/render/{path:path}")
-        def serve_relative_to_site(path: str, request: Request):
+        async def serve_relative_to_site(path: str, request: Request):
             if path.endswith(".j2"):
-                return render_jinja_any(path, request)
+                return await render_jinja_any(path, request)
 
             full_path = self.site_path.joinpath(path)
-            if not full_path.exists():
+            if not await self.run_blocking(full_path.exists):
                 raise HTTPException(status_code=404, detail="File not found")
             return FileResponse(path=str(full_path))
 
         @self.app.get("/ds/{path:path}")
-        def server_dataset_resource(path: str):
-            try:
-                data = self.dataset_handler[path]
-            except (KeyError, IndexError, ValueError):
-                raise HTTPException(status_code=404, detail="Dataset resource not found")
-
-            content_type, data = process_data_payload(data)
-            if content_type is None:
-                raise HTTPException(status_code=404, detail="Dataset resource processing failed")
-            return Response(content=data, media_type=content_type)
+        async def server_dataset_resource(path: str, request: Request):
+            return await self.run_blocking(self._dataset_resource, path, request.headers)
 
         @self.app.get("/{path:path}")
-        def render_jinja_any(path: str, request: Request):
+        async def render_jinja_any(path: str, request: Request):
             if path == "":
                 path = "index.html.j2"
 
             if not path.endswith(".j2"):
                 raise HTTPException(status_code=404)
 
-            template_path = self.site_path / path
-            if not template_path.exists():
-                raise HTTPException(status_code=404)
-
-            return self.render_template(path, request)
+            return await self.run_blocking(self._render_site_template, path, request)
 
         @self.app.api_route("/{path:path}", methods=["INFO"])
-        def handle_info(path: str):
-            return self.handel_path_info(path)
+        async def handle_info(path: str, offset: int = 0, limit: Optional[int] = None):
+            if offset < 0 or (limit is not None and limit < 0):
+                raise HTTPException(status_code=400, detail="offset and limit must not be negative")
+
+            metadata, total = await self.run_blocking(self.handel_path_info.page, path, offset, limit)
+
+            headers = {"X-Total-Count": str(total)} if total is not None else None
+            return JSONResponse(content=metadata, headers=headers)
+
+    def _id_index_path(self, dataset_path: str) -> Optional[str]:
+        if self.id_index_dir is None:
+            return None
+        return os.path.join(self.id_index_dir, id_index_file_name(dataset_path))
+
+    def warm(self, payload_records: int = 0):
+        """
+        Fills the server caches ahead of the first requests.
+
+        Compiles every Jinja template of the site (through the bytecode cache when configured),
+        parses every `meta/common.json` and, for the first `payload_records` records of each
+        dataset, encodes every field that is not sent straight from disk into the /ds/ payload cache.
+        """
+        for template_path in self.site_path.rglob("*.j2"):
+            name = template_path.relative_to(self.site_path).as_posix()
+            try:
+                self.env.get_template(name)
+            except Exception as e:
+                print(f"> Failed to compile template {name}: {e}")
+
+        for common_path in self.site_path.rglob("meta/common.json"):
+            self.common_cache.get(str(common_path), {})
+
+        for ds_id, dataset in self.dataset_handler.data_sources_dict.items():
+            fields = [field['name'] for field in dataset.manifest['fields']]
+            for index in range(min(payload_records, len(dataset))):
+                for field in fields:
+                    path = f"{ds_id}/all/{index}/{field}"
+                    try:
+                        if self.dataset_handler.file(path) is None:
+                            self.dataset_handler.payload(path)
+                    except (KeyError, IndexError, ValueError, FileNotFoundError):
+                        continue
 
     def _setup_static(self):
         self.app.mount("/", StaticFiles(directory=str(self.site_path)), name="site")
 
-    def render_template(self, path: str, request: Request, primary_color=None, data=None) -> Response:
+    async def run_blocking(self, func, *args):
+        """
+        Runs blocking work (disk reads, dataset decoding, Jinja rendering) on the server executor.
+
+        At most `max_concurrency` calls run at once, the rest wait here without holding a thread.
+        The caller's context variables are carried over to the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        if self.profiler is not None:
+            func, args = self.profiler.call, (func, *args)
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+
+        if self._limiter is None:
+            return await loop.run_in_executor(self.executor, call)
+
+        async with self._limiter:
+            return await loop.run_in_executor(self.executor, call)
+
+    def _render_card(self, template_type: str, variant: str, record_id, request: Request, primary_color,
+                     hydrate: bool = False) -> Response:
+        path = self._card_template_path(template_type, variant)
+        data = self._card_data(template_type, variant, record_id)
+
+        if hydrate:
+            return self.render_hydration_payload(path, request, primary_color, data=data)
+        return self.render_template(path, request, primary_color, data=data)
+
+    async def _render_card_batch(self, template_type: str, variant: str, batch: "BatchRenderRequest",
+                                 request: Request) -> StreamingResponse:
+        record_ids = batch.record_ids()
+        if len(record_ids) > self.max_batch_size:
+            raise HTTPException(status_code=400, detail=f"At most {self.max_batch_size} records per batch")
+        if batch.primary_colors is not None and len(batch.primary_colors) != len(record_ids):
+            raise HTTPException(status_code=400, detail="primary_colors must have one color per record")
+
+        # Resolve the template and common.json once, every record of the batch shares them
+        path = await self.run_blocking(self._card_template_path, template_type, variant)
+        try:
+            await self.run_blocking(self.env.get_template, path)
+        except TemplateNotFound:
+            raise HTTPException(status_code=404, detail="Template not found")
+        common = (await self.run_blocking(self._card_data, template_type, variant, None))["common"]
+
+        card_url = f"{str(request.base_url).rstrip('/')}/render/{template_type}/{variant}"
+
+        async def lines():
+            for index, record_id in enumerate(record_ids):
+                primary_color = batch.primary_colors[index] if batch.primary_colors is not None else None
+                data = {"data": {"id": record_id}, "common": common}
+                line = {"record_id": record_id, "url": f"{card_url}/{record_id}"}
+
+                try:
+                    context = self.build_context(request, primary_color, data)
+                    line["html"] = await self.run_blocking(self._render, path, context)
+                    line["primary_color"] = context["env"]["theme"]["primary_color"].to_hsl_tuple()
+                except HTTPException as e:
+                    line["status"] = e.status_code
+                    line["error"] = e.detail
+                except Exception as e:
+                    # One broken record must not end the stream for the rest of the batch
+                    line["status"] = 500
+                    line["error"] = str(e)
+
+                yield json.dumps(line) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    def _render_site_template(self, path: str, request: Request) -> Response:
+        if self.auto_reload and not (self.site_path / path).exists():
+            raise HTTPException(status_code=404)
+
+        return self.render_template(path, request)
+
+    def _dataset_resource(self, path: str, headers: Optional[Mapping[str, str]] = None) -> Response:
+        try:
+            with profile_stage("dataset"):
+                return self._dataset_response(path, headers or {})
+        except (KeyError, IndexError, ValueError, FileNotFoundError):
+            raise HTTPException(status_code=404, detail="Dataset resource not found")
+
+    def _dataset_response(self, path: str, headers: Mapping[str, str]) -> Response:
+        if_none_match = headers.get("if-none-match")
+
+        file = self.dataset_handler.file(path)
+        if file is not None:
+            # Stored bytes are sent straight from the file: Range requests and, on servers
+            # that implement the pathsend extension, zero-copy sends are handled by FileResponse
+            media_type, file_path = file
+            response = FileResponse(file_path, media_type=media_type, stat_result=os.stat(file_path))
+            if _etag_matches(if_none_match, response.headers["etag"]):
+                return Response(status_code=304, headers={"ETag": response.headers["etag"]})
+            return response
+
+        payload = self.dataset_handler.payload(path, headers.get("accept"))
+        response_headers = {"ETag": payload.etag}
+        if self.payload_encoder.webp:
+            # The image format depends on the Accept header
+            response_headers["Vary"] = "Accept"
+
+        if _etag_matches(if_none_match, payload.etag):
+            return Response(status_code=304, headers=response_headers)
+
+        return byte_range_response(
+            payload.body,
+            payload.content_type,
+            range_header=headers.get("range"),
+            if_range=headers.get("if-range"),
+            headers=response_headers,
+        )
+
+    def _card_template_path(self, template_type: str, variant: str) -> str:
+        path = os.path.join(template_type, variant, "index.html.j2")
+
+        # Without auto reload the template is looked up once by Jinja and a missing one
+        # surfaces as TemplateNotFound when rendering, no need to stat it per request
+        if self.auto_reload and not self.site_path.joinpath(path).exists():
+            raise HTTPException(status_code=404, detail="Template not found")
+
+        return path
+
+    def _card_data(self, template_type: str, variant: str, record_id) -> Dict[str, Any]:
+        env_path = str(self.site_path.joinpath(template_type, variant, "meta", "common.json"))
+
+        return {
+            "data": {
+                "id": record_id
+            },
+            "common": self.common_cache.get(env_path, {})
+        }
+
+    def build_context(self, request: Request, primary_color=None, data=None) -> Dict[str, Any]:
         data = data if data is not None else {}
-        path = path.replace("\\", "/")
 
-        primary_color = to_hsluv_color(primary_color) if primary_color is not None else generate_hsluv_black_text_contrasting_color()
-        text_color_hex = to_hsluv_color((0, 0, 0, 1))
+        with profile_stage("color"):
+            primary_color = to_hsluv_color(primary_color) if primary_color is not None else generate_hsluv_black_text_contrasting_color()
+            text_color_hex = to_hsluv_color((0, 0, 0, 1))
 
         default_env = {
             "theme": {
@@ -176,28 +416,81 @@ class TemplateServer:
             }
         }
 
-        output_name = path[:-3]  # remove ".j2"
-        media_type, _ = mimetypes.guess_type(output_name)
-        media_type = media_type or "text/plain"
+        return {
+            "request": request,
+            "env": default_env,
+            "gen": self.field_generators,
+            "ds": self.template_datasets,
+            **data
+        }
 
+    def _render(self, path: str, context: Dict[str, Any]) -> str:
         try:
-            template = self.env.get_template(path)
+            with profile_stage("template"):
+                template = self.env.get_template(path)
         except TemplateNotFound:
             raise HTTPException(status_code=404, detail="Template not found")
 
         try:
-            rendered = template.render(
-                request=request,
-                env=default_env,
-                gen=field_generators,
-                ds=self.dataset_handler,
-                **data
-            )
+            with profile_stage("render"):
+                return template.render(**context)
         except (KeyError, IndexError, ValueError) as e:
             # Often data access in template might fail if record doesn't exist
             raise HTTPException(status_code=404, detail=f"Data or template error: {str(e)}")
 
+    def render_template(self, path: str, request: Request, primary_color=None, data=None) -> Response:
+        path = path.replace("\\", "/")
+
+        output_name = path[:-3]  # remove ".j2"
+        media_type, _ = mimetypes.guess_type(output_name)
+        media_type = media_type or "text/plain"
+
+        context = self.build_context(request, primary_color, data)
+        rendered = self._render(path, context)
+
         return Response(
             content=rendered,
             media_type=media_type
         )
+
+    def render_hydration_payload(self, path: str, request: Request, primary_color=None, data=None) -> Response:
+        """
+        Renders a template with the same context as `render_template`, but returns it as JSON.
+
+        The payload carries the rendered markup together with the JSON-serializable part of the
+        context (theme, data, common), so a page that already has the template loaded can swap
+        in a new record without navigating.
+        """
+        path = path.replace("\\", "/")
+
+        context = self.build_context(request, primary_color, data)
+        rendered = self._render(path, context)
+
+        payload = {
+            "html": rendered,
+            "context": {
+                "env": context["env"],
+                **(data or {})
+            }
+        }
+
+        return Response(
+            content=json.dumps(payload, default=_json_default),
+            media_type="application/json"
+        )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    return if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+def _json_default(value):
+    if hasattr(value, "__json__"):
+        return value.__json__()
+    return str(value)
+
+
+def id_index_file_name(dataset_path: str) -> str:
+    """Name of the shared record id index of a dataset, stable across processes."""
+    resolved = str(Path(dataset_path).resolve())
+    return hashlib.sha1(resolved.encode("utf-8")).hexdigest() + ".ids"
@@ -0,0 +1,71 @@
+from typing import Optional, Tuple
+
+from starlette.responses import Response
+
+
+def parse_byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range `Range` header into a half-open (start, end) interval.
+
+    Returns None when the header should be ignored (malformed, another unit or several
+    ranges, which RFC 9110 allows answering with the full content).
+
+    Raises:
+        ValueError: If the range is well formed but does not overlap the content.
+    """
+    units, _, spec = range_header.partition("=")
+    if units.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, dash, end_text = spec.strip().partition("-")
+    if not dash:
+        return None
+
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+
+    if start is None:
+        if end is None:
+            return None
+        # Suffix range: the last `end` bytes, there are none in an empty body
+        if end == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - end), size
+
+    end = size if end is None else end + 1
+
+    if start >= size or end <= start:
+        raise ValueError("Range not satisfiable")
+
+    return start, min(end, size)
+
+
+def byte_range_response(body: bytes, media_type: str, range_header: Optional[str] = None,
+                        if_range: Optional[str] = None, headers: Optional[dict] = None) -> Response:
+    """
+    Serves an in-memory body, honouring a single-range `Range` header like FileResponse does
+    for files on disk. `If-Range` is compared against the ETag in `headers`.
+    """
+    headers = dict(headers or {})
+    headers["Accept-Ranges"] = "bytes"
+
+    use_range = range_header is not None and (if_range is None or if_range == headers.get("ETag"))
+    if not use_range:
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    size = len(body)
+    try:
+        byte_range = parse_byte_range(range_header, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+    return Response(content=body[start:end], status_code=206, media_type=media_type, headers=headers)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import uvicorn
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+from lambdawaker.dataset.hadlers.PayloadEncoder import PayloadEncoder
+from lambdawaker.template.server.TemplateServer import TemplateServer, id_index_file_name
+
+CONFIG_ENV = "LW_TEMPLATE_SERVER_CONFIG"
+
+
+def build_shared_indexes(dataset_paths: List[str], index_dir: str):
+    """
+    Scans every dataset once and writes its record ids where the workers will memory-map them.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+
+    def build(path: str):
+        dataset = DiskDataset(path, read_only=True)
+        dataset.write_id_index(os.path.join(index_dir, id_index_file_name(path)))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(dataset_paths)))) as executor:
+        list(executor.map(build, dataset_paths))
+
+
+def create_app():
+    """
+    uvicorn app factory, run once in every worker process.
+
+    Reads the server configuration the launcher put in the environment, builds the
+    TemplateServer over the shared indexes and warms its caches before serving.
+    """
+    config = json.loads(os.environ[CONFIG_ENV])
+
+    server = TemplateServer(
+        config["site"],
+        config["datasets"],
+        auto_reload=config["auto_reload"],
+        bytecode_cache_dir=config["bytecode_cache_dir"],
+        max_workers=config["max_workers"],
+        max_concurrency=config["max_concurrency"],
+        payload_cache_bytes=config["payload_cache_bytes"],
+        payload_encoder=PayloadEncoder(
+            png_compress_level=config["png_compress_level"],
+            jpeg_quality=config["jpeg_quality"],
+            webp=config["webp"],
+        ),
+        id_index_dir=config["index_dir"],
+        profiling=config["profiling"],
+        profile_dir=config["profile_dir"],
+        profile_sample_rate=config["profile_sample_rate"],
+    )
+    server.warm(payload_records=config["warm_records"])
+
+    return server.app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        description="Serve a template site and its datasets with one or more uvicorn workers."
+    )
+
+    p.add_argument("--site", required=True, help="Site path with the Jinja templates.")
+    p.add_argument("--dataset", action="append", default=[], help="Dataset path, can be repeated.")
+    p.add_argument("--host", default="127.0.0.1", help="(default: %(default)s)")
+    p.add_argument("--port", default=8000, type=int, help="(default: %(default)s)")
+    p.add_argument(
+        "--workers", default=os.cpu_count() or 1, type=int,
+        help="Number of uvicorn worker processes (default: %(default)s)",
+    )
+    p.add_argument(
+        "--auto-reload",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Pick up template and common.json changes without restarting (default: %(default)s)",
+    )
+    p.add_argument(
+        "--cache-dir", default=None,
+        help="Directory for the shared id indexes and the Jinja bytecode cache (default: a temporary directory)",
+    )
+    p.add_argument("--max-workers", default=None, type=int, help="Threads per worker for blocking request work.")
+    p.add_argument("--max-concurrency", default=None, type=int, help="Concurrent blocking requests per worker.")
+    p.add_argument(
+        "--payload-cache-mb", default=256, type=int,
+        help="Encoded /ds/ payload cache per worker, in MB (default: %(default)s)",
+    )
+    p.add_argument(
+        "--png-compress-level", default=1, type=int,
+        help="zlib level of PNG encoded /ds/ images, 0-9 (default: %(default)s)",
+    )
+    p.add_argument("--jpeg-quality", default=85, type=int, help="Quality of JPEG encoded /ds/ images (default: %(default)s)")
+    p.add_argument(
+        "--webp",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Encode /ds/ images as WebP for clients that accept it (default: %(default)s)",
+    )
+    p.add_argument(
+        "--warm-records", default=0, type=int,
+        help="Records per dataset encoded into the payload cache at startup (default: %(default)s)",
+    )
+
+    p.add_argument(
+        "--profiling",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Report per-stage Server-Timing headers and per-route percentiles at /_stats (default: %(default)s)",
+    )
+    p.add_argument("--profile-dir", default=None, help="With --profiling, write sampled cProfile dumps here.")
+    p.add_argument(
+        "--profile-sample-rate", default=0.01, type=float,
+        help="Fraction of requests profiled with cProfile when --profile-dir is set (default: %(default)s)",
+    )
+
+    return p
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="lw_template_server_")
+    index_dir = os.path.join(cache_dir, "indexes")
+    build_shared_indexes(args.dataset, index_dir)
+
+    os.environ[CONFIG_ENV] = json.dumps({
+        "site": args.site,
+        "datasets": args.dataset,
+        "auto_reload": args.auto_reload,
+        "bytecode_cache_dir": os.path.join(cache_dir, "jinja"),
+        "max_workers": args.max_workers,
+        "max_concurrency": args.max_concurrency,
+        "payload_cache_bytes": args.payload_cache_mb * 1024 * 1024,
+        "png_compress_level": args.png_compress_level,
+        "jpeg_quality": args.jpeg_quality,
+        "webp": args.webp,
+        "index_dir": index_dir,
+        "warm_records": args.warm_records,
+        "profiling": args.profiling,
+        "profile_dir": args.profile_dir,
+        "profile_sample_rate": args.profile_sample_rate,
+    })
+
+    uvicorn.run(
+        "lambdawaker.template.server.serve:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
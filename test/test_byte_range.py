@@ -0,0 +1,64 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from lambdawaker.template.server.byte_range import parse_byte_range, byte_range_response
+
+
+class TestParseByteRange(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_byte_range("bytes=0-3", 10), (0, 4))
+        self.assertEqual(parse_byte_range("bytes=4-", 10), (4, 10))
+        self.assertEqual(parse_byte_range("bytes=-3", 10), (7, 10))
+        self.assertEqual(parse_byte_range("bytes=5-100", 10), (5, 10))
+        self.assertEqual(parse_byte_range("bytes=-100", 10), (0, 10))
+
+    def test_ignored_headers(self):
+        self.assertIsNone(parse_byte_range("items=0-3", 10))
+        self.assertIsNone(parse_byte_range("bytes=0-1,4-5", 10))
+        self.assertIsNone(parse_byte_range("bytes=a-b", 10))
+        self.assertIsNone(parse_byte_range("bytes=-", 10))
+
+    def test_unsatisfiable(self):
+        with self.assertRaises(ValueError):
+            parse_byte_range("bytes=10-", 10)
+        with self.assertRaises(ValueError):
+            parse_byte_range("bytes=5-2", 10)
+        # Nothing in an empty body can be addressed, not even a suffix
+        for header in ("bytes=-10", "bytes=0-", "bytes=0-0"):
+            with self.assertRaises(ValueError):
+                parse_byte_range(header, 0)
+
+
+class TestByteRangeResponse(unittest.TestCase):
+    body = b"0123456789"
+
+    def test_partial_content(self):
+        response = byte_range_response(self.body, "text/plain", range_header="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.body, b"234")
+        self.assertEqual(response.headers["content-range"], "bytes 2-4/10")
+
+    def test_stale_if_range_returns_full_body(self):
+        response = byte_range_response(
+            self.body, "text/plain", range_header="bytes=2-4", if_range='"old"', headers={"ETag": '"new"'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.body)
+
+    def test_not_satisfiable(self):
+        response = byte_range_response(self.body, "text/plain", range_header="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["content-range"], "bytes */10")
+
+    def test_empty_body_is_not_satisfiable(self):
+        response = byte_range_response(b"", "text/plain", range_header="bytes=-10")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["content-range"], "bytes */0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import sys
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import yaml
+from PIL import Image
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+from lambdawaker.dataset.hadlers.DatasetSourceHandler import DataSetsHandler
+
+
+class TestDataSetsHandlerPayload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        manifest = {
+            "id": "test/people",
+            "fields": [
+                {"name": "name", "source": "name", "type": "str"},
+                {"name": "photo", "source": "photo", "type": "PilImage"},
+                {"name": "meta", "source": "meta", "type": "yaml"},
+                {"name": "badge", "source": "badge", "type": "xml"},
+            ]
+        }
+        (root / "manifest.yaml").write_text(yaml.dump(manifest))
+
+        self.dataset = DiskDataset(str(root))
+        self.dataset.insert("a", {
+            "name": "Alice",
+            "photo": Image.new("RGB", (4, 4), (255, 0, 0)),
+            "meta": {"age": 30},
+            "badge": ET.fromstring('<svg xmlns="http://www.w3.org/2000/svg"><circle r="1"/></svg>'),
+        })
+        self.handler = DataSetsHandler([self.dataset])
+        self.root = root
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_image_is_served_with_stored_bytes(self):
+        payload = self.handler.payload("test/people/all/0/photo")
+        self.assertEqual(payload.content_type, "image/png")
+        self.assertEqual(payload.body, (self.root / "photo" / "a.png").read_bytes())
+
+    def test_fields_needing_encoding_are_encoded(self):
+        payload = self.handler.payload("test/people/all/0/meta")
+        self.assertEqual(payload.content_type, "application/json")
+        self.assertEqual(payload.body, b'{"age": 30}')
+
+    def test_svg_stored_as_xml_is_served_as_svg(self):
+        payload = self.handler.payload("test/people/all/0/badge")
+        self.assertEqual(payload.content_type, "image/svg+xml")
+        self.assertIn(b"circle", payload.body)
+        self.assertIsNone(self.handler.file("test/people/all/0/badge"))
+
+    def test_payloads_are_cached_until_dataset_changes(self):
+        first = self.handler.payload("test/people/all/0/name")
+        self.assertIs(self.handler.payload("test/people/all/0/name"), first)
+
+        self.dataset.insert("a", {"name": "Alicia"})
+        second = self.handler.payload("test/people/all/0/name")
+        self.assertEqual(second.body, b"Alicia")
+        self.assertNotEqual(first.etag, second.etag)
+
+    def test_stored_files_are_located_on_disk(self):
+        media_type, file_path = self.handler.file("test/people/all/0/photo")
+        self.assertEqual(media_type, "image/png")
+        self.assertEqual(Path(file_path), (self.root / "photo" / "a.png").resolve())
+
+        self.assertIsNone(self.handler.file("test/people/all/0/meta"))
+        self.assertIsNone(self.handler.file("test/people/random/photo"))
+
+
+    def test_random_paths_are_not_cached(self):
+        self.dataset.insert("b", {"name": "Bob"})
+        names = {self.handler.payload("test/people/all/random/name").body for _ in range(50)}
+        self.assertEqual(names, {b"Alice", b"Bob"})
+        self.assertEqual(len(self.handler.payload_cache), 0)
+
+        payload = self.handler.payload("test/people/all/sample/2/name")
+        self.assertEqual(sorted(json.loads(payload.body)), ["Alice", "Bob"])
+        self.assertEqual(len(self.handler.payload_cache), 0)
+
+    def test_samples_of_binary_fields_are_rejected(self):
+        # A list of images has no payload, the server answers 404 instead of failing
+        with self.assertRaises(ValueError):
+            self.handler.payload("test/people/all/sample/1/photo")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,445 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+import yaml
+from PIL import Image
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+from lambdawaker.dataset.DiskProvider import DiskProvider
+
+
+CACHE_BYTES = 1024 * 1024
+
+
+class CountingProvider(DiskProvider):
+    def __init__(self):
+        super().__init__()
+        self.list_calls = 0
+        self.served = []
+        self.replaced = []
+
+    def replace(self, content, relative_path: str):
+        self.replaced.append(relative_path)
+        super().replace(content, relative_path)
+
+    def list(self, relative_path: str = "."):
+        self.list_calls += 1
+        return super().list(relative_path)
+
+    def list_files(self, relative_path: str = "."):
+        self.list_calls += 1
+        return super().list_files(relative_path)
+
+    def serve(self, relative_path: str) -> bytes:
+        self.served.append(relative_path)
+        return super().serve(relative_path)
+
+
+def touch_forward(path: Path):
+    # Make a change visible even on filesystems with coarse mtime resolution
+    stats = os.stat(path)
+    os.utime(path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000_000))
+
+
+class PeopleDatasetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        manifest = {
+            "id": "test/people",
+            "fields": [
+                {"name": "name", "source": "name", "type": "str"},
+                {"name": "age", "source": "age", "type": "int"},
+            ]
+        }
+        (self.root / "manifest.yaml").write_text(yaml.dump(manifest))
+
+        with DiskDataset(str(self.root)) as dataset:
+            dataset.insert("a", {"name": "Alice", "age": 30})
+            dataset.insert("b", {"name": "Bob", "age": 40})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class TestDiskDatasetFileIndex(PeopleDatasetTestCase):
+    def test_index_is_persisted_next_to_manifest(self):
+        index = json.loads((self.root / "manifest.index.json").read_text())
+        self.assertEqual(index["ids"], ["a", "b"])
+        self.assertEqual(index["files"]["b"], {"name": "name/b.txt", "age": "age/b.txt"})
+
+    def test_lookups_do_not_list_folders(self):
+        provider = CountingProvider()
+        dataset = DiskDataset(str(self.root), provider=provider)
+
+        self.assertEqual(provider.list_calls, 0)
+        self.assertEqual(dataset.record_by_name("b").name, "Bob")
+        self.assertEqual(dataset["all/0/age"], 30)
+        self.assertEqual(provider.list_calls, 0)
+
+    def test_external_changes_rebuild_the_index(self):
+        (self.root / "name" / "c.txt").write_text("Carol")
+        (self.root / "age" / "c.txt").write_text("50")
+        touch_forward(self.root / "name")
+
+        provider = CountingProvider()
+        dataset = DiskDataset(str(self.root), provider=provider)
+
+        self.assertGreater(provider.list_calls, 0)
+        self.assertEqual(sorted(dataset.record_ids), ["a", "b", "c"])
+        self.assertEqual(dataset.record_by_name("c").age, 50)
+
+    def test_rebuild_matches_filename_pattern(self):
+        manifest = yaml.safe_load((self.root / "manifest.yaml").read_text())
+        manifest["filename_pattern"] = "person_{id}"
+        (self.root / "manifest.yaml").write_text(yaml.dump(manifest))
+        for folder, value in (("name", "Carol"), ("age", "50")):
+            (self.root / folder / "person_c.txt").write_text(value)
+        (self.root / "name" / "notes.txt").write_text("not a record")
+        (self.root / "name" / "person_dir").mkdir()
+
+        dataset = DiskDataset(str(self.root))
+
+        self.assertEqual(dataset.record_ids, ["c"])
+        self.assertEqual(dataset.file_index["c"], {"name": "name/person_c.txt", "age": "age/person_c.txt"})
+
+    def test_read_only_datasets_do_not_write_the_index(self):
+        (self.root / "manifest.index.json").unlink()
+
+        dataset = DiskDataset(str(self.root), read_only=True)
+
+        self.assertEqual(sorted(dataset.record_ids), ["a", "b"])
+        self.assertFalse((self.root / "manifest.index.json").exists())
+
+    def test_inserts_persist_the_index_on_flush(self):
+        provider = CountingProvider()
+        dataset = DiskDataset(str(self.root), provider=provider)
+        for i in range(50):
+            dataset.insert(f"p{i}", {"name": f"P{i}", "age": i})
+        dataset.delete("a")
+        self.assertEqual(provider.replaced, [])
+
+        # An index that was not flushed is stale, the next load rebuilds it from the folders
+        self.assertEqual(len(DiskDataset(str(self.root), read_only=True)), 51)
+
+        dataset.flush()
+        dataset.flush()
+        self.assertEqual(provider.replaced, ["manifest.index.json"])
+        reloaded = DiskDataset(str(self.root), provider=CountingProvider())
+        self.assertEqual(reloaded.record_ids, dataset.record_ids)
+        self.assertEqual(reloaded.provider.list_calls, 0)
+
+    def test_id_set_is_kept_across_inserts(self):
+        dataset = DiskDataset(str(self.root))
+        dataset.insert("c", {"name": "Carol"})
+        known_ids = dataset._known_ids()
+
+        dataset.insert("c", {"age": 50})
+        dataset.insert("d", {"name": "Dan"})
+        dataset.delete("a")
+        dataset.delete("missing")
+        dataset.insert("a", {"name": "Alice"})
+
+        self.assertIs(dataset._known_ids(), known_ids)
+        self.assertEqual(dataset.record_ids, ["b", "c", "d", "a"])
+        self.assertEqual(known_ids, {"a", "b", "c", "d"})
+
+    def test_insert_and_delete_update_the_index(self):
+        with DiskDataset(str(self.root)) as dataset:
+            dataset.insert("c", {"name": "Carol", "age": 50})
+            dataset.delete("a")
+
+        reloaded = DiskDataset(str(self.root), provider=CountingProvider())
+        self.assertEqual(reloaded.record_ids, ["b", "c"])
+        self.assertEqual(reloaded.record_by_name("c").name, "Carol")
+        with self.assertRaises(FileNotFoundError):
+            reloaded.record_by_name("a")
+
+
+class TestBulkInsert(PeopleDatasetTestCase):
+    def test_insert_many_writes_records_and_index(self):
+        dataset = DiskDataset(str(self.root))
+        dataset.insert_many({f"p{i}": {"name": f"Person {i}", "age": i} for i in range(20)}, max_workers=4)
+
+        reloaded = DiskDataset(str(self.root), provider=CountingProvider())
+        self.assertEqual(reloaded.record_ids, ["a", "b"] + [f"p{i}" for i in range(20)])
+        self.assertEqual(reloaded.record_by_name("p7").age, 7)
+        self.assertEqual([p.name for p in self.root.iterdir() if p.name.endswith(".tmp")], [])
+
+    def test_bulk_writer_commits_the_index_on_exit(self):
+        dataset = DiskDataset(str(self.root))
+        with dataset.bulk_writer(batch_size=3) as writer:
+            for i in range(7):
+                writer.insert(f"p{i}", {"name": f"Person {i}", "age": i})
+            writer.insert("a", {"age": 31})
+
+            index = json.loads((self.root / "manifest.index.json").read_text())
+            self.assertNotIn("p0", index["ids"])
+
+        self.assertEqual(writer.count, 8)
+        reloaded = DiskDataset(str(self.root), provider=CountingProvider())
+        self.assertEqual(len(reloaded.record_ids), 9)
+        self.assertEqual(reloaded.record_by_name("a").age, 31)
+        self.assertEqual(reloaded.record_by_name("p6").name, "Person 6")
+
+
+class TestIterRecords(PeopleDatasetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dataset = DiskDataset(str(self.root))
+        self.dataset.insert_many({f"p{i:02d}": {"name": f"Person {i}", "age": i} for i in range(30)})
+
+    def test_records_are_yielded_in_order_with_fields_loaded(self):
+        records = list(self.dataset.iter_records(num_workers=3, prefetch=1))
+
+        self.assertEqual([record.id for record in records], self.dataset.record_ids)
+        self.assertTrue(all(record.is_loaded("age") for record in records))
+        self.assertEqual(records[-1].age, 29)
+
+    def test_projection_batches_and_seeded_shuffle(self):
+        batches = list(self.dataset.iter_records(fields=["age"], batch_size=8, shuffle=True, seed=7))
+        again = list(self.dataset.iter_records(fields=["age"], batch_size=8, shuffle=True, seed=7, num_workers=0))
+
+        self.assertEqual([len(batch) for batch in batches], [8, 8, 8, 8])
+        ids = [record.id for batch in batches for record in batch]
+        self.assertEqual(ids, [record.id for batch in again for record in batch])
+        self.assertNotEqual(ids, self.dataset.record_ids)
+        self.assertEqual(sorted(ids), sorted(self.dataset.record_ids))
+        self.assertNotIn("name", batches[0][0])
+
+        with self.assertRaises(KeyError):
+            next(self.dataset.iter_records(fields=["height"]))
+
+
+class TestSampling(PeopleDatasetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dataset = DiskDataset(str(self.root))
+
+    def test_index_past_the_end_raises(self):
+        with self.assertRaises(IndexError):
+            self.dataset[2]
+        self.assertEqual(self.dataset[-1].name, "Bob")
+
+    def test_sample_draws_distinct_lazy_records(self):
+        self.dataset.insert_many({f"p{i}": {"name": f"Person {i}", "age": i} for i in range(20)})
+
+        records = self.dataset.sample(10, seed=3)
+        self.assertEqual(len({record.id for record in records}), 10)
+        self.assertFalse(records[0].is_loaded("name"))
+        self.assertEqual(self.dataset.sample_ids(10, seed=3), [record.id for record in records])
+
+        with self.assertRaises(ValueError):
+            self.dataset.sample_ids(30)
+        self.assertEqual(len(self.dataset.sample_ids(30, replace=True)), 30)
+
+    def test_weighted_sampling(self):
+        ids = self.dataset.sample_ids(5, weights=[0, 1], replace=True, seed=1)
+        self.assertEqual(ids, ["b"] * 5)
+
+    def test_template_paths(self):
+        self.assertIn(self.dataset["all/random/name"], {"Alice", "Bob"})
+        self.assertEqual(sorted(self.dataset["all/sample/2/age"]), [30, 40])
+
+
+class TestLazyRecord(PeopleDatasetTestCase):
+    def test_fields_are_loaded_on_first_access(self):
+        provider = CountingProvider()
+        dataset = DiskDataset(str(self.root), provider=provider)
+        provider.served.clear()
+
+        record = dataset.record_by_name("a")
+        self.assertEqual(provider.served, [])
+        self.assertEqual(set(record.keys()), {"id", "name", "age"})
+        self.assertIn("age", record)
+        self.assertFalse(record.is_loaded("age"))
+
+        self.assertEqual(record.name, "Alice")
+        self.assertEqual(record["name"], "Alice")
+        self.assertEqual(provider.served, ["name/a.txt"])
+        self.assertFalse(record.is_loaded("age"))
+
+    def test_unknown_fields_and_records(self):
+        dataset = DiskDataset(str(self.root))
+        record = dataset.record_by_name("a")
+
+        with self.assertRaises(AttributeError):
+            record.missing
+        with self.assertRaises(KeyError):
+            record["missing"]
+        with self.assertRaises(FileNotFoundError):
+            dataset.record_by_name("zzz")
+
+    def test_failed_loads_are_retried(self):
+        dataset = DiskDataset(str(self.root))
+        record = dataset.record_by_name("a")
+        age_file = self.root / "age" / "a.txt"
+        age_file.rename(self.root / "age" / "a.bak")
+
+        for _ in range(2):
+            with self.assertRaises(FileNotFoundError):
+                record.age
+
+        (self.root / "age" / "a.bak").rename(age_file)
+        self.assertEqual(record["age"], 30)
+        self.assertEqual(record.keys(), ["id", "age", "name"])
+
+
+class TestFieldCache(PeopleDatasetTestCase):
+    def test_decoded_fields_are_cached_across_records(self):
+        provider = CountingProvider()
+        dataset = DiskDataset(str(self.root), provider=provider, field_cache_bytes=CACHE_BYTES)
+        provider.served.clear()
+
+        self.assertEqual(dataset.record_by_name("a").name, "Alice")
+        self.assertEqual(dataset.record_by_name("a").name, "Alice")
+        self.assertEqual(dataset["all/0/name"], "Alice")
+
+        self.assertEqual(provider.served, ["name/a.txt"])
+        stats = dataset.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+
+    def test_insert_and_delete_invalidate_cached_fields(self):
+        dataset = DiskDataset(str(self.root), field_cache_bytes=CACHE_BYTES)
+        self.assertEqual(dataset.record_by_name("a").age, 30)
+
+        dataset.insert("a", {"age": 31})
+        self.assertEqual(dataset.record_by_name("a").age, 31)
+
+        dataset.delete("a")
+        self.assertNotIn(("a", "age"), dataset.field_cache)
+
+    def test_cache_is_disabled_by_default(self):
+        provider = CountingProvider()
+        dataset = DiskDataset(str(self.root), provider=provider)
+        provider.served.clear()
+
+        dataset.record_by_name("b").name
+        dataset.record_by_name("b").name
+        self.assertEqual(len(provider.served), 2)
+        self.assertEqual(dataset.cache_stats(), {})
+
+    def test_cached_images_are_not_shared(self):
+        manifest = yaml.safe_load((self.root / "manifest.yaml").read_text())
+        manifest["fields"].append({"name": "photo", "source": "photo", "type": "PilImage"})
+        (self.root / "manifest.yaml").write_text(yaml.dump(manifest))
+
+        dataset = DiskDataset(str(self.root), field_cache_bytes=CACHE_BYTES)
+        dataset.insert("a", {"photo": Image.new("RGB", (40, 30), (255, 0, 0))})
+
+        dataset.record_by_name("a").photo.thumbnail((10, 10))
+        dataset.record_by_name("a").photo.thumbnail((10, 10))
+        self.assertEqual(dataset.record_by_name("a").photo.size, (40, 30))
+
+
+class TestColumnFields(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        manifest = {
+            "id": "test/columns",
+            "fields": [
+                {"name": "name", "source": "name", "type": "str", "storage": "column"},
+                {"name": "age", "source": "age", "type": "int", "storage": "column"},
+                {"name": "bio", "source": "bio", "type": "str"},
+            ]
+        }
+        (self.root / "manifest.yaml").write_text(yaml.dump(manifest))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_columns_are_stored_in_one_file(self):
+        dataset = DiskDataset(str(self.root))
+        dataset.insert_many([
+            ("a", {"name": "Alice", "age": 30, "bio": "Likes tea"}),
+            ("b", {"name": "Bob", "bio": "Likes coffee"}),
+            ("c", {"name": "Carol", "age": 50}),
+        ])
+
+        self.assertTrue((self.root / "manifest.columns.npz").exists())
+        self.assertFalse((self.root / "age").exists())
+
+        reloaded = DiskDataset(str(self.root), provider=CountingProvider())
+        self.assertEqual(reloaded.record_ids, ["a", "b", "c"])
+        self.assertEqual(reloaded.record_by_name("c").name, "Carol")
+        self.assertIsNone(reloaded.record_by_name("b").age)
+        self.assertEqual(reloaded.record_by_name("b").bio, "Likes coffee")
+
+        ages = reloaded.column("age")
+        self.assertEqual(ages.mask.tolist(), [False, True, False])
+        self.assertEqual(np.asarray(reloaded.record_ids)[(ages > 40).filled(False)].tolist(), ["c"])
+
+    def test_stratified_sampling(self):
+        dataset = DiskDataset(str(self.root))
+        dataset.insert_many({f"p{i}": {"name": "Even" if i % 2 == 0 else "Odd", "age": i} for i in range(10)})
+
+        ids = dataset.sample_ids(2, by="name", seed=5)
+        names = sorted(dataset.record_by_name(record_id).name for record_id in ids)
+        self.assertEqual(names, ["Even", "Even", "Odd", "Odd"])
+
+    def test_none_unsets_a_column_value(self):
+        with DiskDataset(str(self.root)) as dataset:
+            dataset.insert("a", {"name": "Alice", "age": None})
+            dataset.insert("b", {"name": "Bob", "age": 40})
+            dataset.insert("b", {"age": None})
+            with self.assertRaises(ValueError):
+                dataset.insert("c", {"age": "old", "bio": "Likes tea"})
+
+        self.assertFalse((self.root / "bio").exists())
+        reloaded = DiskDataset(str(self.root))
+        self.assertEqual(reloaded.record_ids, ["a", "b"])
+        self.assertIsNone(reloaded.record_by_name("a").age)
+        self.assertEqual(reloaded.column("age").mask.tolist(), [True, True])
+
+    def test_single_inserts_grow_the_columns(self):
+        with DiskDataset(str(self.root)) as dataset:
+            for i in range(100):
+                dataset.insert(f"p{i}", {"name": f"P{i}", "age": i})
+            dataset.delete("p0")
+            dataset.insert("p100", {"age": 100})
+
+        reloaded = DiskDataset(str(self.root))
+        self.assertEqual(reloaded.column("age").tolist(), list(range(1, 101)))
+        self.assertEqual(reloaded.column("name").tolist()[-2:], ["P99", None])
+
+    def test_delete_removes_the_row(self):
+        dataset = DiskDataset(str(self.root))
+        dataset.insert_many([("a", {"name": "Alice", "age": 30}), ("b", {"name": "Bob", "age": 40})])
+        dataset.delete("a")
+        dataset.flush()
+
+        reloaded = DiskDataset(str(self.root))
+        self.assertEqual(reloaded.record_ids, ["b"])
+        self.assertEqual(reloaded.column("name").tolist(), ["Bob"])
+        with self.assertRaises(FileNotFoundError):
+            reloaded.record_by_name("a")
+
+
+class TestNumpyMmapField(unittest.TestCase):
+    def test_arrays_are_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            manifest = {"id": "test/arrays", "fields": [{"name": "grid", "source": "grid", "type": "numpy_mmap"}]}
+            (root / "manifest.yaml").write_text(yaml.dump(manifest))
+
+            array = np.arange(12, dtype=np.float32).reshape(3, 4)
+            dataset = DiskDataset(str(root))
+            dataset.insert("a", {"grid": array})
+
+            grid = DiskDataset(str(root)).record_by_name("a").grid
+            self.assertIsInstance(grid, np.memmap)
+            self.assertFalse(grid.flags.writeable)
+            np.testing.assert_array_equal(grid[1], array[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
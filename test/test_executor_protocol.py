@@ -0,0 +1,44 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from lambdawaker.executor.engine import ProtocolHandler
+from lambdawaker.executor.models import WorkerState, TaskStatus
+
+
+class TestProtocolHandler(unittest.TestCase):
+    def setUp(self):
+        self.state = WorkerState(worker_id=0, name="Worker-1", total=10)
+
+    def test_progress_status_message(self):
+        self.assertTrue(ProtocolHandler.parse_line("PROGRESS: 4", self.state, None))
+        self.assertTrue(ProtocolHandler.parse_line("STATUS: running", self.state, None))
+        self.assertTrue(ProtocolHandler.parse_line("MESSAGE: hello", self.state, None))
+
+        self.assertEqual(self.state.completed, 4)
+        self.assertEqual(self.state.status, TaskStatus.RUNNING)
+        self.assertEqual(self.state.message, "hello")
+
+    def test_stats_are_merged(self):
+        self.assertTrue(ProtocolHandler.parse_line("STATS: recycles=2 crashes=0", self.state, None))
+        self.assertTrue(ProtocolHandler.parse_line("STATS: crashes=1 rss_mb=512.5", self.state, None))
+
+        self.assertEqual(self.state.stats, {"recycles": 2, "crashes": 1, "rss_mb": 512.5})
+
+    def test_malformed_stats_are_logged(self):
+        log = []
+
+        class Log:
+            def write(self, line):
+                log.append(line)
+
+        self.assertFalse(ProtocolHandler.parse_line("STATS: recycles", self.state, Log()))
+        self.assertEqual(self.state.stats, {})
+        self.assertEqual(log, ["STATS: recycles\n"])
+
+
+if __name__ == "__main__":
+    unittest.main()
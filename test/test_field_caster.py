@@ -0,0 +1,78 @@
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+from PIL import Image
+
+from lambdawaker.dataset.FieldCaster import FieldCaster
+from lambdawaker.dataset.LazyImage import LazyImage, cv2, decode_image_array
+from lambdawaker.dataset.hadlers.process_data_payload import process_data_payload
+
+
+def encode(image: Image.Image, image_format: str) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format=image_format)
+    return buf.getvalue()
+
+
+class TestFieldCasterRegistry(unittest.TestCase):
+    def test_builtin_types_round_trip(self):
+        for field_type, value in [("int", 3), ("float", 2.5), ("str", "hi"), ("json", {"a": [1]})]:
+            raw = FieldCaster.serialize(value, field_type)
+            self.assertEqual(FieldCaster.cast(raw, field_type), value)
+
+        self.assertEqual(FieldCaster.extension("PilImage"), ".png")
+        self.assertEqual(FieldCaster.cast(b"raw", "unknown"), b"raw")
+
+    def test_custom_types_can_be_registered(self):
+        FieldCaster.register("csvRow", lambda raw: raw.decode().split(","),
+                             lambda row: ",".join(row).encode(), ".csv")
+        self.addCleanup(FieldCaster._casters.pop, "csvRow")
+        self.addCleanup(FieldCaster._serializers.pop, "csvRow")
+        self.addCleanup(FieldCaster._extensions.pop, "csvRow")
+
+        raw = FieldCaster.serialize(["a", "b"], "csvRow")
+        self.assertEqual(FieldCaster.cast(raw, "csvRow"), ["a", "b"])
+        self.assertEqual(FieldCaster.extension("csvRow"), ".csv")
+
+    def test_np_image_round_trip(self):
+        array = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+        raw = FieldCaster.serialize(array, "npImage")
+        np.testing.assert_array_equal(FieldCaster.cast(raw, "npImage"), array)
+
+    @unittest.skipUnless(cv2 is not None, "OpenCV is not installed")
+    def test_np_image_decoding_matches_pil(self):
+        rgb = Image.fromarray(np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3))
+        images = [rgb, rgb.convert("RGBA"), rgb.convert("L"), rgb.convert("LA"), rgb.convert("P"),
+                  Image.fromarray(np.arange(24, dtype=np.uint16).reshape(4, 6) * 1000)]
+
+        for image in images:
+            raw = encode(image, "PNG")
+            with self.subTest(mode=image.mode):
+                np.testing.assert_array_equal(decode_image_array(raw), np.array(Image.open(io.BytesIO(raw))))
+
+
+class TestLazyImage(unittest.TestCase):
+    def test_header_is_read_without_decoding(self):
+        raw = encode(Image.new("RGBA", (40, 30), (255, 0, 0, 128)), "PNG")
+        image = FieldCaster.cast(raw, "LazyImage")
+
+        self.assertIsInstance(image, LazyImage)
+        self.assertEqual((image.size, image.mode, image.format), ((40, 30), "RGBA", "PNG"))
+        self.assertEqual(process_data_payload(image), ("image/png", raw))
+        self.assertEqual(np.asarray(image).shape, (30, 40, 4))
+
+    def test_jpeg_draft_decoding_fits_max_size(self):
+        raw = encode(Image.new("RGB", (800, 600), (0, 128, 255)), "JPEG")
+        image = LazyImage(raw).to_pil(max_size=(100, 100))
+
+        self.assertLessEqual(max(image.size), 100)
+        self.assertEqual(image.mode, "RGB")
+
+
+if __name__ == "__main__":
+    unittest.main()
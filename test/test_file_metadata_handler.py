@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from fastapi import HTTPException
+
+from lambdawaker.template.server.FileMetadataHandler import FileMetadataHandler
+
+
+class TestFileMetadataHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "id_cards").mkdir()
+        for name in ["b", "a", "_shared"]:
+            (self.root / "id_cards" / name).mkdir()
+        (self.root / "id_cards" / "style.css").write_text("body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lists_directory_sorted(self):
+        handler = FileMetadataHandler(self.root)
+        listing = handler("id_cards/")
+
+        self.assertEqual([item["name"] for item in listing], ["_shared", "a", "b", "style.css"])
+        css = listing[-1]
+        self.assertEqual(css["path"], os.path.join("id_cards", "style.css"))
+        self.assertEqual(css["mimetype"], "text/css")
+        self.assertEqual(css["extension"], ".css")
+        self.assertFalse(css["is_dir"])
+        self.assertEqual(listing[0]["mimetype"], "inode/directory")
+
+    def test_file_metadata(self):
+        handler = FileMetadataHandler(self.root)
+        metadata = handler("id_cards/style.css")
+        self.assertEqual(metadata["size"], 7)
+
+    def test_pagination(self):
+        handler = FileMetadataHandler(self.root)
+        page, total = handler.page("id_cards", offset=1, limit=2)
+
+        self.assertEqual(total, 4)
+        self.assertEqual([item["name"] for item in page], ["a", "b"])
+
+    def test_listing_refreshes_when_directory_changes(self):
+        handler = FileMetadataHandler(self.root)
+        target = self.root / "id_cards"
+        self.assertEqual(len(handler("id_cards")), 4)
+
+        (target / "c").mkdir()
+        # Make the change visible even on filesystems with coarse mtime resolution
+        stats = os.stat(target)
+        os.utime(target, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(len(handler("id_cards")), 5)
+
+    def test_listing_is_kept_without_mtime_check(self):
+        handler = FileMetadataHandler(self.root, check_mtime=False)
+        self.assertEqual(len(handler("id_cards")), 4)
+
+        (self.root / "id_cards" / "c").mkdir()
+        self.assertEqual(len(handler("id_cards")), 4)
+
+        handler.clear()
+        self.assertEqual(len(handler("id_cards")), 5)
+
+    def test_rejects_paths_outside_root(self):
+        handler = FileMetadataHandler(self.root / "id_cards")
+        with self.assertRaises(HTTPException) as context:
+            handler("../")
+        self.assertEqual(context.exception.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+HAS_DATASETS = importlib.util.find_spec("datasets") is not None
+
+
+@unittest.skipUnless(HAS_DATASETS, "datasets is not installed")
+class TestHfDatasetSource(unittest.TestCase):
+    def setUp(self):
+        from datasets import Dataset, DatasetDict
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "people")
+        DatasetDict({
+            "train": Dataset.from_dict({"name": ["Alice", "Bob", "Carol"], "age": [30, 40, 50]}),
+            "test": Dataset.from_dict({"name": ["Dan"], "age": [60]}),
+        }).save_to_disk(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def source(self, **kwargs):
+        from lambdawaker.dataset.hadlers.HfDatasetSource import HfDatasetSource
+        return HfDatasetSource("test/people", local_path=self.path, **kwargs)
+
+    def test_fields_are_read_from_a_saved_dataset(self):
+        source = self.source()
+
+        self.assertEqual(source["train/len"], 3)
+        self.assertEqual(source["train/1/name"], "Bob")
+        self.assertEqual(source["test/0"], {"name": "Dan", "age": 60})
+        self.assertIn(source["train/random/age"], [30, 40, 50])
+        self.assertEqual(sorted(source["train/sample/3/name"]), ["Alice", "Bob", "Carol"])
+        with self.assertRaises(ValueError):
+            source["train/unknown"]
+
+    def test_splits_load_lazily_and_fields_read_one_column(self):
+        source = self.source()
+        self.assertEqual(source._splits, {})
+
+        source["train/0/age"]
+        self.assertEqual(list(source._splits), ["train"])
+        self.assertEqual(source.column("train", "age").column_names, ["age"])
+        self.assertEqual(sorted(source.dataset.keys()), ["test", "train"])
+
+    def test_offline_sources_only_use_local_files(self):
+        from lambdawaker.dataset.hadlers import HfDatasetSource as module
+
+        source = module.HfDatasetSource("test/people", offline=True, cache_dir=self.tmp.name)
+        with mock.patch.object(module, "load_dataset") as load_dataset:
+            source.split("train")
+
+        kwargs = load_dataset.call_args.kwargs
+        self.assertEqual(kwargs["split"], "train")
+        self.assertTrue(kwargs["download_config"].local_files_only)
+        self.assertEqual(kwargs["cache_dir"], self.tmp.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from PIL import Image
+
+from lambdawaker.dataset.ImageSequence import ImageSequence
+
+
+class TestImageSequence(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for i in range(5):
+            Image.new("RGB", (64, 48), (i * 40, 0, 0)).save(self.root / f"frame_{i}.png")
+        Image.new("RGB", (800, 600), (0, 0, 255)).save(self.root / "photo.jpg")
+        (self.root / "notes.txt").write_text("not an image")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_files_are_listed_in_order(self):
+        sequence = ImageSequence(str(self.root))
+        self.assertEqual(len(sequence), 6)
+        self.assertEqual(sequence[0].getpixel((0, 0)), (0, 0, 0))
+
+    def test_frames_are_cached_and_prefetched(self):
+        sequence = ImageSequence(str(self.root), cache_bytes=10_000_000, prefetch=2)
+        self.addCleanup(sequence.close)
+
+        first = sequence[0]
+        self.assertIs(sequence[0], first)
+        # close() cancels queued prefetches, wait for them to finish first
+        for future in list(sequence._pending.values()):
+            future.result()
+        self.assertIn((1, None), sequence.cache)
+        self.assertIn((2, None), sequence.cache)
+        self.assertNotIn((3, None), sequence.cache)
+
+    def test_reduced_size_decoding(self):
+        sequence = ImageSequence(str(self.root))
+        photo = sequence.get(-1, max_size=(100, 100))
+        self.assertEqual(photo.size, (100, 75))
+
+        frames = sequence.get_many([0, 1, 2], max_size=(32, 32))
+        sequence.close()
+        self.assertEqual(frames.shape, (3, 24, 32, 3))
+        self.assertEqual(frames[2, 0, 0].tolist(), [80, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from lambdawaker.template.server.JsonFileCache import JsonFileCache
+
+
+class TestJsonFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "common.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data, mtime):
+        with open(self.path, "w") as f:
+            json.dump(data, f)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_missing_file_returns_default(self):
+        cache = JsonFileCache()
+        self.assertEqual(cache.get(self.path, {}), {})
+
+    def test_reloads_on_mtime_change(self):
+        cache = JsonFileCache(check_mtime=True)
+        self.write({"title": "a"}, mtime=1000)
+        self.assertEqual(cache.get(self.path), {"title": "a"})
+
+        self.write({"title": "b"}, mtime=2000)
+        self.assertEqual(cache.get(self.path), {"title": "b"})
+
+    def test_no_reload_without_mtime_check(self):
+        cache = JsonFileCache(check_mtime=False)
+        self.write({"title": "a"}, mtime=1000)
+        self.assertEqual(cache.get(self.path), {"title": "a"})
+
+        self.write({"title": "b"}, mtime=2000)
+        self.assertEqual(cache.get(self.path), {"title": "a"})
+
+        cache.clear()
+        self.assertEqual(cache.get(self.path), {"title": "b"})
+
+
+if __name__ == "__main__":
+    unittest.main()
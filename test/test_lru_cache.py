@@ -0,0 +1,56 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+
+from lambdawaker.dataset.LRUCache import LRUCache, approximate_size
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = LRUCache(max_bytes=10)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        self.assertEqual(cache.get("a"), b"aaaa")  # "b" is now the oldest
+
+        cache.put("c", b"cccc")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.current_bytes, 8)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_evicts_by_item_count(self):
+        cache = LRUCache(max_items=2)
+        for key in "abc":
+            cache.put(key, key)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+
+    def test_oversized_values_are_not_stored(self):
+        cache = LRUCache(max_bytes=3)
+        cache.put("big", b"too large")
+        self.assertNotIn("big", cache)
+
+    def test_replacing_a_key_updates_size(self):
+        cache = LRUCache(max_bytes=100)
+        cache.put("a", b"12345")
+        cache.put("a", b"12")
+        self.assertEqual(cache.current_bytes, 2)
+
+    def test_hit_rate(self):
+        cache = LRUCache()
+        cache.put("a", 1, size=1)
+        cache.get("a")
+        cache.get("missing")
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_approximate_size_of_arrays(self):
+        self.assertEqual(approximate_size(np.zeros((10, 10), dtype=np.uint8)), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
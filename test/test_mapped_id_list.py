@@ -0,0 +1,91 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import yaml
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+from lambdawaker.dataset.MappedIdList import MappedIdList
+
+
+class TestMappedIdList(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        path = str(self.root / "ids")
+        MappedIdList.write(path, ["a", "ñandú", "", "record-42"])
+
+        ids = MappedIdList(path)
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(list(ids), ["a", "ñandú", "", "record-42"])
+        self.assertEqual(ids[-1], "record-42")
+        self.assertEqual(ids[1:3], ["ñandú", ""])
+        with self.assertRaises(IndexError):
+            ids[4]
+
+    def test_rejects_other_files(self):
+        path = self.root / "not_ids"
+        path.write_bytes(b"\x00" * 32)
+        with self.assertRaises(ValueError):
+            MappedIdList(str(path))
+
+    def test_dataset_uses_shared_index(self):
+        dataset_root = self.root / "ds"
+        dataset_root.mkdir()
+        manifest = {"id": "test/ids", "fields": [{"name": "name", "source": "name", "type": "str"}]}
+        (dataset_root / "manifest.yaml").write_text(yaml.dump(manifest))
+
+        dataset = DiskDataset(str(dataset_root))
+        for name in ["b", "a", "c"]:
+            dataset.insert(name, {"name": name.upper()})
+
+        index_path = str(self.root / "ds.ids")
+        dataset.write_id_index(index_path)
+
+        shared = DiskDataset(str(dataset_root), read_only=True, id_index_path=index_path)
+        self.assertIsInstance(shared.record_ids, MappedIdList)
+        self.assertEqual(list(shared.record_ids), dataset.record_ids)
+        self.assertEqual(shared["all/1/name"], dataset["all/1/name"])
+        # Files are resolved on demand, the file index is never loaded
+        self.assertEqual(shared.file_index, {})
+        with self.assertRaises(FileNotFoundError):
+            shared.record_by_name("missing")
+
+    def test_shared_index_resolves_files_by_pattern(self):
+        dataset_root = self.root / "ds"
+        (dataset_root / "name").mkdir(parents=True)
+        (dataset_root / "photo").mkdir()
+        manifest = {"id": "test/ids", "filename_pattern": "rec_{id}", "fields": [
+            {"name": "name", "source": "name", "type": "str"},
+            {"name": "photo", "source": "photo", "type": "bytes"},
+        ]}
+        (dataset_root / "manifest.yaml").write_text(yaml.dump(manifest))
+        (dataset_root / "name" / "rec_a.txt").write_text("A")
+        (dataset_root / "photo" / "rec_a.jpeg").write_bytes(b"\xff\xd8")
+
+        index_path = str(self.root / "ds.ids")
+        MappedIdList.write(index_path, ["a"])
+
+        shared = DiskDataset(str(dataset_root), id_index_path=index_path)
+        self.assertEqual(shared["all/0/name"], "A")
+        self.assertEqual(shared["all/0/photo"], b"\xff\xd8")
+
+        # Changing the dataset builds the full file index first
+        shared.insert("b", {"name": "B"})
+        shared.flush()
+        self.assertEqual(sorted(shared.file_index), ["a", "b"])
+        self.assertEqual(shared.record_ids, ["a", "b"])
+        self.assertEqual(DiskDataset(str(dataset_root))["all/1/name"], "B")
+
+
+if __name__ == "__main__":
+    unittest.main()
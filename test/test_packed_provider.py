@@ -0,0 +1,117 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import yaml
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+from lambdawaker.dataset.PackedProvider import PackedProvider
+
+
+class TestPackedProvider(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.provider = PackedProvider()
+        self.provider.pointTo(self.tmp.name)
+
+    def tearDown(self):
+        self.provider.close()
+        self.tmp.cleanup()
+
+    def test_store_and_serve(self):
+        self.provider.store("hello", "name/a.txt")
+        self.provider.store(b"\x00\x01", "img/a.png")
+        self.provider.store("bye", "name/a.txt")
+
+        self.assertEqual(self.provider.serve("name/a.txt"), b"bye")
+        self.assertEqual(self.provider.serve("./img/../img/a.png"), b"\x00\x01")
+        with self.assertRaises(FileNotFoundError):
+            self.provider.serve("name/b.txt")
+        with self.assertRaises(PermissionError):
+            self.provider.serve("../outside.txt")
+
+    def test_folders(self):
+        self.provider.store("a", "name/a.txt")
+        self.provider.store("b", "name/b.txt")
+        self.provider.store("c", "deep/er/c.json")
+
+        self.assertEqual(sorted(self.provider.list("name")), ["name/a.txt", "name/b.txt"])
+        self.assertEqual(sorted(self.provider.list()), ["deep", "name"])
+        self.assertEqual(self.provider.count("name"), 2)
+        self.assertTrue(self.provider.exists("deep/er"))
+        self.assertEqual(self.provider.search("*.json"), ["deep/er/c.json"])
+        self.assertEqual(self.provider.search("*.txt", "deep"), [])
+
+        info = self.provider.info("name/a.txt")
+        self.assertEqual((info["size_bytes"], info["is_file"], info["extension"]), (1, True, ".txt"))
+        self.assertFalse(self.provider.info("name")["is_file"])
+
+        with self.assertRaises(OSError):
+            self.provider.delete("name")
+        self.provider.delete("name/a.txt")
+        self.provider.delete("name/b.txt")
+        self.provider.delete("name")
+        self.assertFalse(self.provider.exists("name"))
+
+    def test_compact_drops_garbage(self):
+        self.provider.store("x" * 100, "name/a.txt")
+        self.provider.store("y" * 10, "name/a.txt")
+        self.provider.store("z" * 5, "name/b.txt")
+        self.provider.delete("name/b.txt")
+        self.assertEqual(self.provider.garbage_bytes(), 105)
+
+        self.provider.compact()
+        self.assertEqual(self.provider.garbage_bytes(), 0)
+        self.assertEqual(self.provider.serve("name/a.txt"), b"y" * 10)
+
+        reopened = PackedProvider()
+        reopened.pointTo(self.tmp.name)
+        self.assertEqual(reopened.serve("name/a.txt"), b"y" * 10)
+        reopened.close()
+
+    def test_replace_keeps_rewrites_out_of_the_blob(self):
+        self.provider.store("x" * 100, "name/a.txt")
+        self.provider.replace("y" * 10, "name/a.txt")
+        for i in range(50):
+            self.provider.replace(str(i) * 100, "manifest.index.json")
+
+        self.assertEqual(self.provider.garbage_bytes(), 100)
+        self.assertEqual(self.provider.serve("name/a.txt"), b"y" * 10)
+        self.assertEqual(self.provider.info("manifest.index.json")["size_bytes"], 200)
+
+        self.provider.store("z", "name/a.txt")
+        self.provider.compact()
+        self.assertEqual(self.provider.serve("name/a.txt"), b"z")
+        self.assertEqual(self.provider.serve("manifest.index.json"), b"49" * 100)
+
+        self.provider.delete("manifest.index.json")
+        self.assertFalse(self.provider.exists("manifest.index.json"))
+
+    def test_disk_dataset_on_packed_provider(self):
+        manifest = {"id": "test/packed", "fields": [
+            {"name": "name", "source": "name", "type": "str"},
+            {"name": "age", "source": "age", "type": "int"},
+        ]}
+        self.provider.store(yaml.dump(manifest), "manifest.yaml")
+
+        dataset = DiskDataset(self.tmp.name, provider=self.provider)
+        dataset.insert("a", {"name": "Alice", "age": 30})
+        dataset.insert("b", {"name": "Bob", "age": 40})
+        # Only record files go to the blob, the rewritten index does not pile up there
+        self.assertEqual(self.provider.garbage_bytes(), 0)
+        dataset.delete("a")
+
+        provider = PackedProvider()
+        reloaded = DiskDataset(self.tmp.name, provider=provider)
+        self.assertEqual(reloaded.record_ids, ["b"])
+        self.assertEqual(reloaded["all/0/age"], 40)
+        self.assertIsNone(reloaded.raw_file("all/0/name"))
+        provider.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
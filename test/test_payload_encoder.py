@@ -0,0 +1,58 @@
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import numpy as np
+from PIL import Image
+
+from lambdawaker.dataset.hadlers.PayloadEncoder import PayloadEncoder, accepts
+
+
+class TestAccepts(unittest.TestCase):
+    def test_explicit_media_types_only(self):
+        self.assertTrue(accepts("image/avif,image/webp,image/apng,*/*;q=0.8", "image/webp"))
+        self.assertFalse(accepts("image/webp;q=0", "image/webp"))
+        self.assertFalse(accepts("*/*", "image/webp"))
+        self.assertFalse(accepts(None, "image/webp"))
+
+
+class TestPayloadEncoder(unittest.TestCase):
+    def test_format_follows_transparency_and_accept(self):
+        encoder = PayloadEncoder(webp=True)
+        opaque = Image.new("RGB", (8, 8), (10, 20, 30))
+        transparent = Image.new("RGBA", (8, 8), (10, 20, 30, 128))
+
+        self.assertEqual(encoder.encode(opaque)[0], "image/jpeg")
+        self.assertEqual(encoder.encode(transparent)[0], "image/png")
+        self.assertEqual(encoder.encode(Image.new("P", (8, 8)))[0], "image/png")
+
+        content_type, body = encoder.encode(transparent, accept="image/webp,*/*")
+        self.assertEqual(content_type, "image/webp")
+        self.assertEqual(Image.open(io.BytesIO(body)).format, "WEBP")
+
+        self.assertEqual(encoder.encode({"a": 1}), ("application/json", '{"a": 1}'))
+
+    def test_read_only_arrays_are_memoized_by_identity(self):
+        encoder = PayloadEncoder()
+        image = Image.new("RGBA", (8, 8), (255, 0, 0, 255))
+
+        # Images can be changed in place, they are never served from the memo
+        first = encoder.encode(image)[1]
+        image.paste((0, 0, 255, 255), (0, 0, 8, 8))
+        self.assertNotEqual(encoder.encode(image)[1], first)
+
+        array = np.zeros((4, 4, 3), dtype=np.uint8)
+        self.assertIsNot(encoder.encode(array)[1], encoder.encode(array)[1])
+        # A read-only view still changes with the writeable array it views
+        view = array[:2]
+        view.flags.writeable = False
+        self.assertIsNot(encoder.encode(view)[1], encoder.encode(view)[1])
+        array.flags.writeable = False
+        self.assertIs(encoder.encode(array)[1], encoder.encode(array)[1])
+        self.assertIsNot(encoder.encode(array.copy())[1], encoder.encode(array)[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import contextvars
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from lambdawaker.template.server.RequestProfiler import RequestProfiler, TimedProxy, instrument_tree, profile_stage
+
+
+class Words:
+    def word(self):
+        return "lorem"
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def run_isolated(self, func):
+        # Every request gets its own context, like the ASGI server does
+        return contextvars.copy_context().run(func)
+
+    def test_stages_outside_requests_are_ignored(self):
+        def handle():
+            with profile_stage("render"):
+                return "ok"
+
+        self.assertEqual(self.run_isolated(handle), "ok")
+
+    def test_stages_accumulate_per_request(self):
+        profiler = RequestProfiler()
+
+        def handle():
+            timings = profiler.begin()
+            with profile_stage("dataset"):
+                pass
+            with profile_stage("dataset"):
+                pass
+            with profile_stage("render"):
+                pass
+            return timings
+
+        timings = self.run_isolated(handle)
+        self.assertEqual(set(timings), {"dataset", "render"})
+
+        profiler.finish("GET /render", timings, total=0.01)
+        profiler.finish("GET /render", timings, total=0.03)
+        summary = profiler.summary()["GET /render"]
+        self.assertEqual(summary["total"]["count"], 2)
+        self.assertAlmostEqual(summary["total"]["p50_ms"], 20.0)
+        self.assertIn("dataset", summary)
+
+    def test_instrumented_generators_are_timed(self):
+        profiler = RequestProfiler()
+        tree = instrument_tree({"name": {"first": lambda: "Ana"}, "text": Words(), "size": 3}, "fields")
+        datasets = TimedProxy({"demo/set": "record"}, "dataset")
+
+        def handle():
+            timings = profiler.begin()
+            values = tree["name"]["first"](), tree["text"].word(), tree["size"], datasets["demo/set"]
+            return values, timings
+
+        values, timings = self.run_isolated(handle)
+        self.assertEqual(values, ("Ana", "lorem", 3, "record"))
+        self.assertEqual(set(timings), {"fields", "dataset"})
+
+    def test_sampled_calls_are_dumped(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            profiler = RequestProfiler(profile_dir=profile_dir, sample_rate=1.0)
+
+            def handle():
+                profiler.begin()
+                return profiler.call(sum, [1, 2, 3])
+
+            self.assertEqual(self.run_isolated(handle), 6)
+            self.assertEqual(len(list(Path(profile_dir).glob("*.prof"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import unittest
+from pathlib import Path
+
+# Add src to sys.path to import lambdawaker
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from lambdawaker.log.StageStats import StageStats, percentile
+from lambdawaker.template.benchmark.compare import compare_reports
+
+
+class TestStageStats(unittest.TestCase):
+    def test_percentile_interpolates(self):
+        values = [4, 1, 3, 2]
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(values, 100), 4)
+        self.assertAlmostEqual(percentile(values, 50), 2.5)
+
+    def test_summary_in_milliseconds(self):
+        stats = StageStats()
+        for seconds in (0.001, 0.002, 0.003):
+            stats.record("navigation", seconds)
+
+        summary = stats.summary()["navigation"]
+        self.assertEqual(summary["count"], 3)
+        self.assertAlmostEqual(summary["p50_ms"], 2.0)
+        self.assertAlmostEqual(summary["max_ms"], 3.0)
+
+    def test_window_keeps_recent_samples(self):
+        stats = StageStats(window=2)
+        for seconds in (1.0, 0.001, 0.001):
+            stats.record("render", seconds)
+
+        summary = stats.summary()["render"]
+        self.assertEqual(summary["count"], 3, "Total count includes samples that left the window")
+        self.assertAlmostEqual(summary["max_ms"], 1.0)
+
+    def test_stage_context_manager(self):
+        stats = StageStats()
+        with stats.stage("write"):
+            pass
+        self.assertEqual(stats.stages(), ["write"])
+
+
+class TestCompareReports(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {
+            "cards_per_second": 10.0,
+            "stages": {"screenshot": {"p50_ms": 20.0, "p90_ms": 30.0}},
+        }
+
+    def test_no_regression_within_threshold(self):
+        current = {
+            "cards_per_second": 9.5,
+            "stages": {"screenshot": {"p50_ms": 21.0, "p90_ms": 32.0}},
+        }
+        self.assertEqual(compare_reports(self.baseline, current, threshold=0.1), [])
+
+    def test_detects_latency_and_throughput_regressions(self):
+        current = {
+            "cards_per_second": 5.0,
+            "stages": {"screenshot": {"p50_ms": 40.0, "p90_ms": 30.0}},
+        }
+        regressions = compare_reports(self.baseline, current, threshold=0.1)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("throughput"))
+        self.assertTrue(regressions[1].startswith("screenshot.p50_ms"))
+
+
+if __name__ == "__main__":
+    unittest.main()
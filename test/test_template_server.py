@@ -0,0 +1,145 @@
+import asyncio
+import contextvars
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import yaml
+
+from fastapi.testclient import TestClient
+
+from lambdawaker.dataset.DiskDataset import DiskDataset
+from lambdawaker.template.server.TemplateServer import TemplateServer
+
+CARD_TEMPLATE = """<!doctype html>
+<html><head><style>#view-port { color: {{ env.theme.primary_color.to_rgb_hex() }}; }</style></head>
+<body><div id="view-port">{{ ds["test/people/all/" ~ data.id].name }} {{ common.title }}</div></body></html>
+"""
+
+
+class TemplateServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+
+        card = root / "site" / "id_cards" / "basic"
+        (card / "meta").mkdir(parents=True)
+        (card / "index.html.j2").write_text(CARD_TEMPLATE)
+        (card / "meta" / "common.json").write_text(json.dumps({"title": "Card"}))
+
+        dataset_path = root / "people"
+        dataset_path.mkdir()
+        manifest = {"id": "test/people", "fields": [{"name": "name", "source": "name", "type": "str"}]}
+        (dataset_path / "manifest.yaml").write_text(yaml.dump(manifest))
+        DiskDataset(str(dataset_path)).insert_many([("a", {"name": "Alice"}), ("b", {"name": "Bob"})])
+
+        self.server = TemplateServer(str(root / "site"), [str(dataset_path)], max_batch_size=10)
+        self.client = TestClient(self.server.app)
+
+    def tearDown(self):
+        self.client.close()
+        self.tmp.cleanup()
+
+
+class TestHydrate(TemplateServerTestCase):
+    def test_payload_carries_markup_and_context(self):
+        response = self.client.get("/hydrate/id_cards/basic/1", params={"primary_color": [120, 50, 50, 1]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/json")
+        payload = response.json()
+        self.assertEqual(set(payload), {"html", "context"})
+        self.assertIn('<div id="view-port">Bob Card</div>', payload["html"])
+        self.assertEqual(payload["context"]["data"], {"id": 1})
+        self.assertEqual(payload["context"]["common"], {"title": "Card"})
+        self.assertEqual(set(payload["context"]["env"]["theme"]), {"primary_color", "text_color"})
+
+    def test_matches_the_rendered_page(self):
+        params = {"primary_color": [120, 50, 50, 1]}
+        page = self.client.get("/render/id_cards/basic/0", params=params)
+        payload = self.client.get("/hydrate/id_cards/basic/0", params=params).json()
+
+        self.assertEqual(page.text, payload["html"])
+        self.assertEqual(self.client.get("/hydrate/id_cards/missing/0").status_code, 404)
+
+
+class TestAsyncHandlers(TemplateServerTestCase):
+    def test_responses_report_server_timing(self):
+        response = self.client.get("/render/id_cards/basic/0")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Alice Card", response.text)
+        self.assertRegex(response.headers["server-timing"], r"^app;dur=\d+\.\d+$")
+
+    def test_blocking_work_keeps_context_variables(self):
+        variable = contextvars.ContextVar("variable")
+
+        async def call():
+            variable.set("request")
+            return await self.server.run_blocking(variable.get)
+
+        self.assertEqual(asyncio.run(call()), "request")
+
+    def test_concurrency_limit(self):
+        server = TemplateServer(str(Path(self.tmp.name) / "site"), [], max_workers=4, max_concurrency=1)
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def work():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        async def calls():
+            await asyncio.gather(*(server.run_blocking(work) for _ in range(5)))
+
+        asyncio.run(calls())
+        server.executor.shutdown()
+        self.assertEqual(peak[0], 1)
+
+
+class TestRenderBatch(TemplateServerTestCase):
+    def test_records_are_streamed_as_ndjson(self):
+        response = self.client.post("/render-batch/id_cards/basic", json={
+            "ids": [0, 1],
+            "primary_colors": [[10, 50, 50, 1], [200, 50, 50, 1]],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([line["record_id"] for line in lines], [0, 1])
+        self.assertIn("Alice Card", lines[0]["html"])
+        self.assertIn("Bob Card", lines[1]["html"])
+        self.assertTrue(lines[1]["url"].endswith("/render/id_cards/basic/1"))
+        self.assertEqual(len(lines[0]["primary_color"]), 4)
+
+    def test_failed_records_get_an_error_line(self):
+        response = self.client.post("/render-batch/id_cards/basic", json={"start": 1, "stop": 3})
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertIn("Bob", lines[0]["html"])
+        self.assertEqual(lines[1]["record_id"], 2)
+        self.assertEqual(lines[1]["status"], 500)
+        self.assertIn("error", lines[1])
+        self.assertNotIn("html", lines[1])
+
+    def test_oversized_batches_are_rejected(self):
+        for body in ({"start": 0, "stop": 10 ** 12}, {"ids": list(range(11))}):
+            response = self.client.post("/render-batch/id_cards/basic", json=body)
+            self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.client.post("/render-batch/id_cards/basic", json={}).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()